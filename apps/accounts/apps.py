@@ -5,5 +5,6 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
 
-def ready(sealf):
-    import apps.accounts.signals
\ No newline at end of file
+    def ready(self):
+        from .roles import connect_signals
+        connect_signals()
@@ -4,6 +4,8 @@ from functools import wraps
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
 
+from .roles import in_groups
+
 def role_required(role, redirect_to_login=True):
     def check(u):
         return u.is_authenticated and getattr(u, 'profile', None) and u.profile.role == role
@@ -20,7 +22,7 @@ def group_required(group_name):
         @wraps(view_func)
         @login_required
         def _wrapped(request, *args, **kwargs):
-            if request.user.is_superuser or request.user.groups.filter(name=group_name).exists():
+            if request.user.is_superuser or in_groups(request.user, group_name):
                 return view_func(request, *args, **kwargs)
             return HttpResponseForbidden("No tienes permisos para ver esta página.")
         return _wrapped
@@ -31,7 +33,7 @@ def groups_required(group_names):
         @wraps(view_func)
         @login_required
         def _wrapped(request, *args, **kwargs):
-            if request.user.is_superuser or request.user.groups.filter(name__in=group_names).exists():
+            if request.user.is_superuser or in_groups(request.user, *group_names):
                 return view_func(request, *args, **kwargs)
             return HttpResponseForbidden("No tienes permisos para ver esta página.")
         return _wrapped
@@ -0,0 +1,17 @@
+from .roles import group_names
+
+
+class RoleMiddleware:
+    """
+    Adjunta a `request.user` el frozenset `group_names` con sus grupos, que se
+    cargan una sola vez por petición (ver `apps.accounts.roles`).
+    Debe ir después de `AuthenticationMiddleware`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.user.is_authenticated:
+            request.user.group_names = group_names(request.user)
+        return self.get_response(request)
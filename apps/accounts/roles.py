@@ -0,0 +1,74 @@
+"""
+Resolución de los grupos (roles) del usuario.
+
+Cada comprobación de rol hacía su propia consulta `user.groups.filter(...)`; una
+página con la barra lateral, el dashboard y varias etiquetas `in_group` repetía la
+misma consulta muchas veces. Aquí los nombres de los grupos de un usuario se
+leen una sola vez por petición y se guardan en el propio objeto `request.user`
+(ver `RoleMiddleware`). Entre peticiones se comparten en la caché de Django
+durante `ROLE_CACHE_TTL` segundos; al cambiar los grupos de un usuario o renombrar
+o borrar un grupo, la entrada se invalida (ver `connect_signals`).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+
+CACHE_KEY = 'accounts:groups:{}'
+
+
+def group_names(user):
+    """
+    Nombres de los grupos del usuario, como frozenset.
+
+    Se calcula una vez por objeto usuario (es decir, por petición) y se apoya en la
+    caché de Django para no consultar la base de datos en cada petición.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, '_group_names', None)
+    if names is None:
+        key = CACHE_KEY.format(user.pk)
+        names = cache.get(key)
+        if names is None:
+            names = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, names, getattr(settings, 'ROLE_CACHE_TTL', 60))
+        user._group_names = names
+    return names
+
+
+def in_groups(user, *names):
+    """Indica si el usuario pertenece a alguno de los grupos dados."""
+    return not group_names(user).isdisjoint(names)
+
+
+def invalidate_user_groups(user_ids):
+    """Borra de la caché los grupos de los usuarios indicados."""
+    cache.delete_many([CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+def _groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # pre_clear: después del clear ya no se sabe qué usuarios tenía un grupo.
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        # user.groups.add/remove/clear/set
+        invalidate_user_groups([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+    elif pk_set:
+        # group.user_set.add/remove
+        invalidate_user_groups(pk_set)
+
+
+def _group_members_changed(sender, instance, **kwargs):
+    # Un grupo renombrado o borrado cambia los nombres de todos sus miembros.
+    invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+
+
+def connect_signals():
+    """Conecta la invalidación de la caché de grupos; se llama desde `AccountsConfig.ready`."""
+    m2m_changed.connect(_groups_changed, sender=get_user_model().groups.through, dispatch_uid='accounts_groups_changed')
+    post_save.connect(_group_members_changed, sender=Group, dispatch_uid='accounts_group_saved')
+    pre_delete.connect(_group_members_changed, sender=Group, dispatch_uid='accounts_group_deleted')
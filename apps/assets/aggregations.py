@@ -0,0 +1,129 @@
+"""
+Agregaciones de activos por estado y por categoría.
+
+Todas las funciones resuelven sus conteos en una sola consulta agrupada usando
+agregación condicional sobre `Asset.status`; los porcentajes se calculan en
+Python a partir de ese único resultado. Sin filtros, los totales se leen de los
+contadores por estado (ver `apps.assets.counters`) en lugar de contar `Asset`.
+"""
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .counters import counted_status_counts
+from .models import Asset, AssetCategory
+
+STATUS_KEYS = [key for key, _ in Asset.STATUS_CHOICES]
+
+
+def _status_aggregates(prefix=''):
+    """
+    Construye las expresiones de conteo condicional para cada estado.
+
+    Args:
+        prefix (str): Prefijo de la relación hacia `Asset` (ej. 'assets__').
+
+    Returns:
+        dict: Expresiones `Count` indexadas por 'total' y por cada estado.
+    """
+    aggregates = {'total': Count(f'{prefix}id')}
+    for status in STATUS_KEYS:
+        aggregates[status] = Count(f'{prefix}id', filter=Q(**{f'{prefix}status': status}))
+    return aggregates
+
+
+def _counter_aggregates():
+    """Como `_status_aggregates`, pero sumando los contadores de cada categoría."""
+    aggregates = {'total': Coalesce(Sum('status_counts__count'), 0)}
+    for status in STATUS_KEYS:
+        aggregates[status] = Coalesce(Sum('status_counts__count', filter=Q(status_counts__status=status)), 0)
+    return aggregates
+
+
+def _percentage(part, total):
+    """Porcentaje de `part` sobre `total`, redondeado a dos decimales."""
+    return round((part / total) * 100, 2) if total > 0 else 0
+
+
+def status_counts(assets=None):
+    """
+    Cuenta los activos totales y por estado en una sola consulta.
+
+    Args:
+        assets (QuerySet, optional): Queryset de activos ya filtrado.
+            Por defecto, todos los activos, leídos de los contadores.
+
+    Returns:
+        dict: {'total': int, 'disponible': int, 'en_uso': int, 'mantenimiento': int}
+    """
+    if assets is None:
+        return counted_status_counts()
+    return assets.aggregate(**_status_aggregates())
+
+
+def status_summary(assets=None, counts=None):
+    """
+    Resumen por estado con su nombre legible y porcentaje sobre el total.
+
+    Solo incluye los estados con al menos un activo.
+
+    Args:
+        assets (QuerySet, optional): Queryset de activos ya filtrado.
+        counts (dict, optional): Totales ya calculados (p. ej. con
+            `counted_status_counts`); si se indican, se ignora `assets`.
+
+    Returns:
+        tuple: (lista de dicts con 'status', 'label', 'total' y 'percentage', total de activos)
+    """
+    if counts is None:
+        counts = status_counts(assets)
+    total = counts['total']
+    status_labels = dict(Asset.STATUS_CHOICES)
+    summary = [
+        {
+            'status': status,
+            'label': status_labels[status],
+            'total': counts[status],
+            'percentage': _percentage(counts[status], total),
+        }
+        for status in STATUS_KEYS if counts[status]
+    ]
+    return summary, total
+
+
+def category_breakdown():
+    """
+    Distribución de activos por categoría y estado en una sola consulta agrupada
+    sobre los contadores.
+
+    Incluye las categorías sin activos y devuelve los porcentajes como cadenas
+    con punto decimal, listas para usarse en atributos `style` de las plantillas.
+
+    Returns:
+        list: Un dict por categoría con los totales y porcentajes por estado.
+    """
+    rows = (AssetCategory.objects
+            .annotate(**_counter_aggregates())
+            .values('name', 'total', *STATUS_KEYS))
+
+    data_by_category = []
+    for row in rows:
+        total = row['total']
+        disponibles_pct = _percentage(row['disponible'], total)
+        en_uso_pct = _percentage(row['en_uso'], total)
+        mantenimiento_pct = _percentage(row['mantenimiento'], total)
+        remaining_pct_for_bar = 0
+        if total > 0:
+            remaining_pct_for_bar = max(round(100 - (disponibles_pct + en_uso_pct + mantenimiento_pct), 2), 0)
+
+        data_by_category.append({
+            "categoria": row['name'],
+            "total": total,
+            "disponibles": row['disponible'],
+            "en_uso": row['en_uso'],
+            "mantenimiento": row['mantenimiento'],
+            "disponibles_pct": str(disponibles_pct).replace(',', '.'),
+            "en_uso_pct": str(en_uso_pct).replace(',', '.'),
+            "mantenimiento_pct": str(mantenimiento_pct).replace(',', '.'),
+            "remaining_pct_for_bar": str(remaining_pct_for_bar).replace(',', '.'),
+        })
+    return data_by_category
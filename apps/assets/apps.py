@@ -5,6 +5,9 @@ class AssetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.assets'
 
+    def ready(self):
+        import apps.assets.signals  # noqa: F401
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -0,0 +1,111 @@
+"""
+Disponibilidad de muchos activos en una ventana de tiempo.
+
+`asset_availability` resuelve en una sola consulta el estado de un conjunto de
+activos (por id o por subárbol de categorías) junto con sus reservas en
+conflicto, uniendo con `AssetReservation` mediante una `FilteredRelation`.
+A partir de esas reservas calcula en Python los huecos libres de cada activo
+dentro de la ventana pedida.
+"""
+from django.db.models import FilteredRelation, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.events.models import AssetReservation
+from .models import Asset
+
+
+def parse_window_datetime(value):
+    """Convierte una fecha ISO 8601 en un datetime con zona horaria, o None si no es válida."""
+    try:
+        parsed = parse_datetime(value or '')
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _free_slots(start, end, busy):
+    """
+    Huecos libres de [start, end) tras descontar los intervalos ocupados.
+
+    Args:
+        start (datetime): Inicio de la ventana.
+        end (datetime): Fin de la ventana.
+        busy (list): Intervalos (inicio, fin) ordenados por inicio.
+
+    Returns:
+        list: Intervalos (inicio, fin) libres, en orden cronológico.
+    """
+    slots = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            slots.append((cursor, min(busy_start, end)))
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        slots.append((cursor, end))
+    return slots
+
+
+def asset_availability(start, end, asset_ids=None, category=None, exclude_event=None):
+    """
+    Disponibilidad de varios activos en la ventana [start, end).
+
+    Un activo está disponible si su estado es 'disponible' y no tiene reservas
+    de eventos aprobados o activos que se solapen con la ventana. Los huecos
+    libres solo consideran las reservas, no el estado actual del activo.
+
+    Args:
+        start (datetime): Inicio de la ventana.
+        end (datetime): Fin de la ventana.
+        asset_ids (iterable, optional): Ids de los activos a comprobar.
+        category (AssetCategory, optional): Limita a los activos de la categoría
+            y de todas sus subcategorías.
+        exclude_event (Evento, optional): Evento cuyas reservas se ignoran, p. ej.
+            al editar ese mismo evento.
+
+    Returns:
+        dict: Por id de activo, un dict con 'id', 'name', 'status', 'available',
+        'conflicts' (lista de {'event_id', 'start', 'end'}) y 'free_slots'.
+    """
+    assets = Asset.objects.all()
+    if asset_ids is not None:
+        assets = assets.filter(id__in=asset_ids)
+    if category is not None:
+        # Subárbol MPTT resuelto con los límites del nodo, sin consultar los descendientes.
+        assets = assets.filter(
+            category__tree_id=category.tree_id,
+            category__lft__gte=category.lft,
+            category__rght__lte=category.rght,
+        )
+
+    condition = Q(
+        reservations__status__in=AssetReservation.BLOCKING_STATUSES,
+        reservations__end__gt=start,
+        reservations__start__lt=end,
+    )
+    if exclude_event is not None:
+        condition &= ~Q(reservations__event=exclude_event)
+
+    rows = (assets
+            .annotate(busy=FilteredRelation('reservations', condition=condition))
+            .values_list('id', 'name', 'status', 'busy__event_id', 'busy__start', 'busy__end')
+            .order_by('id', 'busy__start'))
+
+    availability = {}
+    for asset_id, name, status, event_id, busy_start, busy_end in rows:
+        entry = availability.get(asset_id)
+        if entry is None:
+            entry = availability[asset_id] = {'id': asset_id, 'name': name, 'status': status, 'conflicts': []}
+        if event_id is not None:
+            entry['conflicts'].append({'event_id': event_id, 'start': busy_start, 'end': busy_end})
+
+    for entry in availability.values():
+        busy = [(max(c['start'], start), min(c['end'], end)) for c in entry['conflicts']]
+        entry['free_slots'] = _free_slots(start, end, busy)
+        entry['available'] = entry['status'] == 'disponible' and not entry['conflicts']
+    return availability
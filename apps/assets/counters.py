@@ -0,0 +1,134 @@
+"""
+Contadores de activos por (categoría, ubicación, estado).
+
+`AssetStatusCount` guarda cuántos activos hay en cada combinación, para que los
+totales por estado del listado de activos, el dashboard, los reportes y el
+chatbot se lean de una tabla pequeña en lugar de contar `Asset`.
+
+Los contadores se ajustan en las señales de `Asset` (ver `apps.assets.signals`):
+antes de guardar se lee la clave que tiene el activo en la base de datos y, tras
+guardarlo, se resta uno a la clave antigua y se suma uno a la nueva; al borrarlo
+se resta uno a la clave que tenía en la base de datos. `Asset.save` se ejecuta en una transacción, así que el
+cambio del activo y el de sus contadores se confirman juntos, tanto en las vistas
+de préstamos, mantenimientos y solicitudes como en cualquier otro sitio que
+guarde un activo. Las actualizaciones masivas (`QuerySet.update`) no envían
+señales y deben llamar a `adjust_counters`.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Asset, AssetStatusCount
+
+KEY_FIELDS = ('category_id', 'location', 'status')
+
+
+def counter_key(asset):
+    """Clave (category_id, location, status) de un activo."""
+    return (asset.category_id, asset.location, asset.status)
+
+
+def adjust_counters(deltas):
+    """
+    Suma a cada contador su variación.
+
+    Args:
+        deltas (dict): {(category_id, location, status): variación}.
+    """
+    for (category_id, location, status), delta in deltas.items():
+        if not delta:
+            continue
+        counters = AssetStatusCount.objects.filter(category_id=category_id, location=location, status=status)
+        if counters.update(count=F('count') + delta) or delta < 0:
+            # Una resta sin contador solo ocurre si se está borrando la categoría.
+            continue
+        try:
+            with transaction.atomic():
+                AssetStatusCount.objects.create(category_id=category_id, location=location, status=status, count=delta)
+        except IntegrityError:
+            # Otro proceso lo creó a la vez.
+            counters.update(count=F('count') + delta)
+
+
+def status_change_deltas(rows, status):
+    """
+    Variaciones de los contadores si todos los activos de `rows` pasan a `status`.
+
+    Args:
+        rows (iterable): Claves (category_id, location, status) actuales de los
+            activos, ya bloqueados para que no cambien antes del `UPDATE`.
+        status (str): Estado nuevo.
+    """
+    deltas = Counter()
+    for category_id, location, current in rows:
+        if current != status:
+            deltas[(category_id, location, current)] -= 1
+            deltas[(category_id, location, status)] += 1
+    return deltas
+
+
+def counted_status_counts(category=None, location=None, status=None):
+    """
+    Totales por estado leídos de los contadores, con la misma forma que
+    `apps.assets.aggregations.status_counts`.
+
+    Args:
+        category: Categoría (o su id) exacta.
+        location (str): Texto contenido en la ubicación.
+        status (str): Estado exacto.
+
+    Returns:
+        dict: {'total': int, 'disponible': int, 'en_uso': int, 'mantenimiento': int}
+    """
+    counters = AssetStatusCount.objects.all()
+    if category:
+        counters = counters.filter(category=category)
+    if location:
+        counters = counters.filter(location__icontains=location)
+    if status:
+        counters = counters.filter(status=status)
+    counts = {key: 0 for key, _ in Asset.STATUS_CHOICES}
+    for current, count in counters.values_list('status', 'count'):
+        counts[current] = counts.get(current, 0) + count
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def verify_counters(repair=False):
+    """
+    Compara los contadores con un recuento real de los activos.
+
+    Args:
+        repair (bool): Corregir las diferencias encontradas.
+
+    Returns:
+        list: Tuplas (clave, valor guardado, valor real) de los contadores que difieren.
+    """
+    with transaction.atomic():
+        # Bloquear los contadores mientras se cuenta: los cambios de activos que
+        # lleguen a la vez esperan y se aplican sobre el valor ya corregido.
+        stored = {
+            (category_id, location, status): (pk, count)
+            for pk, category_id, location, status, count in AssetStatusCount.objects
+            .select_for_update().values_list('pk', *KEY_FIELDS, 'count')
+        }
+        actual = {
+            (category_id, location, status): count
+            for category_id, location, status, count in Asset.objects
+            .values_list(*KEY_FIELDS).annotate(count=Count('pk')).order_by()
+        }
+        drift = []
+        for key in stored.keys() | actual.keys():
+            stored_count = stored[key][1] if key in stored else 0
+            if stored_count != actual.get(key, 0):
+                drift.append((key, stored_count, actual.get(key, 0)))
+        if repair:
+            for key, stored_count, actual_count in drift:
+                if key in stored:
+                    AssetStatusCount.objects.filter(pk=stored[key][0]).update(count=actual_count)
+                else:
+                    adjust_counters({key: actual_count})
+            # Las combinaciones sin activos no aportan nada.
+            AssetStatusCount.objects.filter(count=0).delete()
+    return drift
@@ -0,0 +1,121 @@
+"""
+Diario de cambios de estado de los activos y lectura incremental.
+
+Cada cambio de `Asset.status` (al crear, guardar o borrar un activo, y en las
+reconciliaciones masivas) añade una fila a `AssetStatusTransition` en la misma
+transacción que el cambio (ver `apps.assets.signals`). Las vistas indican la
+causa con `Asset.set_status(status, cause)`; los guardados sin causa se
+registran como 'edit'.
+
+Los agregados que dependen del estado no necesitan recorrer de nuevo las tablas:
+se registran como consumidores en `ASSET_JOURNAL_CONSUMERS` (nombre -> ruta de
+una función que recibe una lista de transiciones) y
+`python manage.py consume_asset_journal` les pasa solo las transiciones
+posteriores a su cursor (`AssetJournalCursor`), que avanza en la misma
+transacción que el consumidor.
+
+Los ids se asignan al insertar, pero las transacciones pueden confirmarse en
+otro orden; para no saltarse una transición que aún no se ha confirmado, solo se
+leen las que tienen más de `ASSET_JOURNAL_LAG_SECONDS` segundos. Aun así, una
+transacción larga puede confirmar un id menor que otro ya leído: los ids que
+faltan por debajo del cursor se guardan como huecos (`AssetJournalCursor.gaps`) y
+se vuelven a buscar en cada lectura durante `ASSET_JOURNAL_GAP_SECONDS` segundos.
+Pasado ese plazo se da el id por perdido (una transacción deshecha también deja
+huecos).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AssetJournalCursor, AssetStatusTransition
+
+CAUSE_CREATE = 'create'
+CAUSE_EDIT = 'edit'
+CAUSE_DELETE = 'delete'
+CAUSE_RECONCILE = 'reconcile'
+# Estado de cada activo al crear el diario (migración 0013).
+CAUSE_BASELINE = 'baseline'
+# Causas indicadas por las vistas con `Asset.set_status`.
+CAUSE_LOAN_CREATE = 'loan_create'
+CAUSE_LOAN_EDIT = 'loan_edit'
+CAUSE_LOAN_RETURN = 'loan_return'
+CAUSE_LOAN_DELETE = 'loan_delete'
+CAUSE_MAINTENANCE_CREATE = 'maintenance_create'
+CAUSE_MAINTENANCE_EDIT = 'maintenance_edit'
+CAUSE_MAINTENANCE_DELETE = 'maintenance_delete'
+CAUSE_REQUEST_APPROVE = 'request_approve'
+CAUSE_CHATBOT_MAINTENANCE = 'chatbot_maintenance'
+
+
+def record_transition(asset_id, old_status, new_status, cause):
+    """Añade una transición al diario."""
+    AssetStatusTransition.objects.create(asset_id=asset_id, old_status=old_status, new_status=new_status, cause=cause)
+
+
+def record_transitions(rows, cause):
+    """
+    Añade varias transiciones de una vez.
+
+    Args:
+        rows (iterable): Tuplas (asset_id, estado anterior, estado nuevo).
+        cause (str): Causa común a todas.
+    """
+    now = timezone.now()
+    AssetStatusTransition.objects.bulk_create(
+        (AssetStatusTransition(asset_id=asset_id, old_status=old, new_status=new, cause=cause, created_at=now)
+         for asset_id, old, new in rows),
+        batch_size=1000,
+    )
+
+
+def get_consumers():
+    """Consumidores configurados en `ASSET_JOURNAL_CONSUMERS`, como {nombre: función}."""
+    return {name: import_string(path) for name, path in getattr(settings, 'ASSET_JOURNAL_CONSUMERS', {}).items()}
+
+
+def consume(name, handler, batch_size=1000):
+    """
+    Pasa a `handler` las transiciones del diario posteriores al cursor de `name`.
+
+    Se procesan en lotes de `batch_size` por orden de id, junto con las transiciones
+    de los huecos del cursor que ya se han confirmado; cada lote se procesa y el
+    cursor avanza en una misma transacción, así que si el consumidor falla el lote
+    se repetirá en la próxima ejecución. El cursor se bloquea mientras tanto, de
+    modo que dos ejecuciones del mismo consumidor no se solapan.
+
+    Returns:
+        int: Número de transiciones procesadas.
+    """
+    horizon = timezone.now() - timedelta(seconds=getattr(settings, 'ASSET_JOURNAL_LAG_SECONDS', 5))
+    gap_seconds = getattr(settings, 'ASSET_JOURNAL_GAP_SECONDS', 3600)
+    processed = 0
+    while True:
+        with transaction.atomic():
+            AssetJournalCursor.objects.get_or_create(consumer=name)
+            cursor = AssetJournalCursor.objects.select_for_update().get(consumer=name)
+            now = timezone.now().timestamp()
+            gaps = {pk: seen for pk, seen in cursor.gaps if now - seen < gap_seconds}
+            late = list(AssetStatusTransition.objects.filter(pk__in=gaps)) if gaps else []
+            new = list(AssetStatusTransition.objects
+                       .filter(pk__gt=cursor.position, created_at__lt=horizon)
+                       .order_by('pk')[:batch_size])
+            batch = sorted(late + new, key=lambda transition: transition.pk)
+            if batch:
+                handler(batch)
+            for transition in late:
+                del gaps[transition.pk]
+            if new:
+                # Un cursor nuevo no tiene huecos por debajo de la primera transición.
+                first = cursor.position + 1 if cursor.position else new[0].pk
+                read = {transition.pk for transition in new}
+                gaps.update((pk, now) for pk in range(first, new[-1].pk) if pk not in read)
+                cursor.position = new[-1].pk
+            if batch or len(gaps) != len(cursor.gaps):
+                cursor.gaps = sorted([pk, seen] for pk, seen in gaps.items())
+                cursor.save(update_fields=['position', 'gaps', 'updated_at'])
+        processed += len(batch)
+        if not new:
+            return processed
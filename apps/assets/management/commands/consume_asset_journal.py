@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.assets.journal import consume, get_consumers
+
+class Command(BaseCommand):
+    help = '''Feeds the new asset status transitions to the journal consumers configured in ASSET_JOURNAL_CONSUMERS.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', action='append', help='Only run this consumer (can be repeated).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Transitions per batch and transaction.')
+
+    def handle(self, *args, **options):
+        consumers = get_consumers()
+        names = options['consumer'] or list(consumers)
+        unknown = set(names) - set(consumers)
+        if unknown:
+            raise CommandError(f"Unknown consumers: {', '.join(sorted(unknown))}")
+        if not names:
+            self.stdout.write(self.style.WARNING('No journal consumers configured.'))
+            return
+
+        for name in names:
+            processed = consume(name, consumers[name], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{name}: {processed} transitions processed.'))
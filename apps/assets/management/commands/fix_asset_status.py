@@ -1,22 +1,32 @@
 from django.core.management.base import BaseCommand
-from apps.assets.models import Asset
-from apps.loans.models import Loan
+from apps.assets.reconciliation import reconcile_asset_statuses
 
 class Command(BaseCommand):
-    help = '''Recalculates and corrects the status of all assets based on active loans.'''
+    help = '''Recalculates and corrects the status of all assets based on active loans and maintenance tasks.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the assets whose status would change.')
+        parser.add_argument('--limit', type=int, default=50, help='Maximum number of differing assets listed with --dry-run (0 for all).')
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting asset status recalculation...'))
 
-        assets_in_use = Asset.objects.filter(status='en_uso')
-        updated_count = 0
+        report = reconcile_asset_statuses(dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            diff = report['diff'] if options['limit'] <= 0 else report['diff'][:options['limit']]
+            for pk, name, current, new in diff:
+                self.stdout.write(f"  - Asset '{name}' (ID: {pk}): \"{current}\" -> \"{new}\"")
+            if len(diff) < len(report['diff']):
+                self.stdout.write(f"  ... and {len(report['diff']) - len(diff)} more.")
 
-        for asset in assets_in_use:
-            active_loans = Loan.objects.filter(asset=asset, status='Activo').exists()
-            if not active_loans:
-                asset.status = 'disponible'
-                asset.save()
-                updated_count += 1
-                self.stdout.write(self.style.SUCCESS(f"  - Asset '{asset.name}' status updated to \"disponible\"."))
+        for status, count in report['changes'].items():
+            self.stdout.write(f"  {status}: {count} assets {'to update' if options['dry_run'] else 'updated'}.")
+        for phase, seconds in report['timings'].items():
+            self.stdout.write(f"  {phase}: {seconds:.3f}s")
 
-        self.stdout.write(self.style.SUCCESS(f'Recalculation complete. {updated_count} assets updated.'))
+        total = sum(report['changes'].values())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run complete. {total} assets would be updated.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Recalculation complete. {total} assets updated.'))
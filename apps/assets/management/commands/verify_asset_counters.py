@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.assets.counters import verify_counters
+
+class Command(BaseCommand):
+    help = '''Compares the per-status asset counters with a real count of the assets and optionally repairs them.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Overwrite the counters that differ with the real count.')
+
+    def handle(self, *args, **options):
+        drift = verify_counters(repair=options['repair'])
+        for (category_id, location, status), stored, actual in sorted(drift, key=lambda item: str(item[0])):
+            self.stdout.write(f"  - Category {category_id} / '{location}' / {status}: stored {stored}, actual {actual}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Asset counters are consistent.'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} counters repaired.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counters differ. Run with --repair to fix them.'))
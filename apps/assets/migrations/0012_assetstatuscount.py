@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    """Cuenta los activos existentes por categoría, ubicación y estado."""
+    Asset = apps.get_model('assets', 'Asset')
+    AssetStatusCount = apps.get_model('assets', 'AssetStatusCount')
+    rows = Asset.objects.values_list('category_id', 'location', 'status').annotate(count=models.Count('pk')).order_by()
+    AssetStatusCount.objects.bulk_create(
+        (AssetStatusCount(category_id=category_id, location=location, status=status, count=count)
+         for category_id, location, status, count in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0011_remove_assetrequest_asset_remove_assetrequest_user_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('disponible', 'Disponible'), ('en_uso', 'En uso'), ('mantenimiento', 'En mantenimiento')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counts', to='assets.assetcategory')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'location', 'status'), name='unique_asset_status_count')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_journal(apps, schema_editor):
+    """Registra el estado actual de cada activo como punto de partida del diario."""
+    Asset = apps.get_model('assets', 'Asset')
+    AssetStatusTransition = apps.get_model('assets', 'AssetStatusTransition')
+    now = timezone.now()
+    AssetStatusTransition.objects.bulk_create(
+        (AssetStatusTransition(asset_id=asset_id, old_status=None, new_status=status, cause='baseline', created_at=now)
+         for asset_id, status in Asset.objects.values_list('id', 'status').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0012_assetstatuscount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetJournalCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=50, unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssetStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(blank=True, choices=[('disponible', 'Disponible'), ('en_uso', 'En uso'), ('mantenimiento', 'En mantenimiento')], max_length=20, null=True)),
+                ('new_status', models.CharField(blank=True, choices=[('disponible', 'Disponible'), ('en_uso', 'En uso'), ('mantenimiento', 'En mantenimiento')], max_length=20, null=True)),
+                ('cause', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('asset', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_transitions', to='assets.asset')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['asset', 'created_at'], name='transition_asset_time_idx')],
+            },
+        ),
+        migrations.RunPython(seed_journal, migrations.RunPython.noop),
+    ]
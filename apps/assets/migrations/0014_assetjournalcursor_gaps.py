@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0013_assetstatustransition_assetjournalcursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetjournalcursor',
+            name='gaps',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from mptt.models import MPTTModel, TreeForeignKey
 from django.utils import timezone
 
@@ -47,7 +47,8 @@ class Asset(models.Model):
         """
         Verifica si el activo está disponible en un rango de fechas.
         Un activo está disponible si su estado es 'disponible' y no está
-        reservado para un evento que se solape con el rango de fechas.
+        reservado para un evento que se solape con el rango de fechas
+        (ver `apps.events.models.AssetReservation`).
 
         Args:
             start (datetime, optional): Fecha de inicio del rango. Defaults to None.
@@ -65,12 +66,7 @@ class Asset(models.Model):
             start = timezone.now()
         if end is None:
             end = start
-        overlapping = self.events_reserved_for.filter(
-            fecha_inicio__lt=end,
-            fecha_fin__gt=start,
-            status__in=['approved','active']
-        )
-        return not overlapping.exists()
+        return not self.reservations.overlapping(start, end).exists()
 
     def save(self, *args, **kwargs):
         """
@@ -79,12 +75,90 @@ class Asset(models.Model):
         El código se forma con el prefijo de la categoría y el ID del activo.
         """
         is_new = self._state.adding
-        super().save(*args, **kwargs)
-        if is_new and not self.code:
-            prefix = self.category.name[:3].upper() if self.category else 'GEN'
-            self.code = f'{prefix}-{self.pk:05d}'
-            Asset.objects.filter(pk=self.pk).update(code=self.code)
+        # En una transacción, para que los contadores por estado (actualizados en
+        # post_save, ver apps.assets.counters) cambien junto con el activo.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new and not self.code:
+                prefix = self.category.name[:3].upper() if self.category else 'GEN'
+                self.code = f'{prefix}-{self.pk:05d}'
+                Asset.objects.filter(pk=self.pk).update(code=self.code)
+
+    def set_status(self, status, cause):
+        """
+        Cambia el estado del activo y lo guarda.
+
+        La transición queda registrada en `AssetStatusTransition` con `cause`, en la
+        misma transacción que el cambio (ver apps.assets.journal).
+
+        Args:
+            status (str): Nuevo estado (una de las claves de `STATUS_CHOICES`).
+            cause (str): Qué provocó el cambio (p. ej. 'loan_create').
+        """
+        self.status = status
+        self._status_cause = cause
+        self.save(update_fields=['status', 'updated_at'])
 
     def __str__(self):
         """Representación en cadena del activo."""
         return f"{self.name} ({self.code})"
+
+
+class AssetStatusCount(models.Model):
+    """
+    Número de activos de cada categoría, ubicación y estado.
+
+    Se mantiene al crear, modificar y borrar activos (ver apps.assets.counters),
+    de modo que los totales por estado se leen sin contar la tabla de activos.
+    `python manage.py verify_asset_counters` detecta y corrige desviaciones.
+    """
+    category = models.ForeignKey(AssetCategory, on_delete=models.CASCADE, related_name='status_counts')
+    location = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=Asset.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'location', 'status'], name='unique_asset_status_count'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} / {self.location} / {self.status}: {self.count}"
+
+
+class AssetStatusTransition(models.Model):
+    """
+    Diario de cambios de estado de los activos, solo de inserción.
+
+    Cada fila es una transición (estado anterior, estado nuevo, causa, momento);
+    se escribe en la misma transacción que el cambio del activo. `old_status` es
+    nulo al crear el activo y `new_status` al borrarlo. El activo se guarda sin
+    restricción de clave foránea para que el diario sobreviva a su borrado.
+    Los consumidores lo leen por orden de id desde su cursor (ver apps.assets.journal).
+    """
+    asset = models.ForeignKey(Asset, on_delete=models.DO_NOTHING, db_constraint=False, related_name='status_transitions')
+    old_status = models.CharField(max_length=20, choices=Asset.STATUS_CHOICES, null=True, blank=True)
+    new_status = models.CharField(max_length=20, choices=Asset.STATUS_CHOICES, null=True, blank=True)
+    cause = models.CharField(max_length=50)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['asset', 'created_at'], name='transition_asset_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id}: {self.old_status} -> {self.new_status} ({self.cause})"
+
+
+class AssetJournalCursor(models.Model):
+    """Última transición del diario procesada por cada consumidor."""
+    consumer = models.CharField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)
+    # Ids menores que `position` que aún no se habían confirmado al leer, como pares
+    # [id, marca de tiempo en que se detectó el hueco] (ver apps.assets.journal).
+    gaps = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.consumer}: {self.position}"
@@ -0,0 +1,106 @@
+"""
+Reconciliación del estado de los activos con sus préstamos y mantenimientos.
+
+El estado que le corresponde a cada activo es:
+
+- 'mantenimiento' si tiene un mantenimiento pendiente o en progreso;
+- 'en_uso' si no, pero tiene un préstamo activo;
+- 'disponible' en otro caso.
+
+En lugar de recorrer los activos uno a uno, cada estado se resuelve con una
+consulta sobre todo el inventario usando subconsultas `Exists` sobre
+`Maintenance` y `Loan`; las filas cuyo estado difiere se bloquean y se
+actualizan con un `UPDATE` por estado, en lotes de `UPDATE_BATCH_SIZE` ids. Se
+usa desde `python manage.py fix_asset_status` y desde `sync_maintenance_status.py`.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.dashboard.metrics import invalidate_admin_metrics
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+
+from .counters import KEY_FIELDS, adjust_counters, status_change_deltas
+from .journal import CAUSE_RECONCILE, record_transitions
+from .models import Asset
+
+ACTIVE_MAINTENANCE_STATUSES = ('pending', 'in_progress')
+ACTIVE_LOAN_STATUS = 'Activo'
+UPDATE_BATCH_SIZE = 1000
+
+
+def _rules():
+    """Condiciones que determinan cada estado, en orden de prioridad."""
+    in_maintenance = Exists(Maintenance.objects.filter(asset=OuterRef('pk'), status__in=ACTIVE_MAINTENANCE_STATUSES))
+    on_loan = Exists(Loan.objects.filter(asset=OuterRef('pk'), status=ACTIVE_LOAN_STATUS))
+    return (
+        ('mantenimiento', (in_maintenance,)),
+        ('en_uso', (~in_maintenance, on_loan)),
+        ('disponible', (~in_maintenance, ~on_loan)),
+    )
+
+
+def mismatched_assets(assets=None):
+    """
+    Activos cuyo estado no coincide con el que les corresponde.
+
+    Args:
+        assets (QuerySet, optional): Activos a revisar; por defecto, todos.
+
+    Returns:
+        list: Tuplas (estado correcto, QuerySet de los activos que deberían tenerlo).
+    """
+    assets = Asset.objects.all() if assets is None else assets
+    return [(status, assets.filter(*conditions).exclude(status=status)) for status, conditions in _rules()]
+
+
+def reconcile_asset_statuses(assets=None, dry_run=False):
+    """
+    Corrige el estado de los activos que no coincide con sus préstamos y mantenimientos.
+
+    Args:
+        assets (QuerySet, optional): Activos a revisar; por defecto, todos.
+        dry_run (bool): Si es True no se modifica nada y se devuelven las
+            diferencias encontradas.
+
+    Returns:
+        dict: 'changes' con el número de activos por estado nuevo, 'diff' con
+              tuplas (id, nombre, estado actual, estado nuevo) si `dry_run`, y
+              'timings' con los segundos de cada fase.
+    """
+    report = {'changes': {}, 'diff': [], 'timings': {}}
+    started = time.perf_counter()
+    if dry_run:
+        for status, queryset in mismatched_assets(assets):
+            rows = list(queryset.order_by('pk').values_list('pk', 'name', 'status'))
+            report['changes'][status] = len(rows)
+            report['diff'].extend((pk, name, current, status) for pk, name, current in rows)
+        report['timings']['diff'] = time.perf_counter() - started
+        return report
+
+    # `update()` no llama a save(): se actualiza `updated_at` a mano para que las
+    # cachés que dependen de él (p. ej. apps.reports.cache) vean el cambio.
+    now = timezone.now()
+    with transaction.atomic():
+        for status, queryset in mismatched_assets(assets):
+            # Se bloquean primero los activos y después los contadores, en el mismo
+            # orden que `Asset.save` (ver apps.assets.signals). Los contadores, el
+            # diario y el UPDATE se calculan sobre las mismas filas bloqueadas.
+            rows = list(queryset.select_for_update().values_list('pk', *KEY_FIELDS))
+            adjust_counters(status_change_deltas((key for _, *key in rows), status))
+            record_transitions(((pk, current, status) for pk, _, _, current in rows), CAUSE_RECONCILE)
+            pks = [row[0] for row in rows]
+            for start in range(0, len(pks), UPDATE_BATCH_SIZE):
+                Asset.objects.filter(pk__in=pks[start:start + UPDATE_BATCH_SIZE]).update(status=status, updated_at=now)
+            report['changes'][status] = len(pks)
+    report['timings']['update'] = time.perf_counter() - started
+
+    if any(report['changes'].values()):
+        # Tampoco se envían señales post_save: se invalida el snapshot del dashboard.
+        started = time.perf_counter()
+        invalidate_admin_metrics()
+        report['timings']['invalidate'] = time.perf_counter() - started
+    return report
@@ -0,0 +1,78 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .counters import adjust_counters, counter_key
+from .journal import CAUSE_CREATE, CAUSE_DELETE, CAUSE_EDIT, record_transition
+from .models import Asset
+
+
+def _stored_key(asset):
+    # La instancia puede estar desactualizada: se lee la fila y se bloquea para que
+    # dos cambios simultáneos no partan de la misma clave.
+    return Asset.objects.select_for_update().filter(pk=asset.pk).values_list('category_id', 'location', 'status').first()
+
+
+def load_counter_key(sender, instance, raw, **kwargs):
+    """Lee de la base de datos la clave de contador que tiene el activo antes de guardarse."""
+    instance._counter_key = None
+    if not instance._state.adding and not raw:
+        instance._counter_key = _stored_key(instance)
+
+
+def load_deleted_counter_key(sender, instance, **kwargs):
+    """Lee de la base de datos la clave de contador del activo que se va a borrar."""
+    instance._counter_key = _stored_key(instance) or counter_key(instance)
+
+
+def _saved_key(instance, previous, update_fields):
+    """
+    Clave que tiene el activo en la base de datos tras guardarse. Con
+    `update_fields` (p. ej. `Asset.set_status`) solo cambian esos campos: el resto
+    se toma de la fila leída antes de guardar, no de la instancia, que puede estar
+    desactualizada.
+    """
+    current = counter_key(instance)
+    if previous is None or update_fields is None:
+        return current
+    updated = {'category' if field == 'category_id' else field for field in update_fields}
+    return tuple(new if field in updated else old
+                 for field, old, new in zip(('category', 'location', 'status'), previous, current))
+
+
+def count_saved_asset(sender, instance, created, update_fields=None, **kwargs):
+    """Mueve el activo al contador de su nueva categoría, ubicación o estado."""
+    previous = getattr(instance, '_counter_key', None)
+    current = _saved_key(instance, previous, update_fields)
+    if previous != current:
+        deltas = {current: 1}
+        if previous is not None:
+            deltas[previous] = -1
+        adjust_counters(deltas)
+
+
+def journal_saved_asset(sender, instance, created, update_fields=None, **kwargs):
+    """Registra en el diario el estado inicial o el cambio de estado del activo."""
+    previous = getattr(instance, '_counter_key', None)
+    old_status = previous[2] if previous else None
+    new_status = _saved_key(instance, previous, update_fields)[2]
+    if created or old_status != new_status:
+        cause = CAUSE_CREATE if created else getattr(instance, '_status_cause', None) or CAUSE_EDIT
+        record_transition(instance.pk, old_status, new_status, cause)
+    instance._status_cause = None
+
+
+def uncount_deleted_asset(sender, instance, **kwargs):
+    """Descuenta un activo borrado."""
+    adjust_counters({instance._counter_key: -1})
+
+
+def journal_deleted_asset(sender, instance, **kwargs):
+    """Registra en el diario el borrado del activo."""
+    record_transition(instance.pk, instance._counter_key[2], None, CAUSE_DELETE)
+
+
+pre_save.connect(load_counter_key, sender=Asset, dispatch_uid='assets_load_counter_key')
+post_save.connect(count_saved_asset, sender=Asset, dispatch_uid='assets_count_saved_asset')
+post_save.connect(journal_saved_asset, sender=Asset, dispatch_uid='assets_journal_saved_asset')
+pre_delete.connect(load_deleted_counter_key, sender=Asset, dispatch_uid='assets_load_deleted_counter_key')
+post_delete.connect(uncount_deleted_asset, sender=Asset, dispatch_uid='assets_uncount_deleted_asset')
+post_delete.connect(journal_deleted_asset, sender=Asset, dispatch_uid='assets_journal_deleted_asset')
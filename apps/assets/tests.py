@@ -1,3 +1,212 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+
+from .counters import counted_status_counts, verify_counters
+from .journal import CAUSE_CREATE, CAUSE_DELETE, CAUSE_EDIT, CAUSE_LOAN_CREATE, CAUSE_RECONCILE, consume
+from .models import Asset, AssetCategory, AssetJournalCursor, AssetStatusCount, AssetStatusTransition
+from .reconciliation import reconcile_asset_statuses
+
+
+class AssetTestMixin:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = AssetCategory.objects.create(name="Portátiles")
+        cls.other_category = AssetCategory.objects.create(name="Proyectores")
+        cls.user = User.objects.create_user(username="tecnico", password="x")
+
+    def counter(self, category, location, status):
+        counter = AssetStatusCount.objects.filter(category=category, location=location, status=status).first()
+        return counter.count if counter else 0
+
+
+class ReconciliationTests(AssetTestMixin, TestCase):
+    """Reconciliación del estado de los activos con sus préstamos y mantenimientos."""
+
+    def setUp(self):
+        self.on_loan = Asset.objects.create(name="Portátil 1", category=self.category, location="Sala 1")
+        self.in_maintenance = Asset.objects.create(name="Portátil 2", category=self.category, location="Sala 1", status='en_uso')
+        self.idle = Asset.objects.create(name="Portátil 3", category=self.category, location="Sala 1", status='mantenimiento')
+        self.correct = Asset.objects.create(name="Portátil 4", category=self.category, location="Sala 1")
+        Loan.objects.create(asset=self.on_loan, user=self.user, status='Activo')
+        Maintenance.objects.create(asset=self.in_maintenance, status='in_progress')
+        Maintenance.objects.create(asset=self.idle, status='completed')
+
+    def test_dry_run_reports_without_changing(self):
+        report = reconcile_asset_statuses(dry_run=True)
+        self.assertEqual(report['changes'], {'mantenimiento': 1, 'en_uso': 1, 'disponible': 1})
+        self.assertEqual(sorted(report['diff']), sorted([
+            (self.on_loan.pk, "Portátil 1", 'disponible', 'en_uso'),
+            (self.in_maintenance.pk, "Portátil 2", 'en_uso', 'mantenimiento'),
+            (self.idle.pk, "Portátil 3", 'mantenimiento', 'disponible'),
+        ]))
+        self.assertEqual(Asset.objects.get(pk=self.on_loan.pk).status, 'disponible')
+        self.assertFalse(AssetStatusTransition.objects.filter(cause=CAUSE_RECONCILE).exists())
+
+    def test_apply_updates_statuses_counters_and_journal(self):
+        report = reconcile_asset_statuses()
+        self.assertEqual(report['changes'], {'mantenimiento': 1, 'en_uso': 1, 'disponible': 1})
+        self.assertEqual(report['diff'], [])
+        statuses = dict(Asset.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            self.on_loan.pk: 'en_uso',
+            self.in_maintenance.pk: 'mantenimiento',
+            self.idle.pk: 'disponible',
+            self.correct.pk: 'disponible',
+        })
+        self.assertEqual(verify_counters(), [])
+        self.assertEqual(
+            set(AssetStatusTransition.objects.filter(cause=CAUSE_RECONCILE).values_list('asset_id', 'old_status', 'new_status')),
+            {
+                (self.on_loan.pk, 'disponible', 'en_uso'),
+                (self.in_maintenance.pk, 'en_uso', 'mantenimiento'),
+                (self.idle.pk, 'mantenimiento', 'disponible'),
+            },
+        )
+        # Una segunda pasada no encuentra nada que corregir.
+        self.assertEqual(reconcile_asset_statuses(dry_run=True)['changes'], {'mantenimiento': 0, 'en_uso': 0, 'disponible': 0})
+
+
+class AssetCounterTests(AssetTestMixin, TestCase):
+    """Contadores por (categoría, ubicación, estado) mantenidos por las señales de Asset."""
+
+    def test_create_edit_and_delete_move_counters(self):
+        asset = Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+        self.assertEqual(self.counter(self.category, "Sala 1", 'disponible'), 1)
+
+        asset.status = 'en_uso'
+        asset.location = "Sala 2"
+        asset.save()
+        self.assertEqual(self.counter(self.category, "Sala 1", 'disponible'), 0)
+        self.assertEqual(self.counter(self.category, "Sala 2", 'en_uso'), 1)
+
+        asset.category = self.other_category
+        asset.save()
+        self.assertEqual(self.counter(self.category, "Sala 2", 'en_uso'), 0)
+        self.assertEqual(self.counter(self.other_category, "Sala 2", 'en_uso'), 1)
+
+        asset.delete()
+        self.assertEqual(self.counter(self.other_category, "Sala 2", 'en_uso'), 0)
+        self.assertEqual(counted_status_counts()['total'], 0)
+
+    def test_set_status_on_stale_instance_keeps_stored_location(self):
+        asset = Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+        stale = Asset.objects.get(pk=asset.pk)
+        asset.location = "Sala 2"
+        asset.save()
+
+        stale.set_status('mantenimiento', CAUSE_EDIT)
+        self.assertEqual(self.counter(self.category, "Sala 1", 'mantenimiento'), 0)
+        self.assertEqual(self.counter(self.category, "Sala 2", 'mantenimiento'), 1)
+        self.assertEqual(verify_counters(), [])
+
+    def test_verify_counters_detects_and_repairs_drift(self):
+        Asset.objects.create(name="Portátil 1", category=self.category, location="Sala 1")
+        Asset.objects.create(name="Portátil 2", category=self.category, location="Sala 1")
+        # Un UPDATE masivo no envía señales: los contadores quedan desfasados.
+        Asset.objects.filter(name="Portátil 2").update(status='en_uso')
+
+        drift = verify_counters()
+        self.assertEqual(sorted(drift), [
+            ((self.category.pk, "Sala 1", 'disponible'), 2, 1),
+            ((self.category.pk, "Sala 1", 'en_uso'), 0, 1),
+        ])
+        # Sin `repair` no se corrige nada.
+        self.assertEqual(self.counter(self.category, "Sala 1", 'disponible'), 2)
+
+        verify_counters(repair=True)
+        self.assertEqual(verify_counters(), [])
+        self.assertEqual(counted_status_counts(), {'disponible': 1, 'en_uso': 1, 'mantenimiento': 0, 'total': 2})
+
+
+@override_settings(ASSET_JOURNAL_LAG_SECONDS=0)
+class AssetJournalTests(AssetTestMixin, TestCase):
+    """Diario de transiciones de estado y su lectura incremental."""
+
+    def transitions(self, asset):
+        return list(AssetStatusTransition.objects.filter(asset_id=asset.pk).order_by('pk')
+                    .values_list('old_status', 'new_status', 'cause'))
+
+    def hide_transition(self, asset, cause):
+        """Borra la transición y la devuelve para volver a insertarla con el mismo id."""
+        transition = AssetStatusTransition.objects.get(asset_id=asset.pk, cause=cause)
+        pk = transition.pk
+        transition.delete()
+        transition.pk = pk
+        return transition
+
+    def test_set_status_records_one_transition_per_change(self):
+        asset = Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+        asset.set_status('en_uso', CAUSE_LOAN_CREATE)
+        # Guardar sin cambiar de estado no añade nada al diario.
+        asset.set_status('en_uso', CAUSE_LOAN_CREATE)
+        asset.name = "Portátil renombrado"
+        asset.save()
+        asset_pk = asset.pk
+        asset.delete()
+        self.assertEqual(self.transitions(Asset(pk=asset_pk)), [
+            (None, 'disponible', CAUSE_CREATE),
+            ('disponible', 'en_uso', CAUSE_LOAN_CREATE),
+            ('en_uso', None, CAUSE_DELETE),
+        ])
+
+    def test_consume_advances_cursor(self):
+        asset = Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+        asset.set_status('en_uso', CAUSE_LOAN_CREATE)
+        received = []
+
+        self.assertEqual(consume('pruebas', received.extend, batch_size=1), 2)
+        self.assertEqual([t.new_status for t in received], ['disponible', 'en_uso'])
+        self.assertEqual(AssetJournalCursor.objects.get(consumer='pruebas').position, received[-1].pk)
+
+        # Solo se entregan las transiciones nuevas.
+        asset.set_status('disponible', CAUSE_EDIT)
+        self.assertEqual(consume('pruebas', received.extend), 1)
+        self.assertEqual(received[-1].new_status, 'disponible')
+        self.assertEqual(consume('pruebas', received.extend), 0)
+
+    def test_consume_redelivers_after_handler_error(self):
+        Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+
+        def failing(batch):
+            raise RuntimeError("fallo del consumidor")
+
+        with self.assertRaises(RuntimeError):
+            consume('pruebas', failing)
+        self.assertFalse(AssetJournalCursor.objects.filter(consumer='pruebas', position__gt=0).exists())
+
+        received = []
+        self.assertEqual(consume('pruebas', received.extend), 1)
+        self.assertEqual(received[0].cause, CAUSE_CREATE)
+
+    def test_consume_delivers_transition_committed_below_cursor(self):
+        asset = Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+        asset.set_status('en_uso', CAUSE_LOAN_CREATE)
+        asset.set_status('disponible', CAUSE_EDIT)
+        # La transición intermedia aún no se ha confirmado cuando se lee el diario.
+        late = self.hide_transition(asset, CAUSE_LOAN_CREATE)
+        received = []
+        self.assertEqual(consume('pruebas', received.extend), 2)
+        cursor = AssetJournalCursor.objects.get(consumer='pruebas')
+        self.assertEqual([pk for pk, _ in cursor.gaps], [late.pk])
+
+        late.save(force_insert=True)
+        self.assertEqual(consume('pruebas', received.extend), 1)
+        self.assertEqual((received[-1].pk, received[-1].cause), (late.pk, CAUSE_LOAN_CREATE))
+        self.assertEqual(AssetJournalCursor.objects.get(consumer='pruebas').gaps, [])
+        self.assertEqual(consume('pruebas', received.extend), 0)
+
+    def test_consume_forgets_old_gaps(self):
+        asset = Asset.objects.create(name="Portátil", category=self.category, location="Sala 1")
+        asset.set_status('en_uso', CAUSE_LOAN_CREATE)
+        asset.set_status('disponible', CAUSE_EDIT)
+        lost = self.hide_transition(asset, CAUSE_LOAN_CREATE)
+        consume('pruebas', list)
+
+        with override_settings(ASSET_JOURNAL_GAP_SECONDS=0):
+            lost.save(force_insert=True)
+            self.assertEqual(consume('pruebas', list), 0)
+        self.assertEqual(AssetJournalCursor.objects.get(consumer='pruebas').gaps, [])
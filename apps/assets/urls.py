@@ -1,6 +1,6 @@
 """
 Define las rutas URL para la aplicación de gestión de activos, incluyendo
-listado, creación, edición, eliminación de activos y autocompletado de categorías.
+listado (y su endpoint JSON paginado), creación, edición, eliminación de activos y autocompletado de categorías.
 """
 from django.urls import path
 from . import views
@@ -8,6 +8,8 @@ from . import autocomplete_views # Import the new autocomplete_views
 
 urlpatterns = [
     path("", views.asset_list, name="asset_list"),
+    path("data/", views.asset_list_data, name="asset_list_data"), # JSON para DataTables en modo servidor
+    path("disponibilidad/", views.asset_availability_data, name="asset_availability_data"), # Disponibilidad de varios activos
     path("nuevo/", views.asset_create, name="asset_create"),
     path("<int:pk>/editar/", views.asset_edit, name="asset_edit"),
     path("<int:pk>/eliminar/", views.asset_delete, name="asset_delete"),
@@ -1,8 +1,10 @@
 from .models import Asset
+from apps.events.models import AssetReservation
 
 def activos_disponibles(start, end):
-    return Asset.objects.exclude(
-        events_reserved_for__fecha_inicio__lt=end,
-        events_reserved_for__fecha_fin__gt=start,
-        events_reserved_for__status__in=['approved','active']
-    ).distinct()
+    """
+    Activos sin reservas vigentes que se solapen con el rango [start, end).
+    El solapamiento se resuelve en la tabla de reservas, sin `distinct()`.
+    """
+    reserved = AssetReservation.objects.overlapping(start, end).values('asset_id')
+    return Asset.objects.exclude(id__in=reserved)
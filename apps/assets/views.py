@@ -1,6 +1,8 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from .models import AssetCategory, Asset
+from .aggregations import status_counts
+from .counters import counted_status_counts
 from .forms import AssetForm
 from django.db.models import Q
 from django.http import JsonResponse
@@ -8,50 +10,64 @@ from django.views.decorators.csrf import csrf_exempt
 from .forms import AssetCategoryForm # We will create this form
 from django.template.loader import render_to_string
 from apps.accounts.decorators import groups_required, group_required
+from django.urls import reverse
+from core.datatables import datatables_response
+from .availability import asset_availability, parse_window_datetime
 
-@login_required
-def asset_list(request):
+def _filter_assets(request, assets):
     """
-    Muestra una lista de todos los activos, con opciones de filtrado.
-    Permite filtrar los activos por nombre, categoría, ubicación y estado.
-    También calcula y muestra métricas generales sobre los activos filtrados.
+    Aplica los filtros de nombre, categoría, ubicación y estado de la petición GET.
+    Devuelve el mismo queryset si no hay ningún filtro activo.
     """
-    categories = AssetCategory.objects.all()
-    all_assets = Asset.objects.select_related("category").all()
-
-    # Obtener parámetros de filtrado de la solicitud GET.
     name_query = request.GET.get('name', '')
     selected_category_id = request.GET.get('category', '')
     location_query = request.GET.get('location', '')
     status_query = request.GET.get('status', '')
 
-    # Aplicar filtros al queryset de activos.
     if name_query:
-        all_assets = all_assets.filter(name__icontains=name_query)
+        assets = assets.filter(name__icontains=name_query)
     if selected_category_id:
-        all_assets = all_assets.filter(category__id=selected_category_id)
+        assets = assets.filter(category__id=selected_category_id)
     if location_query:
-        all_assets = all_assets.filter(location__icontains=location_query)
+        assets = assets.filter(location__icontains=location_query)
     if status_query:
-        all_assets = all_assets.filter(status=status_query)
+        assets = assets.filter(status=status_query)
+    return assets
+
+@login_required
+def asset_list(request):
+    """
+    Muestra la página de activos con opciones de filtrado y métricas generales.
+    Permite filtrar los activos por nombre, categoría, ubicación y estado.
+    Las filas de la tabla se cargan paginadas desde `asset_list_data`.
+    """
+    categories = AssetCategory.objects.all()
 
     # El queryset filtrado final.
-    activos = all_assets
+    activos = _filter_assets(request, Asset.objects.all())
 
-    # Calcular métricas para las tarjetas basadas en el queryset filtrado.
-    total_assets = activos.count()
-    available_assets = activos.filter(status="disponible").count()
-    in_use_assets = activos.filter(status="en_uso").count()
-    maintenance_assets = activos.filter(status="mantenimiento").count()
+    # Calcular métricas para las tarjetas basadas en el queryset filtrado. Sin
+    # filtro por nombre, se leen de los contadores por categoría, ubicación y estado.
+    if request.GET.get('name', ''):
+        asset_counts = status_counts(activos)
+    else:
+        asset_counts = counted_status_counts(
+            category=request.GET.get('category', ''),
+            location=request.GET.get('location', ''),
+            status=request.GET.get('status', ''),
+        )
+    total_assets = asset_counts['total']
+    available_assets = asset_counts['disponible']
+    in_use_assets = asset_counts['en_uso']
+    maintenance_assets = asset_counts['mantenimiento']
 
     context = {
-        "activos": activos,
         "categories": categories,
         "asset_statuses": Asset._meta.get_field('status').choices,
-        "name_query": name_query,
-        "selected_category_id": selected_category_id,
-        "location_query": location_query,
-        "status_query": status_query,
+        "name_query": request.GET.get('name', ''),
+        "selected_category_id": request.GET.get('category', ''),
+        "location_query": request.GET.get('location', ''),
+        "status_query": request.GET.get('status', ''),
         "total_assets": total_assets,
         "available_assets": available_assets,
         "in_use_assets": in_use_assets,
@@ -59,6 +75,109 @@ def asset_list(request):
     }
     return render(request, "assets/asset_list.html", context)
 
+# Campo ORM de cada columna de la tabla de activos (None = no ordenable).
+ASSET_TABLE_COLUMNS = ['id', 'name', 'category__name', 'location', 'status', None]
+
+@login_required
+def asset_list_data(request):
+    """
+    Endpoint JSON para la tabla de activos en modo servidor de DataTables.
+    Aplica en SQL los mismos filtros que `asset_list`, además del orden por
+    columna y la paginación (por desplazamiento o por cursor).
+    """
+    base_assets = Asset.objects.select_related("category").only(
+        'id', 'name', 'location', 'status', 'category__name'
+    )
+    assets = _filter_assets(request, base_assets)
+
+    search_value = request.GET.get('search[value]', '').strip()
+    if search_value:
+        assets = assets.filter(
+            Q(name__icontains=search_value) |
+            Q(location__icontains=search_value) |
+            Q(category__name__icontains=search_value)
+        )
+
+    status_labels = dict(Asset.STATUS_CHOICES)
+
+    def serialize(asset):
+        return {
+            'id': asset.id,
+            'name': asset.name,
+            'category': asset.category.name,
+            'location': asset.location,
+            'status': asset.status,
+            'status_display': status_labels.get(asset.status, asset.status),
+            'edit_url': reverse('asset_edit', args=[asset.id]),
+            'delete_url': reverse('asset_delete', args=[asset.id]),
+        }
+
+    return datatables_response(request, base_assets, assets, ASSET_TABLE_COLUMNS, serialize, default_order=('id', 'asc'))
+
+@login_required
+def asset_availability_data(request):
+    """
+    Endpoint JSON de disponibilidad de varios activos en una ventana de tiempo.
+
+    Parámetros (GET o POST): `start` y `end` en formato ISO 8601, y `ids` (ids de
+    activos separados por comas) y/o `category` (id de categoría, incluye sus
+    subcategorías). Con `exclude_event` se ignoran las reservas de ese evento.
+    Devuelve, para cada activo, si está disponible, sus reservas en conflicto y
+    sus huecos libres dentro de la ventana.
+    """
+    params = request.POST if request.method == "POST" else request.GET
+    start = parse_window_datetime(params.get('start'))
+    end = parse_window_datetime(params.get('end'))
+    if start is None or end is None:
+        return JsonResponse({'status': 'error', 'message': 'Debes indicar fechas de inicio y fin válidas.'}, status=400)
+    if start >= end:
+        return JsonResponse({'status': 'error', 'message': 'La fecha de inicio debe ser anterior a la fecha de fin.'}, status=400)
+
+    try:
+        asset_ids = [int(pk) for pk in params.get('ids', '').split(',') if pk.strip()] or None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'La lista de activos no es válida.'}, status=400)
+    try:
+        category_id = int(params['category']) if params.get('category') else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'La categoría no es válida.'}, status=400)
+    try:
+        exclude_event = int(params['exclude_event']) if params.get('exclude_event') else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'El evento a excluir no es válido.'}, status=400)
+
+    category = None
+    if category_id is not None:
+        category = AssetCategory.objects.filter(pk=category_id).first()
+        if category is None:
+            return JsonResponse({'status': 'error', 'message': 'La categoría seleccionada no existe.'}, status=404)
+
+    if asset_ids is None and category is None:
+        return JsonResponse({'status': 'error', 'message': 'Debes indicar activos o una categoría.'}, status=400)
+
+    availability = asset_availability(start, end, asset_ids=asset_ids, category=category, exclude_event=exclude_event)
+
+    results = [
+        {
+            'id': entry['id'],
+            'name': entry['name'],
+            'status': entry['status'],
+            'available': entry['available'],
+            'conflicts': [
+                {'event_id': c['event_id'], 'start': c['start'].isoformat(), 'end': c['end'].isoformat()}
+                for c in entry['conflicts']
+            ],
+            'free_slots': [[slot_start.isoformat(), slot_end.isoformat()] for slot_start, slot_end in entry['free_slots']],
+        }
+        for entry in availability.values()
+    ]
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'all_available': all(r['available'] for r in results),
+        'results': results,
+    })
+
 @groups_required(['Admin', 'Staff'])
 def asset_create(request):
     """
@@ -0,0 +1,315 @@
+# chatbot/asset_index.py
+"""
+Índice en memoria de nombres de activos para el chatbot.
+
+Permite resolver el activo que escribe el usuario aunque tenga erratas, acentos
+distintos o haya varios activos con el mismo nombre. Cada nombre se normaliza
+(minúsculas, sin acentos ni signos) y se indexa por:
+
+- nombre normalizado completo, para coincidencias exactas;
+- palabras, en una lista ordenada para buscar por prefijo;
+- trigramas de cada palabra, para coincidencias aproximadas.
+
+Las búsquedas puntúan los candidatos con la similitud de trigramas y devuelven los
+mejores dentro de un presupuesto de tiempo (`CHATBOT_ASSET_SEARCH_BUDGET_MS`).
+
+El índice se construye en la primera búsqueda y se actualiza al guardar o borrar
+un `Asset` (ver `apps.chatbot.signals`). Los demás procesos se enteran por una
+versión compartida en la caché de Django y se ponen al día leyendo solo los
+activos modificados desde su última sincronización. Los borrados se anotan uno a
+uno en la caché (un contador y una clave por borrado), así que no hace falta releer
+todos los ids para saber qué activos han desaparecido.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from bisect import bisect_left, insort
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.assets.models import Asset
+
+VERSION_CACHE_KEY = 'chatbot:asset_index:version'
+DELETED_CACHE_KEY = 'chatbot:asset_index:deleted'
+# Borrados que se leen de la caché en una sincronización; si un proceso se ha
+# perdido más (o alguno ya caducó) relee todos los ids.
+MAX_TRACKED_DELETES = 1000
+DELETED_TIMEOUT = 24 * 60 * 60
+
+_TOKEN_RE = re.compile(r'\w+')
+_CODE_RE = re.compile(r'\(([^()]+)\)\s*$')
+# Candidatos que se puntúan como máximo por búsqueda.
+MAX_CANDIDATES = 500
+
+
+def normalize_name(text):
+    """Minúsculas, sin acentos y con las palabras separadas por un espacio."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(_TOKEN_RE.findall(text.lower()))
+
+
+def _trigrams(normalized):
+    grams = set()
+    for token in normalized.split():
+        padded = f'  {token} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class AssetNameIndex:
+    """Índice de nombres de activos con búsqueda exacta, por prefijo y aproximada."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._reset()
+
+    def _reset(self):
+        self._entries = {}
+        self._by_name = {}
+        self._by_code = {}
+        self._by_token = {}
+        self._tokens = []
+        self._by_trigram = {}
+        self._missing_codes = set()
+        self._version = None
+        self._deleted_seen = 0
+        self._synced_at = None
+        self._checked_at = None
+
+    # --- Mantenimiento del índice ---
+
+    def _add(self, asset_id, name, code):
+        normalized = normalize_name(name)
+        grams = _trigrams(normalized)
+        tokens = frozenset(normalized.split())
+        self._entries[asset_id] = (name, code, normalized, grams, tokens)
+        self._by_name.setdefault(normalized, set()).add(asset_id)
+        if code:
+            self._by_code[code.lower()] = asset_id
+        else:
+            self._missing_codes.add(asset_id)
+        for token in tokens:
+            if token not in self._by_token:
+                self._by_token[token] = set()
+                insort(self._tokens, token)
+            self._by_token[token].add(asset_id)
+        for gram in grams:
+            self._by_trigram.setdefault(gram, set()).add(asset_id)
+
+    def _discard(self, asset_id):
+        entry = self._entries.pop(asset_id, None)
+        if entry is None:
+            return
+        _, code, normalized, grams, tokens = entry
+        self._missing_codes.discard(asset_id)
+        self._by_name[normalized].discard(asset_id)
+        if not self._by_name[normalized]:
+            del self._by_name[normalized]
+        if code and self._by_code.get(code.lower()) == asset_id:
+            del self._by_code[code.lower()]
+        for token in tokens:
+            self._by_token[token].discard(asset_id)
+            if not self._by_token[token]:
+                del self._by_token[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+        for gram in grams:
+            self._by_trigram[gram].discard(asset_id)
+            if not self._by_trigram[gram]:
+                del self._by_trigram[gram]
+
+    def _upsert(self, asset_id, name, code):
+        entry = self._entries.get(asset_id)
+        if entry is not None and entry[0] == name and entry[1] == code:
+            return
+        self._discard(asset_id)
+        self._add(asset_id, name, code)
+
+    def build(self):
+        """(Re)construye el índice con todos los activos."""
+        with self._lock:
+            self._reset()
+            self._synced_at = timezone.now()
+            self._deleted_seen = cache.get(DELETED_CACHE_KEY, 0)
+            for asset_id, name, code in Asset.objects.values_list('id', 'name', 'code').iterator(chunk_size=2000):
+                self._add(asset_id, name, code)
+            self._version = cache.get(VERSION_CACHE_KEY)
+            self._checked_at = time.monotonic()
+            self._built = True
+
+    def _sync(self):
+        """Aplica los cambios hechos por otros procesos desde la última sincronización."""
+        now = time.monotonic()
+        if now - self._checked_at < getattr(settings, 'CHATBOT_ASSET_INDEX_CHECK_SECONDS', 5):
+            return
+        self._checked_at = now
+        version = cache.get(VERSION_CACHE_KEY)
+        if version == self._version:
+            return
+        # Margen para relojes y transacciones que terminaron tras la última lectura.
+        since = self._synced_at - timedelta(seconds=30)
+        self._synced_at = timezone.now()
+        for asset_id, name, code in Asset.objects.filter(updated_at__gte=since).values_list('id', 'name', 'code'):
+            self._upsert(asset_id, name, code)
+        for asset_id in self._deleted_since_sync():
+            self._discard(asset_id)
+        self._version = version
+
+    def _deleted_since_sync(self):
+        """Ids borrados por otros procesos desde la última sincronización."""
+        deleted = cache.get(DELETED_CACHE_KEY, 0)
+        missed = deleted - self._deleted_seen
+        self._deleted_seen = deleted
+        if missed == 0:
+            return []
+        if 0 < missed <= MAX_TRACKED_DELETES:
+            keys = [f'{DELETED_CACHE_KEY}:{n}' for n in range(deleted - missed + 1, deleted + 1)]
+            found = cache.get_many(keys)
+            if len(found) == len(keys):
+                return found.values()
+        # Demasiados borrados, claves caducadas o caché vaciada: se comparan los ids.
+        existing = set(Asset.objects.values_list('id', flat=True).iterator(chunk_size=5000))
+        return set(self._entries) - existing
+
+    def _fill_missing_codes(self):
+        # `Asset.save` asigna el código después del post_save de un activo nuevo.
+        codes = Asset.objects.filter(pk__in=self._missing_codes).values_list('id', 'code')
+        for asset_id, code in codes:
+            if code and asset_id in self._entries:
+                self._entries[asset_id] = (self._entries[asset_id][0], code) + self._entries[asset_id][2:]
+                self._by_code[code.lower()] = asset_id
+        self._missing_codes.clear()
+
+    def asset_saved(self, asset, created=False):
+        """Refleja en el índice un activo creado o modificado en este proceso."""
+        with self._lock:
+            if self._built:
+                entry = self._entries.get(asset.pk)
+                unchanged = not created and entry is not None and entry[:2] == (asset.name, asset.code)
+                # Con el índice al día, un guardado que no cambia nombre ni código
+                # no obliga a los demás procesos a sincronizar.
+                if unchanged and self._version == cache.get(VERSION_CACHE_KEY):
+                    return
+                self._upsert(asset.pk, asset.name, asset.code)
+        transaction.on_commit(self._bump_version)
+
+    def asset_deleted(self, asset_id):
+        """Quita del índice un activo borrado en este proceso."""
+        with self._lock:
+            if self._built:
+                self._discard(asset_id)
+        transaction.on_commit(lambda: self._record_delete(asset_id))
+
+    def _record_delete(self, asset_id):
+        cache.add(DELETED_CACHE_KEY, 0, None)
+        deleted = cache.incr(DELETED_CACHE_KEY)
+        cache.set(f'{DELETED_CACHE_KEY}:{deleted}', asset_id, DELETED_TIMEOUT)
+        with self._lock:
+            # El borrado propio ya está aplicado; si no faltaba ninguno ajeno, se
+            # marca como leído.
+            if self._built and self._deleted_seen == deleted - 1:
+                self._deleted_seen = deleted
+        self._bump_version()
+
+    def _bump_version(self):
+        previous = cache.get(VERSION_CACHE_KEY)
+        version = uuid.uuid4().hex
+        cache.set(VERSION_CACHE_KEY, version, None)
+        with self._lock:
+            # Si otro proceso había cambiado algo que aún no se ha leído, se deja
+            # la versión antigua para que la próxima búsqueda sincronice.
+            if self._built and previous == self._version:
+                self._version = version
+
+    # --- Búsqueda ---
+
+    def search(self, query, limit=5, budget=None):
+        """
+        Activos cuyo nombre o código se parece a `query`, de mejor a peor.
+
+        Un código exacto (o un texto terminado en "(CÓDIGO)", como el que muestran
+        las sugerencias) y un nombre normalizado idéntico puntúan por encima de
+        cualquier coincidencia aproximada.
+
+        Args:
+            query (str): Texto escrito por el usuario.
+            limit (int): Máximo de resultados.
+            budget (float, optional): Segundos disponibles para puntuar candidatos;
+                por defecto `CHATBOT_ASSET_SEARCH_BUDGET_MS`.
+
+        Returns:
+            list: Diccionarios con id, name, code y score (entre 0 y 3).
+        """
+        if budget is None:
+            budget = getattr(settings, 'CHATBOT_ASSET_SEARCH_BUDGET_MS', 1) / 1000
+        with self._lock:
+            if not self._built:
+                self.build()
+            else:
+                self._sync()
+            if self._missing_codes:
+                self._fill_missing_codes()
+            deadline = time.perf_counter() + budget
+            scores = {}
+
+            code_match = _CODE_RE.search(query)
+            for code in filter(None, (query.strip(), code_match and code_match.group(1).strip())):
+                asset_id = self._by_code.get(code.lower())
+                if asset_id is not None:
+                    scores[asset_id] = 3.0
+
+            normalized = normalize_name(_CODE_RE.sub('', query) if code_match else query)
+            if normalized:
+                for asset_id in self._by_name.get(normalized, ()):
+                    scores.setdefault(asset_id, 2.0)
+
+                # Prefijo: la última palabra puede estar a medio escribir.
+                prefix = normalized.split()[-1]
+                prefix_tokens = set()
+                position = bisect_left(self._tokens, prefix)
+                while position < len(self._tokens) and self._tokens[position].startswith(prefix):
+                    prefix_tokens.add(self._tokens[position])
+                    position += 1
+
+                # Candidatos: los activos con esas palabras y los que comparten los
+                # trigramas menos frecuentes de la consulta (los más discriminantes),
+                # mientras quepan en MAX_CANDIDATES.
+                query_grams = _trigrams(normalized)
+                postings = [self._by_token[token] for token in prefix_tokens]
+                postings += filter(None, map(self._by_trigram.get, query_grams))
+                postings.sort(key=len)
+                candidates = set(islice(postings[0], MAX_CANDIDATES)) if postings else set()
+                for posting in postings[1:]:
+                    if len(candidates) + len(posting) > MAX_CANDIDATES:
+                        break
+                    candidates |= posting
+
+                # Similitud de Jaccard entre trigramas, más un extra si coincide el prefijo.
+                for checked, asset_id in enumerate(candidates):
+                    if checked % 32 == 31 and time.perf_counter() > deadline:
+                        break
+                    _, _, _, grams, tokens = self._entries[asset_id]
+                    shared = len(query_grams & grams)
+                    score = shared / (len(query_grams) + len(grams) - shared)
+                    if not prefix_tokens.isdisjoint(tokens):
+                        score += 0.2
+                    if score > scores.get(asset_id, 0.0):
+                        scores[asset_id] = score
+
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                {'id': asset_id, 'name': self._entries[asset_id][0], 'code': self._entries[asset_id][1], 'score': round(score, 3)}
+                for asset_id, score in ranked
+            ]
+
+
+asset_index = AssetNameIndex()
@@ -0,0 +1,125 @@
+# chatbot/batching.py
+"""
+Clasificación de intenciones por micro-lotes.
+
+Cada mensaje del chatbot se pasaba por el modelo de intenciones por separado. Con
+workers de varios hilos (p. ej. gunicorn `--worker-class gthread`), las peticiones
+que llegan casi a la vez se pueden clasificar juntas: `IntentBatcher` encola los
+mensajes, un hilo de fondo reúne los que llegan en una ventana de
+`CHATBOT_INTENT_BATCH_WAIT_MS` milisegundos (hasta `CHATBOT_INTENT_BATCH_SIZE`) y
+los pasa por `nlp.pipe` de una vez. Solo se espera si hay otras peticiones en
+curso, de modo que un mensaje aislado no paga la ventana. Cada petición espera
+solo su resultado.
+
+Con una ventana de 0 ms no hay lotes: cada mensaje se clasifica en el hilo de la
+petición, como antes. `python manage.py benchmark_chatbot_batching` mide el
+rendimiento de ambos modos con varios niveles de concurrencia.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .nlp import registry
+
+
+class IntentBatcher:
+    """
+    Agrupa en lotes las clasificaciones de mensajes concurrentes.
+
+    Args:
+        get_model (callable): Devuelve el pipeline de spaCy que clasifica.
+        batch_size (int): Máximo de mensajes por lote.
+        max_wait (float): Segundos que se espera a que se llene un lote.
+    """
+
+    def __init__(self, get_model, batch_size, max_wait):
+        self._get_model = get_model
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.batches = 0
+        self.messages = 0
+
+    def _ensure_worker(self):
+        # El hilo no sobrevive a un fork (p. ej. con preload_app), así que se
+        # arranca en el primer uso de cada proceso.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name='chatbot-intent-batcher', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def classify(self, text, timeout=10):
+        """
+        Puntuaciones por intención (`doc.cats`) de un mensaje.
+
+        Raises:
+            Exception: La que lance el modelo al procesar el lote.
+        """
+        if self.max_wait <= 0:
+            return dict(self._get_model()(text).cats)
+        self._ensure_worker()
+        future = Future()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._queue.put((text, future))
+            return future.result(timeout)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _collect(self, pending):
+        batch = [pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        # No tiene sentido esperar más mensajes que peticiones hay en curso.
+        while len(batch) < min(self.batch_size, self._in_flight):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, pending):
+        while True:
+            batch = self._collect(pending)
+            try:
+                docs = list(self._get_model().pipe([text for text, _ in batch], batch_size=self.batch_size))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.messages += len(batch)
+            for (_, future), doc in zip(batch, docs):
+                future.set_result(dict(doc.cats))
+
+    def stats(self):
+        """Lotes procesados y tamaño medio de lote."""
+        return {
+            'batches': self.batches,
+            'messages': self.messages,
+            'mean_batch_size': round(self.messages / self.batches, 2) if self.batches else 0,
+        }
+
+
+intent_batcher = IntentBatcher(
+    lambda: registry.get('intent'),
+    batch_size=settings.CHATBOT_INTENT_BATCH_SIZE,
+    max_wait=settings.CHATBOT_INTENT_BATCH_WAIT_MS / 1000,
+)
@@ -0,0 +1,140 @@
+# chatbot/cache.py
+"""
+Caché de análisis de mensajes del chatbot.
+
+Los usuarios repiten mucho los mismos mensajes cortos ("hola", los botones de
+sugerencias, "Sí, confirmo"...). `analyze_message` guarda, por texto normalizado,
+las puntuaciones de intención (`doc.cats`) y las entidades extraídas, en una caché
+LRU en memoria de cada proceso con un máximo de `CHATBOT_INTENT_CACHE_SIZE`
+entradas que caducan a los `CHATBOT_INTENT_CACHE_TTL` segundos.
+
+Como los resultados dependen del modelo entrenado, cada
+`CHATBOT_MODEL_CHECK_SECONDS` se comprueba si ha cambiado algún fichero del
+directorio del modelo; si es así, se vacía la caché y el modelo se vuelve a
+cargar en la siguiente petición.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .batching import intent_batcher
+from .entities import extract_entities
+from .nlp import registry
+
+
+def normalize_message(message):
+    """Texto en minúsculas y con los espacios colapsados."""
+    return ' '.join(message.lower().split())
+
+
+def _model_fingerprint(path):
+    """Número de ficheros y última modificación del directorio de un modelo."""
+    if not os.path.isdir(path):
+        return None
+    files = 0
+    latest = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+    return files, latest
+
+
+class MessageCache:
+    """
+    Caché LRU con caducidad, invalidada cuando cambia el modelo de intenciones.
+
+    Args:
+        maxsize (int): Máximo de entradas.
+        ttl (float): Segundos de vida de cada entrada.
+        registry (ModelRegistry): Registro del que se descarga el modelo si cambia.
+        model (str): Nombre del modelo en el registro.
+        check_interval (float): Segundos entre comprobaciones del directorio del modelo.
+    """
+
+    def __init__(self, maxsize, ttl, registry, model, check_interval):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._registry = registry
+        self._model = model
+        self._check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked_at = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_model(self, now):
+        if self._checked_at is not None and now - self._checked_at < self._check_interval:
+            return
+        self._checked_at = now
+        fingerprint = _model_fingerprint(self._registry.path(self._model))
+        if self._fingerprint is not None and fingerprint != self._fingerprint:
+            self._entries.clear()
+            self.invalidations += 1
+            self._registry.unload(self._model)
+        self._fingerprint = fingerprint
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._check_model(now)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Aciertos, fallos, tamaño e invalidaciones de la caché."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'invalidations': self.invalidations,
+        }
+
+
+message_cache = MessageCache(
+    maxsize=settings.CHATBOT_INTENT_CACHE_SIZE,
+    ttl=settings.CHATBOT_INTENT_CACHE_TTL,
+    registry=registry,
+    model='intent',
+    check_interval=settings.CHATBOT_MODEL_CHECK_SECONDS,
+)
+
+
+def analyze_message(message):
+    """
+    Intención y entidades de un mensaje, usando la caché.
+
+    Returns:
+        tuple: (cats, entities) con las puntuaciones por intención y las entidades.
+    """
+    key = normalize_message(message)
+    result = message_cache.get(key)
+    if result is None:
+        result = (intent_batcher.classify(key), extract_entities(key))
+        message_cache.set(key, result)
+    return result
@@ -0,0 +1,51 @@
+# chatbot/entities.py
+"""
+Extracción de entidades de los mensajes del chatbot.
+
+La única entidad que usa el chatbot es el estado de un activo ('mantenimiento',
+'uso' o 'disponible'). Antes se obtenía pasando cada mensaje por el pipeline
+completo de `es_core_news_md` (tagger, parser, NER y lematizador) y buscando esos
+lemas; aquí se precalculan las formas que el lematizador reduce a cada lema y se
+buscan en los tokens del mensaje, sin cargar ningún modelo.
+
+`python manage.py benchmark_chatbot_entities` compara ambos caminos.
+"""
+import re
+
+# Lemas de estado reconocidos y las formas del texto que se reducen a cada uno.
+STATUS_LEMMAS = {
+    'mantenimiento': ('mantenimiento', 'mantenimientos'),
+    'uso': ('uso', 'usos'),
+    'disponible': ('disponible', 'disponibles'),
+}
+
+_STATUS_FORMS = {form: lemma for lemma, forms in STATUS_LEMMAS.items() for form in forms}
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def extract_entities(message):
+    """
+    Extrae las entidades de un mensaje del usuario.
+
+    Args:
+        message (str): Texto del mensaje.
+
+    Returns:
+        dict: {'status': forma encontrada} con el primer estado mencionado, o un
+              diccionario vacío si no menciona ninguno.
+    """
+    for match in _TOKEN_RE.finditer(message.lower()):
+        if match.group() in _STATUS_FORMS:
+            return {'status': match.group()}
+    return {}
+
+
+def extract_entities_spacy(nlp, message):
+    """
+    Extracción con un pipeline de spaCy, tal como la hacía la vista del chatbot.
+    Se conserva como referencia para el benchmark.
+    """
+    for token in nlp(message.lower()):
+        if token.lemma_ in STATUS_LEMMAS:
+            return {'status': token.text}
+    return {}
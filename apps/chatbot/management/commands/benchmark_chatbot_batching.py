@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.chatbot.batching import IntentBatcher
+from apps.chatbot.nlp import registry
+from apps.chatbot.training_data import TRAIN_DATA
+
+
+class Command(BaseCommand):
+    help = '''Load-tests intent classification: one message per model call against micro-batched nlp.pipe, at several concurrency levels.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated numbers of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=2000, help='Messages classified per run.')
+        parser.add_argument('--batch-size', type=int, default=settings.CHATBOT_INTENT_BATCH_SIZE)
+        parser.add_argument('--wait-ms', type=float, default=settings.CHATBOT_INTENT_BATCH_WAIT_MS)
+
+    def _run(self, classify, concurrency, messages):
+        latencies = []
+
+        def client(message):
+            started = time.perf_counter()
+            classify(message)
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, messages))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return len(messages) / elapsed, latencies[int(len(latencies) * 0.95)] * 1000
+
+    def handle(self, *args, **options):
+        if registry.get('intent') is None:
+            raise CommandError(f'Intent model not available at {settings.CHATBOT_INTENT_MODEL}.')
+        texts = [text.lower() for text, _ in TRAIN_DATA]
+        messages = [texts[i % len(texts)] for i in range(options['requests'])]
+        levels = [int(level) for level in options['concurrency'].split(',')]
+
+        single = IntentBatcher(lambda: registry.get('intent'), batch_size=1, max_wait=0)
+        self.stdout.write(f"{len(messages)} messages, batch_size={options['batch_size']}, wait={options['wait_ms']} ms")
+        self.stdout.write(f"  {'clients':>7}  {'single msg/s':>12}  {'p95 ms':>7}  {'batched msg/s':>13}  {'p95 ms':>7}  {'mean batch':>10}")
+        for concurrency in levels:
+            batched = IntentBatcher(lambda: registry.get('intent'), batch_size=options['batch_size'], max_wait=options['wait_ms'] / 1000)
+            single_rate, single_p95 = self._run(single.classify, concurrency, messages)
+            batched_rate, batched_p95 = self._run(batched.classify, concurrency, messages)
+            self.stdout.write(
+                f"  {concurrency:>7}  {single_rate:>12,.0f}  {single_p95:>7.2f}  {batched_rate:>13,.0f}  {batched_p95:>7.2f}  {batched.stats()['mean_batch_size']:>10}"
+            )
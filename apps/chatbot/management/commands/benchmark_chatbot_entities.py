@@ -0,0 +1,69 @@
+import statistics
+import time
+
+import spacy
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.chatbot.entities import extract_entities, extract_entities_spacy
+from apps.chatbot.training_data import TRAIN_DATA
+
+EXTRA_MESSAGES = [
+    "cuantos activos hay en mantenimiento",
+    "¿Y en uso?",
+    "cuántos equipos están disponibles",
+    "activos en uso ahora mismo",
+    "hay proyectores disponibles en la sala 3?",
+    "dime los mantenimientos pendientes",
+]
+
+
+class Command(BaseCommand):
+    help = '''Benchmarks chatbot entity extraction: the lookup table against the spaCy pipeline it replaces.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Times each message is processed.')
+        parser.add_argument('--model', default=settings.CHATBOT_NER_MODEL, help='spaCy pipeline used as reference.')
+
+    def _measure(self, extract, messages, repeat):
+        timings = []
+        for _ in range(repeat):
+            for message in messages:
+                started = time.perf_counter()
+                extract(message)
+                timings.append(time.perf_counter() - started)
+        return timings
+
+    def _report(self, label, timings, baseline=None):
+        mean = statistics.mean(timings) * 1e6
+        p95 = statistics.quantiles(timings, n=20)[-1] * 1e6
+        line = f'  {label:<28} mean {mean:9.1f} µs   p95 {p95:9.1f} µs'
+        if baseline:
+            line += f'   x{baseline / mean:,.0f} faster'
+        self.stdout.write(line)
+        return mean
+
+    def handle(self, *args, **options):
+        messages = [text for text, _ in TRAIN_DATA] + EXTRA_MESSAGES
+        repeat = options['repeat']
+        self.stdout.write(f'{len(messages)} messages x {repeat} repetitions')
+
+        pipelines = {}
+        for label, kwargs in (('spaCy (full pipeline)', {}), ('spaCy (parser/ner excluded)', {'exclude': ['parser', 'ner']})):
+            try:
+                pipelines[label] = spacy.load(options['model'], **kwargs)
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f"  {label}: model '{options['model']}' not available ({e})"))
+
+        baseline = None
+        for label, nlp in pipelines.items():
+            mean = self._report(label, self._measure(lambda m, nlp=nlp: extract_entities_spacy(nlp, m), messages, repeat))
+            baseline = baseline or mean
+        self._report('lookup table', self._measure(extract_entities, messages, repeat), baseline)
+
+        for label, nlp in pipelines.items():
+            mismatches = [m for m in messages if extract_entities(m) != extract_entities_spacy(nlp, m)]
+            style = self.style.SUCCESS if not mismatches else self.style.WARNING
+            self.stdout.write(style(f'  {label}: {len(messages) - len(mismatches)}/{len(messages)} messages with the same entities'))
+            for message in mismatches:
+                self.stdout.write(f'    - {message!r}: lookup={extract_entities(message)} spacy={extract_entities_spacy(nlp, message)}')
@@ -0,0 +1,63 @@
+import pathlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.chatbot.training import evaluate, inference_latency, train_intent_model
+from apps.chatbot.training_data import TRAIN_DATA
+
+
+class Command(BaseCommand):
+    help = '''Trains the chatbot intent model with minibatches, a held-out dev split and early stopping, and reports quality and speed.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.CHATBOT_INTENT_MODEL), help='Directory where the model is saved.')
+        parser.add_argument('--max-epochs', type=int, default=50)
+        parser.add_argument('--patience', type=int, default=5, help='Epochs without dev improvement before stopping.')
+        parser.add_argument('--dev-ratio', type=float, default=0.2, help='Share of each intent held out for evaluation (0 trains on everything).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--dropout', type=float, default=0.2)
+        parser.add_argument('--no-refit', action='store_true', help='Keep the model trained without the dev split instead of retraining on all examples.')
+        parser.add_argument('--dry-run', action='store_true', help='Train and report without saving the model.')
+
+    def handle(self, *args, **options):
+        nlp, report = train_intent_model(
+            list(TRAIN_DATA),
+            max_epochs=options['max_epochs'],
+            patience=options['patience'],
+            dev_ratio=options['dev_ratio'],
+            seed=options['seed'],
+            dropout=options['dropout'],
+            refit=not options['no_refit'],
+            log=self.stdout.write,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nTrained on {report['train_examples']} examples ({report['dev_examples']} held out) "
+            f"in {report['train_seconds']:.2f}s, {report['epochs']} epochs, best epoch {report['best_epoch']}"
+            f"{', then refit on all examples' if report['refit'] else ''}."
+        ))
+        # Las métricas de 'dev' son las del modelo entrenado sin esos ejemplos.
+        for label, data_report in (('dev', report['dev']), ('train+dev', evaluate(nlp, TRAIN_DATA))):
+            if data_report is None:
+                continue
+            self.stdout.write(f"\n{label}: accuracy {data_report['accuracy']:.3f}, macro F1 {data_report['macro_f1']:.3f}")
+            self.stdout.write(f"  {'intent':<28} {'precision':>9} {'recall':>7} {'f1':>6} {'n':>4}")
+            for intent, scores in data_report['per_intent'].items():
+                self.stdout.write(
+                    f"  {intent:<28} {scores['precision']:>9.3f} {scores['recall']:>7.3f} {scores['f1']:>6.3f} {scores['support']:>4}"
+                )
+
+        latency = inference_latency(nlp, [text for text, _ in TRAIN_DATA])
+        self.stdout.write(
+            f"\nInference latency: {latency['single'] * 1e6:.0f} µs/message one by one, "
+            f"{latency['pipe'] * 1e6:.0f} µs/message with nlp.pipe"
+        )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: model not saved.'))
+            return
+        output = pathlib.Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        nlp.to_disk(output)
+        self.stdout.write(self.style.SUCCESS(f'Model saved to {output}'))
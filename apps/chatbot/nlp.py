@@ -0,0 +1,113 @@
+"""
+Registro de modelos de spaCy del chatbot.
+
+Los modelos se cargan la primera vez que se piden, no al importar el módulo, para
+que los procesos que nunca atienden al chatbot (comandos de gestión, workers de
+reportes, etc.) no paguen su memoria ni su tiempo de arranque. La carga está
+protegida con un lock, así que varios hilos que piden el mismo modelo a la vez
+solo lo cargan una vez.
+
+Con la variable de entorno `CHATBOT_PRELOAD_MODELS=1`, `gunicorn.conf.py` precarga
+los modelos en el proceso maestro y los workers los heredan al hacer fork
+(copy-on-write).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _max_rss_bytes():
+    """Pico de memoria residente del proceso, o None si no se puede medir."""
+    if resource is None:
+        return None
+    # En Linux ru_maxrss está en KiB.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """
+    Carga perezosa y compartida de modelos de spaCy por nombre lógico.
+
+    Args:
+        models (dict): Nombre lógico -> nombre de paquete o ruta del modelo.
+    """
+
+    def __init__(self, models):
+        self._paths = dict(models)
+        self._models = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Devuelve el modelo `name`, cargándolo si es la primera vez.
+
+        Returns:
+            Language | None: El pipeline de spaCy, o None si no se pudo cargar.
+            Un fallo de carga se recuerda y no se reintenta en cada petición.
+        """
+        if name in self._models:
+            return self._models[name]
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def _load(self, name):
+        import spacy
+
+        path = self._paths[name]
+        rss_before = _max_rss_bytes()
+        started = time.perf_counter()
+        try:
+            nlp = spacy.load(path)
+        except OSError as e:
+            print(f"Error cargando el modelo de spaCy '{name}' ({path}): {e}")
+            self._metrics[name] = {'path': str(path), 'loaded': False, 'error': str(e)}
+            return None
+        rss_after = _max_rss_bytes()
+        self._metrics[name] = {
+            'path': str(path),
+            'loaded': True,
+            'load_seconds': round(time.perf_counter() - started, 3),
+            # Crecimiento del pico de memoria del proceso durante la carga (aproximado).
+            'rss_delta_bytes': rss_after - rss_before if rss_before is not None else None,
+            'pipeline': list(nlp.pipe_names),
+        }
+        return nlp
+
+    def unload(self, name):
+        """Olvida el modelo `name` para que la próxima petición lo vuelva a cargar del disco."""
+        with self._lock:
+            self._models.pop(name, None)
+            self._metrics.pop(name, None)
+
+    def path(self, name):
+        """Nombre de paquete o ruta registrada para el modelo `name`."""
+        return self._paths[name]
+
+    def preload(self, names=None):
+        """Carga ya los modelos indicados (por defecto, todos los registrados)."""
+        for name in names or self._paths:
+            self.get(name)
+
+    def metrics(self):
+        """Estado de cada modelo registrado: si está cargado, tiempo de carga y memoria."""
+        return {
+            name: self._metrics.get(name, {'path': str(path), 'loaded': False})
+            for name, path in self._paths.items()
+        }
+
+
+# 'ner' ya no lo usa la vista del chatbot (ver apps.chatbot.entities); solo se carga
+# si se pide explícitamente, p. ej. en los benchmarks.
+registry = ModelRegistry({
+    'intent': settings.CHATBOT_INTENT_MODEL,
+    'ner': settings.CHATBOT_NER_MODEL,
+})
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.assets.models import Asset
+
+from .asset_index import asset_index
+
+
+def index_saved_asset(sender, instance, created, update_fields=None, **kwargs):
+    """Actualiza el índice de nombres del chatbot al crear o modificar un activo."""
+    # Guardados parciales que no tocan el nombre ni el código (p. ej. `Asset.set_status`).
+    if update_fields is not None and not {'name', 'code'} & set(update_fields):
+        return
+    asset_index.asset_saved(instance, created)
+
+
+def unindex_deleted_asset(sender, instance, **kwargs):
+    """Quita del índice de nombres del chatbot un activo borrado."""
+    asset_index.asset_deleted(instance.pk)
+
+
+post_save.connect(index_saved_asset, sender=Asset, dispatch_uid='chatbot_index_saved_asset')
+post_delete.connect(unindex_deleted_asset, sender=Asset, dispatch_uid='chatbot_unindex_deleted_asset')
@@ -1,3 +1,351 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.assets.models import Asset, AssetCategory
+
+from .asset_index import VERSION_CACHE_KEY, AssetNameIndex, asset_index
+from .batching import IntentBatcher
+from .cache import MessageCache, normalize_message
+from .entities import extract_entities
+from .nlp import ModelRegistry
+from .tools import get_available_assets, resolve_asset
+from .training import evaluate, split_data
+from .training_data import BASE_CATS
+
+
+class ExtractEntitiesTests(SimpleTestCase):
+    """Reconocimiento de estados de activo sin el pipeline de spaCy."""
+
+    def test_recognizes_each_status(self):
+        cases = {
+            "cuantos activos hay en mantenimiento": "mantenimiento",
+            "¿Y en uso?": "uso",
+            "Cuántos equipos están DISPONIBLES": "disponibles",
+            "dime los mantenimientos pendientes": "mantenimientos",
+        }
+        for message, status in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(extract_entities(message), {'status': status})
+
+    def test_returns_first_status(self):
+        self.assertEqual(extract_entities("disponibles o en uso"), {'status': 'disponibles'})
+
+    def test_ignores_partial_words(self):
+        self.assertEqual(extract_entities("hola, ¿qué puedes hacer?"), {})
+        self.assertEqual(extract_entities("usuario disponibilidad"), {})
+
+
+class MessageCacheTests(SimpleTestCase):
+    """Caché LRU de análisis de mensajes."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.model_file = os.path.join(self.tmp.name, 'meta.json')
+        with open(self.model_file, 'w') as f:
+            f.write('{}')
+        registry = ModelRegistry({'intent': self.tmp.name})
+        self.cache = MessageCache(maxsize=2, ttl=60, registry=registry, model='intent', check_interval=0)
+
+    def test_hits_misses_and_lru_eviction(self):
+        self.assertIsNone(self.cache.get('hola'))
+        self.cache.set('hola', 1)
+        self.cache.set('adiós', 2)
+        self.assertEqual(self.cache.get('hola'), 1)
+        self.cache.set('sí, confirmo', 3)
+        self.assertIsNone(self.cache.get('adiós'))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_expired_entries_are_misses(self):
+        self.cache.ttl = 0
+        self.cache.set('hola', 1)
+        self.assertIsNone(self.cache.get('hola'))
+
+    def test_model_change_clears_cache(self):
+        self.cache.get('hola')
+        self.cache.set('hola', 1)
+        os.utime(self.model_file, ns=(0, 0))
+        self.assertIsNone(self.cache.get('hola'))
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_normalize_message(self):
+        self.assertEqual(normalize_message('  Listar   activos\tDISPONIBLES '), 'listar activos disponibles')
+
+
+class AssetNameIndexTests(TestCase):
+    """Resolución de nombres de activos con erratas, duplicados y códigos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = AssetCategory.objects.create(name="Audiovisuales")
+
+    def setUp(self):
+        asset_index.build()
+        self.proyector = Asset.objects.create(name="Proyector Epson", category=self.category, location="Aula 1")
+        self.camara_1 = Asset.objects.create(name="Cámara Canon", category=self.category, location="Aula 2")
+        self.camara_2 = Asset.objects.create(name="Cámara Canon", category=self.category, location="Aula 3")
+        self.camara_1.refresh_from_db()
+
+    def test_exact_name_ignoring_case_and_accents(self):
+        self.assertEqual(resolve_asset("proyector epson")[0], self.proyector.pk)
+
+    def test_typo_returns_ranked_candidates(self):
+        asset_id, candidates = resolve_asset("proyctor epsn")
+        self.assertIsNone(asset_id)
+        self.assertEqual(candidates[0]['id'], self.proyector.pk)
+
+    def test_duplicate_names_are_ambiguous(self):
+        asset_id, candidates = resolve_asset("camara canon")
+        self.assertIsNone(asset_id)
+        self.assertEqual({c['id'] for c in candidates[:2]}, {self.camara_1.pk, self.camara_2.pk})
+
+    def test_suggestion_with_code_resolves(self):
+        self.assertEqual(resolve_asset(str(self.camara_1))[0], self.camara_1.pk)
+
+    def test_index_follows_renames_and_deletes(self):
+        self.proyector.name = "Proyector BenQ"
+        self.proyector.save()
+        self.assertEqual(resolve_asset("proyector benq")[0], self.proyector.pk)
+        self.proyector.delete()
+        self.assertEqual(resolve_asset("proyector benq"), (None, []))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   CHATBOT_ASSET_INDEX_CHECK_SECONDS=0)
+class AssetIndexSyncTests(TestCase):
+    """Propagación de cambios del índice de nombres entre procesos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = AssetCategory.objects.create(name="Audiovisuales")
+        cls.assets = [Asset.objects.create(name=f"Proyector {n}", category=category, location="Aula") for n in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        asset_index.build()
+        # Índice de otro proceso, que solo se entera por la caché.
+        self.other = AssetNameIndex()
+        self.other.build()
+
+    def test_saves_without_name_change_keep_version(self):
+        asset = Asset.objects.get(pk=self.assets[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.set_status('en_uso', 'edit')
+            asset.location = "Aula 2"
+            asset.save()
+        self.assertIsNone(cache.get(VERSION_CACHE_KEY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.name = "Proyector renombrado"
+            asset.save()
+        self.assertIsNotNone(cache.get(VERSION_CACHE_KEY))
+        self.assertEqual(self.other.search("proyector renombrado", limit=1)[0]['id'], asset.pk)
+
+    def test_deletes_reach_other_process_without_id_scan(self):
+        deleted = self.assets[1].pk
+        with self.captureOnCommitCallbacks(execute=True):
+            Asset.objects.filter(pk=deleted).delete()
+        # Solo se consultan los activos modificados, no la lista completa de ids.
+        with self.assertNumQueries(1):
+            results = self.other.search("proyector")
+        self.assertNotIn(deleted, [row['id'] for row in results])
+        self.assertEqual(len(results), 2)
+
+    def test_missing_delete_entries_fall_back_to_id_scan(self):
+        deleted = self.assets[2].pk
+        with self.captureOnCommitCallbacks(execute=True):
+            Asset.objects.filter(pk=deleted).delete()
+        cache.delete('chatbot:asset_index:deleted:1')
+        with self.assertNumQueries(2):
+            results = self.other.search("proyector")
+        self.assertNotIn(deleted, [row['id'] for row in results])
+
+
+class AvailableAssetsListingTests(TestCase):
+    """Listado paginado de activos disponibles del chatbot."""
+
+    def test_pages_cover_all_available_assets_once(self):
+        for category_name in ("Audio", "Vídeo"):
+            category = AssetCategory.objects.create(name=category_name)
+            for n in range(4):
+                Asset.objects.create(name=f"Equipo {n}", category=category, location="Aula")
+        Asset.objects.create(name="Equipo roto", category=category, location="Aula", status='mantenimiento')
+
+        listed, cursor, pages = [], None, 0
+        while True:
+            groups, cursor = get_available_assets(after=cursor, limit=3)
+            listed += [(category, name) for category, names in groups for name in names]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(listed), 8)
+        self.assertEqual(len(set(listed)), 8)
+        self.assertEqual(listed[0], ("Audio", "Equipo 0"))
+
+
+class StubIntentModel:
+    """Modelo de intenciones falso: cada texto puntúa 1.0 en sí mismo."""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = None
+        self.error = None
+
+    def __call__(self, text):
+        return SimpleNamespace(cats={text: 1.0})
+
+    def pipe(self, texts, batch_size):
+        texts = list(texts)
+        self.batches.append(texts)
+        gate, self.gate = self.gate, None
+        if gate is not None:
+            # Retiene el primer lote para que los siguientes mensajes se acumulen.
+            gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [SimpleNamespace(cats={text: 1.0}) for text in texts]
+
+
+class IntentBatcherTests(SimpleTestCase):
+    """Micro-lotes de clasificación de intenciones con un modelo falso."""
+
+    def setUp(self):
+        self.model = StubIntentModel()
+
+    def batcher(self, batch_size=8, max_wait=1.0):
+        return IntentBatcher(lambda: self.model, batch_size=batch_size, max_wait=max_wait)
+
+    def classify_in_threads(self, batcher, texts):
+        """Clasifica cada texto en su propio hilo; devuelve {texto: resultado o excepción}."""
+        results = {}
+
+        def worker(text):
+            try:
+                results[text] = batcher.classify(text, timeout=5)
+            except Exception as e:
+                results[text] = e
+
+        threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def hold_first_batch(self, batcher, texts):
+        """Retiene un primer mensaje en el modelo mientras se encolan `texts`, y los libera."""
+        gate = self.model.gate = threading.Event()
+        first, results = self.classify_in_threads(batcher, ['primero'])
+        while not self.model.batches:
+            time.sleep(0.001)
+        threads, more = self.classify_in_threads(batcher, texts)
+        while batcher._queue.qsize() < len(texts):
+            time.sleep(0.001)
+        gate.set()
+        for thread in first + threads:
+            thread.join(5)
+        results.update(more)
+        return results
+
+    def test_zero_wait_classifies_in_calling_thread(self):
+        batcher = self.batcher(max_wait=0)
+        self.assertEqual(batcher.classify('hola'), {'hola': 1.0})
+        self.assertEqual(self.model.batches, [])
+        self.assertIsNone(batcher._thread)
+
+    def test_batches_are_cut_at_batch_size(self):
+        batcher = self.batcher(batch_size=2)
+        texts = ['a', 'b', 'c', 'd', 'e']
+        results = self.hold_first_batch(batcher, texts)
+        self.assertEqual([len(batch) for batch in self.model.batches], [1, 2, 2, 1])
+        for text in texts:
+            self.assertEqual(results[text], {text: 1.0})
+        self.assertEqual(batcher.stats(), {'batches': 4, 'messages': 6, 'mean_batch_size': 1.5})
+
+    def test_isolated_message_does_not_wait(self):
+        batcher = self.batcher(max_wait=2.0)
+        started = time.monotonic()
+        self.assertEqual(batcher.classify('hola'), {'hola': 1.0})
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_partial_batch_waits_for_window(self):
+        batcher = self.batcher(max_wait=0.1)
+        # Otra petición en curso que nunca llega a encolar su mensaje.
+        batcher._in_flight += 1
+        started = time.monotonic()
+        self.assertEqual(batcher.classify('hola'), {'hola': 1.0})
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(self.model.batches, [['hola']])
+
+    def test_model_error_is_raised_to_every_waiter(self):
+        batcher = self.batcher()
+        self.model.error = ValueError("modelo roto")
+        results = self.hold_first_batch(batcher, ['a', 'b'])
+        self.assertEqual(len(self.model.batches), 2)
+        for text in ('primero', 'a', 'b'):
+            self.assertIsInstance(results[text], ValueError)
+        # El hilo de fondo sigue atendiendo después del error.
+        self.model.error = None
+        self.assertEqual(batcher.classify('hola', timeout=5), {'hola': 1.0})
+
+    def test_worker_restarts_after_fork(self):
+        batcher = self.batcher()
+        batcher.classify('hola', timeout=5)
+        thread = batcher._thread
+        # Un proceso hijo hereda el objeto pero no el hilo.
+        batcher._pid = -1
+        self.assertEqual(batcher.classify('adiós', timeout=5), {'adiós': 1.0})
+        self.assertIsNot(batcher._thread, thread)
+        self.assertEqual(batcher._pid, os.getpid())
+
+
+class TrainingPipelineTests(SimpleTestCase):
+    """Partición y evaluación reproducibles del entrenamiento de intenciones."""
+
+    INTENTS = list(BASE_CATS)[:3]
+
+    def example(self, text, intent):
+        return text, {'cats': dict(BASE_CATS, **{intent: 1.0})}
+
+    def data(self):
+        counts = dict(zip(self.INTENTS, (10, 5, 1)))
+        return [self.example(f"{intent} {n}", intent) for intent, count in counts.items() for n in range(count)]
+
+    def intents(self, examples):
+        counts = {}
+        for _, annotations in examples:
+            intent = max(annotations['cats'], key=annotations['cats'].get)
+            counts[intent] = counts.get(intent, 0) + 1
+        return counts
+
+    def test_split_is_deterministic_for_a_seed(self):
+        self.assertEqual(split_data(self.data(), 0.2, seed=7), split_data(self.data(), 0.2, seed=7))
+        self.assertNotEqual(split_data(self.data(), 0.2, seed=7)[1], split_data(self.data(), 0.2, seed=8)[1])
+
+    def test_split_stratifies_each_intent(self):
+        first, second, single = self.INTENTS
+        train, dev = split_data(self.data(), 0.2, seed=0)
+        self.assertEqual(self.intents(dev), {first: 2, second: 1})
+        self.assertEqual(self.intents(train), {first: 8, second: 4, single: 1})
+        self.assertEqual(sorted(train + dev), sorted(self.data()))
+        self.assertEqual(split_data(self.data(), 0, seed=0)[1], [])
+
+    def test_evaluate_computes_accuracy_and_macro_f1(self):
+        first, second, _ = self.INTENTS
+        data = [self.example('a', first), self.example('b', first), self.example('c', second), self.example('d', second)]
+        predictions = {'a': first, 'b': second, 'c': second, 'd': second}
+        model = SimpleNamespace(pipe=lambda texts: [SimpleNamespace(cats={predictions[text]: 0.9}) for text in texts])
+
+        scores = evaluate(model, data)
+        self.assertEqual(scores['accuracy'], 0.75)
+        self.assertAlmostEqual(scores['per_intent'][first]['f1'], 2 / 3)
+        self.assertAlmostEqual(scores['per_intent'][second]['precision'], 2 / 3)
+        self.assertAlmostEqual(scores['per_intent'][second]['f1'], 0.8)
+        # Las intenciones sin ejemplos no cuentan para la media.
+        self.assertAlmostEqual(scores['macro_f1'], (2 / 3 + 0.8) / 2)
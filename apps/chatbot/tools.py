@@ -1,22 +1,53 @@
 # chatbot/tools.py
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from apps.assets.journal import CAUSE_CHATBOT_MAINTENANCE
+from apps.assets.counters import counted_status_counts
 from apps.assets.models import Asset
 from apps.loans.models import Loan
 from apps.maintenance.models import Maintenance
+from .asset_index import asset_index
 
-def get_available_assets():
+def get_available_assets(after=None, limit=None):
     """
-    Consulta la base de datos para obtener una lista de activos disponibles.
+    Consulta una página de activos disponibles, agrupados por categoría.
+
+    Solo se leen la categoría, el nombre y el ID de cada activo, ordenados por
+    (categoría, nombre, ID), y cada página continúa tras la última fila de la
+    anterior (paginación por clave, como `core.datatables`).
+
+    Args:
+        after (list, optional): [categoría, nombre, id] del último activo ya mostrado.
+        limit (int, optional): Activos por página; por defecto `CHATBOT_LIST_LIMIT`.
 
     Returns:
-        list: Una lista de nombres de activos cuyo estado es 'disponible'.
-              Devuelve una lista vacía si ocurre un error.
+        tuple: (groups, next_cursor). `groups` es una lista de (categoría, [nombres]);
+               `next_cursor` es el cursor para pedir la página siguiente, o None
+               si no hay más. Devuelve ([], None) si ocurre un error.
     """
+    limit = limit or settings.CHATBOT_LIST_LIMIT
     try:
-        activos = Asset.objects.filter(status='disponible')
-        return [asset.name for asset in activos]
+        activos = Asset.objects.filter(status='disponible').order_by('category__name', 'name', 'id')
+        if after:
+            category, name, asset_id = after
+            activos = activos.filter(
+                Q(category__name__gt=category)
+                | Q(category__name=category, name__gt=name)
+                | Q(category__name=category, name=name, id__gt=asset_id)
+            )
+        rows = list(activos.values_list('category__name', 'name', 'id')[:limit + 1])
     except Exception as e:
         print(f"Error al consultar la base de datos: {e}")
-        return []
+        return [], None
+
+    next_cursor = list(rows[limit - 1]) if len(rows) > limit else None
+    groups = [(category, [name for _, name, _ in items]) for category, items in groupby(rows[:limit], key=itemgetter(0))]
+    return groups, next_cursor
 
 def count_assets_by_status(status: str):
     """
@@ -35,17 +66,19 @@ def count_assets_by_status(status: str):
     try:
         # Mapea sinónimos o variaciones del estado a los valores exactos de la BD.
         status_map = {
-            "mantenimiento": "En mantenimiento",
-            "en mantenimiento": "En mantenimiento",
-            "uso": "En uso",
-            "en uso": "En uso",
-            "disponible": "Disponible",
-            "disponibles": "Disponible",
+            "mantenimiento": "mantenimiento",
+            "mantenimientos": "mantenimiento",
+            "en mantenimiento": "mantenimiento",
+            "uso": "en_uso",
+            "usos": "en_uso",
+            "en uso": "en_uso",
+            "disponible": "disponible",
+            "disponibles": "disponible",
         }
         normalized_status = status_map.get(status.lower(), status)
 
-        count = Asset.objects.filter(status=normalized_status).count()
-        return count
+        # Se lee de los contadores por estado (ver apps.assets.counters).
+        return counted_status_counts(status=normalized_status)['total']
     except Exception as e:
         print(f"Error al contar activos por estado: {e}")
         return 0
@@ -73,16 +106,44 @@ def get_most_recent_loan():
         print(f"Error al buscar el préstamo más reciente: {e}")
         return None
 
+def resolve_asset(asset_identifier: str):
+    """
+    Identifica el activo al que se refiere el usuario.
+
+    Un identificador numérico se busca por ID. Cualquier otro texto se busca en el
+    índice de nombres (`apps.chatbot.asset_index`), que tolera erratas y acentos y
+    reconoce el código del activo, también en la forma "Nombre (CÓDIGO)".
+
+    Args:
+        asset_identifier (str): El texto escrito por el usuario.
+
+    Returns:
+        tuple: (asset_id, candidates). `asset_id` es el ID del activo si la
+               identificación es inequívoca (ID existente, código exacto o un único
+               activo con ese nombre) y None en otro caso; `candidates` son los
+               activos más parecidos (id, name, code, score), de mejor a peor.
+    """
+    identifier = asset_identifier.strip()
+    if identifier.isdigit():
+        asset_id = int(identifier)
+        return (asset_id if Asset.objects.filter(pk=asset_id).exists() else None), []
+    # Por debajo de 0.3 de similitud los candidatos no se parecen lo bastante para sugerirlos.
+    candidates = [c for c in asset_index.search(identifier) if c['score'] >= 0.3]
+    # Puntuación 3: código exacto; 2: nombre idéntico una vez normalizado.
+    if candidates and candidates[0]['score'] >= 2 and (len(candidates) == 1 or candidates[1]['score'] < candidates[0]['score']):
+        return candidates[0]['id'], candidates
+    return None, candidates
+
 def create_maintenance_request(asset_identifier: str, description: str):
     """
     Crea un nuevo registro de mantenimiento para un activo específico.
 
     Busca un activo por su ID (si el identificador es numérico) o por su nombre
     (si es una cadena de texto). Si lo encuentra, crea una solicitud de
-    mantenimiento y actualiza el estado del activo a 'En mantenimiento'.
+    mantenimiento y actualiza el estado del activo a 'mantenimiento'.
 
     Args:
-        asset_identifier (str): El ID o el nombre exacto del activo.
+        asset_identifier (str): El ID, el código o el nombre del activo (ver `resolve_asset`).
         description (str): La descripción del problema o solicitud.
 
     Returns:
@@ -90,21 +151,19 @@ def create_maintenance_request(asset_identifier: str, description: str):
              Devuelve None si el activo no se encuentra o si ocurre un error.
     """
     try:
-        if asset_identifier.isdigit():
-            # Si el identificador es numérico, búscalo por ID.
-            asset = Asset.objects.get(pk=int(asset_identifier))
-        else:
-            # Si no, búscalo por nombre (ignorando mayúsculas/minúsculas).
-            asset = Asset.objects.get(name__iexact=asset_identifier)
+        asset_id, _ = resolve_asset(asset_identifier)
+        if asset_id is None:
+            raise Asset.DoesNotExist
+        asset = Asset.objects.get(pk=asset_id)
         
-        maintenance = Maintenance.objects.create(
-            asset=asset,
-            description=description,
-            status='pendiente'  # El estado inicial de toda nueva solicitud.
-        )
-        # Actualiza el estado del activo para reflejar que está en mantenimiento.
-        asset.status = 'En mantenimiento'
-        asset.save()
+        with transaction.atomic():
+            maintenance = Maintenance.objects.create(
+                asset=asset,
+                description=description,
+                status='pending'  # El estado inicial de toda nueva solicitud.
+            )
+            # Actualiza el estado del activo para reflejar que está en mantenimiento.
+            asset.set_status('mantenimiento', CAUSE_CHATBOT_MAINTENANCE)
         return maintenance.id
     except (Asset.DoesNotExist, ValueError):
         print(f"Error al crear mantenimiento: No se encontró el activo '{asset_identifier}'")
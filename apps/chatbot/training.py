@@ -0,0 +1,171 @@
+# chatbot/training.py
+"""
+Entrenamiento y evaluación del modelo de intenciones del chatbot.
+
+El entrenamiento es reproducible (semilla fija para `random` y spaCy), usa
+minilotes de tamaño creciente (`spacy.util.minibatch` con `compounding`) y separa
+por intención una parte de `TRAIN_DATA` como conjunto de validación. Tras cada
+época se evalúa en validación y se conserva el mejor modelo según la F1 macro;
+si no mejora durante `patience` épocas, el entrenamiento se detiene. Por último
+se reentrena con todos los ejemplos durante las épocas del mejor modelo.
+
+Se usa desde `python manage.py train_chatbot` y desde `train_chatbot.py`.
+"""
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import spacy
+from spacy.training.example import Example
+from spacy.util import compounding, minibatch
+
+from .training_data import BASE_CATS
+
+
+def _intent(annotations):
+    cats = annotations['cats']
+    return max(cats, key=cats.get)
+
+
+def split_data(data, dev_ratio, seed):
+    """
+    Separa los ejemplos en entrenamiento y validación, estratificando por intención.
+
+    Cada intención aporta al menos un ejemplo a validación si `dev_ratio` > 0 y
+    tiene más de uno.
+
+    Returns:
+        tuple: (train, dev) como listas de (texto, anotaciones).
+    """
+    by_intent = defaultdict(list)
+    for text, annotations in data:
+        by_intent[_intent(annotations)].append((text, annotations))
+    rng = random.Random(seed)
+    train, dev = [], []
+    for intent in sorted(by_intent):
+        examples = by_intent[intent]
+        rng.shuffle(examples)
+        dev_count = round(len(examples) * dev_ratio)
+        if dev_ratio > 0 and len(examples) > 1:
+            dev_count = min(max(dev_count, 1), len(examples) - 1)
+        dev.extend(examples[:dev_count])
+        train.extend(examples[dev_count:])
+    return train, dev
+
+
+def evaluate(nlp, data):
+    """
+    Exactitud y F1 por intención, tomando como predicción la intención con mayor puntuación.
+
+    Returns:
+        dict: accuracy, macro_f1 y per_intent (precision, recall, f1, support).
+    """
+    gold = [_intent(annotations) for _, annotations in data]
+    predicted = [max(doc.cats, key=doc.cats.get) for doc in nlp.pipe(text for text, _ in data)]
+    per_intent = {}
+    for intent in BASE_CATS:
+        tp = sum(1 for g, p in zip(gold, predicted) if g == p == intent)
+        predicted_count = predicted.count(intent)
+        support = gold.count(intent)
+        precision = tp / predicted_count if predicted_count else 0.0
+        recall = tp / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_intent[intent] = {'precision': precision, 'recall': recall, 'f1': f1, 'support': support}
+    scored = [scores['f1'] for scores in per_intent.values() if scores['support']]
+    return {
+        'accuracy': sum(1 for g, p in zip(gold, predicted) if g == p) / len(gold) if gold else 0.0,
+        'macro_f1': statistics.mean(scored) if scored else 0.0,
+        'per_intent': per_intent,
+    }
+
+
+def inference_latency(nlp, texts, repeat=20):
+    """
+    Latencia media por mensaje en segundos, procesando los mensajes de uno en uno
+    (como la vista sin lotes) y con `nlp.pipe`.
+    """
+    texts = list(texts) * repeat
+    started = time.perf_counter()
+    for text in texts:
+        nlp(text)
+    single = (time.perf_counter() - started) / len(texts)
+    started = time.perf_counter()
+    list(nlp.pipe(texts))
+    batched = (time.perf_counter() - started) / len(texts)
+    return {'single': single, 'pipe': batched}
+
+
+def train_intent_model(data, max_epochs=50, patience=5, dev_ratio=0.2, seed=0, dropout=0.2,
+                       batch_start=4.0, batch_stop=32.0, batch_rate=1.001, refit=True, log=print):
+    """
+    Entrena un modelo de clasificación de intenciones.
+
+    Args:
+        data (list): Ejemplos (texto, {"cats": ...}), como `TRAIN_DATA`.
+        max_epochs (int): Máximo de épocas.
+        patience (int): Épocas sin mejorar en validación antes de parar.
+        dev_ratio (float): Fracción de ejemplos de cada intención para validación.
+            Con 0 se entrena con todo durante `max_epochs` épocas, sin validación.
+        seed (int): Semilla para la partición, el orden de los lotes y los pesos.
+        dropout (float): Dropout del entrenamiento.
+        batch_start, batch_stop, batch_rate (float): Parámetros de `compounding`
+            para el tamaño de los minilotes.
+        refit (bool): Si hay validación, reentrenar al final con todos los ejemplos
+            durante las épocas del mejor modelo, para no desperdiciar los de validación.
+        log (callable): Función que recibe los mensajes de progreso.
+
+    Returns:
+        tuple: (nlp, report) con el modelo entrenado y un diccionario con la
+               partición, las épocas, el tiempo de entrenamiento y las métricas
+               de validación del mejor modelo.
+    """
+    spacy.util.fix_random_seed(seed)
+    rng = random.Random(seed)
+    train, dev = split_data(data, dev_ratio, seed)
+
+    nlp = spacy.blank("es")
+    textcat = nlp.add_pipe("textcat")
+    for label in BASE_CATS:
+        textcat.add_label(label)
+    train_examples = [Example.from_dict(nlp.make_doc(text), annotations) for text, annotations in train]
+    optimizer = nlp.initialize(lambda: train_examples)
+
+    best_score, best_epoch, best_weights = -1.0, 0, None
+    started = time.perf_counter()
+    epoch = 0
+    for epoch in range(1, max_epochs + 1):
+        rng.shuffle(train_examples)
+        losses = {}
+        for batch in minibatch(train_examples, size=compounding(batch_start, batch_stop, batch_rate)):
+            nlp.update(batch, sgd=optimizer, drop=dropout, losses=losses)
+        if not dev:
+            log(f"Época {epoch}/{max_epochs}, pérdida: {losses['textcat']:.4f}")
+            continue
+        score = evaluate(nlp, dev)['macro_f1']
+        log(f"Época {epoch}/{max_epochs}, pérdida: {losses['textcat']:.4f}, F1 validación: {score:.3f}")
+        if score > best_score:
+            best_score, best_epoch, best_weights = score, epoch, nlp.to_bytes()
+        elif epoch - best_epoch >= patience:
+            log(f"Sin mejora en {patience} épocas; se conserva la época {best_epoch}.")
+            break
+    train_seconds = time.perf_counter() - started
+
+    if best_weights is not None:
+        nlp.from_bytes(best_weights)
+    report = {
+        'train_examples': len(train),
+        'dev_examples': len(dev),
+        'epochs': epoch,
+        'best_epoch': best_epoch or epoch,
+        'train_seconds': train_seconds,
+        'dev': evaluate(nlp, dev) if dev else None,
+        'refit': False,
+    }
+    if dev and refit:
+        log(f"Reentrenando con los {len(data)} ejemplos durante {best_epoch} épocas...")
+        nlp, refit_report = train_intent_model(data, max_epochs=best_epoch, dev_ratio=0, seed=seed, dropout=dropout,
+                                               batch_start=batch_start, batch_stop=batch_stop, batch_rate=batch_rate, log=log)
+        report['refit'] = True
+        report['train_seconds'] += refit_report['train_seconds']
+    return nlp, report
@@ -1,6 +1,7 @@
 """
 Define las rutas URL para la API del chatbot, incluyendo el endpoint principal
-para la interacción y un endpoint para reiniciar la sesión del chatbot.
+para la interacción, un endpoint para reiniciar la sesión del chatbot y otro
+con el estado de carga de los modelos de lenguaje.
 """
 from django.urls import path
 from . import views
@@ -8,4 +9,5 @@ from . import views
 urlpatterns = [
     path('api/chatbot/', views.chatbot_api, name='chatbot_api'),
     path('api/reset_chatbot_session/', views.reset_chatbot_session, name='reset_chatbot_session'),
+    path('api/chatbot/modelos/', views.chatbot_models_status, name='chatbot_models_status'),
 ]
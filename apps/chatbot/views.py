@@ -1,22 +1,44 @@
 # chatbot/views.py
-import spacy
 from django.http import JsonResponse
+from django.utils.html import escape
 import json
-from .tools import get_available_assets, count_assets_by_status, get_most_recent_loan, create_maintenance_request
+from .batching import intent_batcher
+from .cache import analyze_message, message_cache, normalize_message
+from .nlp import registry
+from .tools import get_available_assets, count_assets_by_status, get_most_recent_loan, create_maintenance_request, resolve_asset
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
-
-# --- Carga de Modelos de spaCy ---
-# Se cargan los modelos de NLP al iniciar el servidor para un rendimiento óptimo.
-# nlp_intent: Modelo personalizado para la clasificación de intenciones.
-# nlp_ner: Modelo pre-entrenado de spaCy para el reconocimiento de entidades (NER).
-try:
-    nlp_intent = spacy.load("chatbot_model")
-    nlp_ner = spacy.load("es_core_news_md")
-except OSError as e:
-    print(f"Error cargando los modelos de spaCy: {e}")
-    nlp_intent = None
-    nlp_ner = None
+from django.views.decorators.http import require_GET, require_POST
+from apps.accounts.decorators import group_required
+
+# --- Modelos de spaCy ---
+# Se cargan bajo demanda en la primera petición al chatbot (ver apps.chatbot.nlp).
+# intent: Modelo personalizado para la clasificación de intenciones, que se aplica
+# por micro-lotes (ver apps.chatbot.batching).
+# Las entidades se extraen sin modelo, con una tabla de formas (ver apps.chatbot.entities).
+# El resultado de ambos se cachea por mensaje (ver apps.chatbot.cache).
+
+# Mensajes con los que el usuario pide la siguiente página de un listado.
+MORE_MESSAGES = ("ver más", "ver mas", "más", "mas")
+
+def _list_available_assets(request, response_data, after=None):
+    """
+    Responde con una página de activos disponibles agrupados por categoría.
+    Si quedan más, guarda en la sesión el cursor de continuación y ofrece "Ver más".
+    """
+    groups, next_cursor = get_available_assets(after)
+    if not groups:
+        response_data["response"] = "No hay más activos disponibles." if after else "No hay activos disponibles."
+    else:
+        intro = "Estos son más activos disponibles:" if after else "Claro, los activos disponibles son:"
+        response_data["response"] = intro + "".join(
+            f"<b>{escape(category)}</b><ul>" + "".join(f"<li>{escape(name)}</li>" for name in names) + "</ul>"
+            for category, names in groups
+        )
+    if next_cursor:
+        request.session['asset_listing_cursor'] = next_cursor
+        response_data["suggestions"] = ["Ver más", "Reportar un problema"]
+    else:
+        response_data["suggestions"] = ["Reportar un problema", "Contar activos en uso"]
 
 def chatbot_api(request):
     """
@@ -26,7 +48,7 @@ def chatbot_api(request):
     del mensaje del usuario. Gestiona flujos de conversación multi-paso (ej. reportar mantenimiento)
     y respuestas directas para consultas de un solo paso.
     """
-    if not nlp_intent or not nlp_ner:
+    if not registry.get('intent'):
         return JsonResponse({'response': 'Error interno: Los modelos de lenguaje no están disponibles.'}, status=500)
 
     if request.method == 'POST':
@@ -37,8 +59,8 @@ def chatbot_api(request):
                 return JsonResponse({'response': 'No se recibió ningún mensaje.'})
 
             # --- Procesamiento de Intención y Entidades ---
-            doc_intent = nlp_intent(user_message.lower())
-            sorted_cats = sorted(doc_intent.cats.items(), key=lambda item: item[1], reverse=True)
+            cats, entities = analyze_message(user_message)
+            sorted_cats = sorted(cats.items(), key=lambda item: item[1], reverse=True)
             # Se considera una intención válida si su puntuación es > 0.7
             intent = sorted_cats[0][0] if sorted_cats[0][1] > 0.7 else None
 
@@ -49,9 +71,19 @@ def chatbot_api(request):
             # --- 1. LÓGICA DE CONVERSACIÓN MULTI-PASO ---
             # Gestiona el flujo de conversación para reportar un problema de mantenimiento.
             if conversation_state == 'AWAITING_MAINTENANCE_ASSET_NAME':
-                request.session['maintenance_context'] = {'asset_name': user_message}
-                request.session['conversation_state'] = 'AWAITING_MAINTENANCE_DESCRIPTION'
-                response_data["response"] = f"Entendido, un problema con '{user_message}'. ¿Cuál es la descripción del problema?"
+                asset_id, candidates = resolve_asset(user_message)
+                if asset_id is not None:
+                    request.session['maintenance_context'] = {'asset_name': user_message, 'asset_id': asset_id}
+                    request.session['conversation_state'] = 'AWAITING_MAINTENANCE_DESCRIPTION'
+                    response_data["response"] = f"Entendido, un problema con '{user_message}'. ¿Cuál es la descripción del problema?"
+                elif candidates:
+                    # Nombre con erratas o compartido por varios activos: se sigue esperando el activo.
+                    response_data["response"] = f"No encontré exactamente '{user_message}'. ¿Te refieres a alguno de estos activos?"
+                    response_data["suggestions"] = [
+                        f"{c['name']} ({c['code']})" if c['code'] else str(c['id']) for c in candidates
+                    ]
+                else:
+                    response_data["response"] = f"No encontré ningún activo con el nombre o ID '{user_message}'. Prueba de nuevo."
                 context_handled = True
 
             elif conversation_state == 'AWAITING_MAINTENANCE_DESCRIPTION':
@@ -72,7 +104,7 @@ def chatbot_api(request):
             elif conversation_state == 'AWAITING_MAINTENANCE_CONFIRMATION':
                 context = request.session.get('maintenance_context', {})
                 if intent == 'afirmacion':
-                    maintenance_id = create_maintenance_request(context.get('asset_name'), context.get('description'))
+                    maintenance_id = create_maintenance_request(str(context.get('asset_id', context.get('asset_name'))), context.get('description'))
                     if maintenance_id:
                         response_data["response"] = f"¡Hecho! Se ha creado la solicitud de mantenimiento #{maintenance_id}."
                     else:
@@ -89,18 +121,15 @@ def chatbot_api(request):
             
             else:
                 # --- 2. LÓGICA DE CONVERSACIÓN DE UN SOLO PASO ---
-                # Extraer entidades (como el estado de un activo) del mensaje.
-                doc_ner = nlp_ner(user_message.lower())
-                entities = {}
-                lemmas_estado = ["mantenimiento", "uso", "disponible"]
-                for token in doc_ner:
-                    if token.lemma_ in lemmas_estado:
-                        entities['status'] = token.text
-                        break
-                
+                # Las entidades (como el estado de un activo) ya se extrajeron con la intención.
                 request.session.pop('chatbot_context', None)
+                listing_cursor = request.session.pop('asset_listing_cursor', None)
+
+                if listing_cursor and normalize_message(user_message) in MORE_MESSAGES:
+                    _list_available_assets(request, response_data, after=listing_cursor)
+                    context_handled = True
 
-                if intent == "reportar_problema":
+                elif intent == "reportar_problema":
                     request.session.pop('maintenance_context', None)
                     request.session['conversation_state'] = 'AWAITING_MAINTENANCE_ASSET_NAME'
                     response_data["response"] = "Entendido. ¿Para qué activo deseas reportar un problema? (Puedes usar el nombre exacto o su ID)"
@@ -116,9 +145,7 @@ def chatbot_api(request):
                     context_handled = True
 
                 elif intent == "listar_activos_disponibles":
-                    assets = get_available_assets()
-                    response_data["response"] = "Claro, los activos disponibles son: <ul>" + "".join([f"<li>{a}</li>" for a in assets]) + "</ul>" if assets else "No hay activos disponibles."
-                    response_data["suggestions"] = ["Reportar un problema", "Contar activos en uso"]
+                    _list_available_assets(request, response_data)
                     context_handled = True
 
                 elif intent == "contar_activos_por_estado":
@@ -185,4 +212,19 @@ def reset_chatbot_session(request):
         return JsonResponse({'status': 'session_cleared'})
     except Exception as e:
         print(f"Error clearing chatbot session: {e}")
-        return JsonResponse({'status': 'error'}, status=500)
\ No newline at end of file
+        return JsonResponse({'status': 'error'}, status=500)
+
+@require_GET
+@group_required('Admin')
+def chatbot_models_status(request):
+    """
+    Devuelve en JSON el estado de los modelos de spaCy de este proceso:
+    si están cargados, cuánto tardaron en cargarse y cuánta memoria ocuparon,
+    junto con las estadísticas de los micro-lotes de clasificación y de la caché
+    de mensajes.
+    """
+    return JsonResponse({
+        'models': registry.metrics(),
+        'intent_batching': intent_batcher.stats(),
+        'message_cache': message_cache.stats(),
+    })
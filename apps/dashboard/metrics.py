@@ -0,0 +1,183 @@
+"""
+Snapshot cacheado de las métricas del dashboard de administración.
+
+El cálculo de la página (conteos de activos, distribución por categoría, últimos
+movimientos, próximos eventos y estadísticas de entidades) se guarda en
+el framework de caché de Django con un TTL. Las señales de `apps.dashboard.signals`
+invalidan el snapshot cuando cambia alguno de los modelos involucrados, de modo
+que cargas repetidas del dashboard cuestan una sola lectura de caché.
+
+Los datos de los gráficos no forman parte del snapshot: cada widget de
+`CHART_WIDGETS` se calcula y cachea por separado y se sirve desde su propio
+endpoint JSON, para que la página se renderice sin esperar a las agregaciones.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum, Case, When, IntegerField, Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.assets.aggregations import status_counts, category_breakdown
+from apps.assets.models import AssetCategory
+from apps.events.models import Evento, AttendingEntity
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+from apps.request.models import LoanRequest
+
+DASHBOARD_METRICS_CACHE_KEY = 'dashboard:admin_metrics'
+
+
+def _month_histogram(value_key):
+    """Cuenta los eventos agrupados por mes de inicio."""
+    rows = (Evento.objects.annotate(month=TruncMonth('fecha_inicio'))
+            .values('month')
+            .annotate(**{value_key: Count('id')})
+            .order_by('month'))
+    return {
+        'labels': [row['month'].strftime('%b %Y') for row in rows],
+        'data': [row[value_key] for row in rows],
+    }
+
+
+def entity_chart_data():
+    """Número de eventos por entidad asistente."""
+    entity_events = list(AttendingEntity.objects.annotate(event_count=Count('evento')).values('name', 'event_count').order_by('-event_count'))
+    return {'labels': [item['name'] for item in entity_events], 'data': [item['event_count'] for item in entity_events]}
+
+
+def type_chart_data():
+    """Distribución de eventos por tipo."""
+    event_types = list(Evento.objects.values('tipo').annotate(count=Count('tipo')).order_by('tipo'))
+    tipo_display_map = dict(Evento.TIPO_CHOICES)
+    return {'labels': [tipo_display_map.get(item['tipo'], item['tipo']) for item in event_types], 'data': [item['count'] for item in event_types]}
+
+
+def events_per_month_chart_data():
+    """Eventos por mes de inicio."""
+    return _month_histogram('count')
+
+
+def total_visits_over_time_data():
+    """Total de visitas por mes de inicio."""
+    return _month_histogram('total_visits')
+
+
+def loan_status_summary():
+    """Préstamos agrupados por estado."""
+    return list(Loan.objects.values('status').annotate(total=Count('id')))
+
+
+def loan_user_summary():
+    """Préstamos agrupados por usuario."""
+    return list(Loan.objects.values('user__username').annotate(total=Count('id')))
+
+
+# Widgets de gráficos que el dashboard carga de forma asíncrona, uno por endpoint.
+CHART_WIDGETS = {
+    'entity': entity_chart_data,
+    'event_type': type_chart_data,
+    'events_per_month': events_per_month_chart_data,
+    'visits_over_time': total_visits_over_time_data,
+    'loan_status': loan_status_summary,
+    'loan_user': loan_user_summary,
+}
+
+
+def compute_admin_metrics():
+    """
+    Calcula todas las métricas del dashboard de administración desde la base de datos.
+
+    Returns:
+        dict: Contexto de plantilla independiente del usuario que hace la petición.
+    """
+    # --- 1. Métricas Generales de Activos ---
+    asset_counts = status_counts()
+    total_assets = asset_counts['total']
+    available_assets = asset_counts['disponible']
+    in_use_assets = asset_counts['en_uso']
+    maintenance_assets = asset_counts['mantenimiento']
+
+    # --- 2. Datos de Distribución por Categoría ---
+    data_by_category = category_breakdown()
+
+    # --- 3. Últimos Movimientos ---
+    last_10_loans = list(Loan.objects.select_related('asset', 'user').order_by('-loan_date')[:10])
+    last_10_maintenances = list(Maintenance.objects.select_related('asset').order_by('-created_at')[:10])
+    overdue_loans = list(Loan.objects.overdue().select_related('asset', 'user'))
+
+    upcoming_events_list = list(
+        Evento.objects.filter(fecha_inicio__gte=timezone.now())
+        .select_related('responsable', 'attending_entity')
+        .order_by('fecha_inicio')
+        .prefetch_related('checklist_items', 'reserved_assets')[:6]
+    )
+
+    recent_requests = list(LoanRequest.objects.select_related('user', 'asset').order_by('-request_date')[:5])
+
+    entity_stats = list(AttendingEntity.objects.annotate(
+        visit_count=Sum(Case(When(evento__tipo='visita', then=1), default=0, output_field=IntegerField()))
+    ).values('name', 'visit_count').order_by('-visit_count'))
+
+    return {
+        "data_by_category": data_by_category, "total_assets": total_assets, "available_assets": available_assets,
+        "in_use_assets": in_use_assets, "maintenance_assets": maintenance_assets,
+        "total_categories": AssetCategory.objects.count(),
+        "last_10_loans": last_10_loans, "last_10_maintenances": last_10_maintenances, "overdue_loans": overdue_loans,
+        "asset_status_labels": ["Disponible", "En uso", "En mantenimiento"],
+        "asset_status_data": [available_assets, in_use_assets, maintenance_assets],
+        "asset_category_labels": [c['categoria'] for c in data_by_category],
+        "asset_category_data": [c['total'] for c in data_by_category],
+        "upcoming_events": upcoming_events_list, "recent_requests": recent_requests,
+        "entity_stats": entity_stats,
+        "generated_at": timezone.now(),
+    }
+
+
+def get_admin_metrics():
+    """
+    Devuelve el snapshot de métricas, calculándolo y guardándolo en caché si no existe.
+
+    El TTL se configura con `DASHBOARD_METRICS_TTL` (segundos).
+    """
+    metrics = cache.get(DASHBOARD_METRICS_CACHE_KEY)
+    if metrics is None:
+        metrics = compute_admin_metrics()
+        cache.set(DASHBOARD_METRICS_CACHE_KEY, metrics, getattr(settings, 'DASHBOARD_METRICS_TTL', 300))
+    return metrics
+
+
+def _chart_cache_key(name):
+    return f'dashboard:chart:{name}'
+
+
+def get_chart_widget(name):
+    """
+    Devuelve los datos de un widget de gráfico junto con sus validadores HTTP.
+
+    Args:
+        name (str): Clave del widget en `CHART_WIDGETS`.
+
+    Returns:
+        dict: {'data': datos serializables, 'etag': str, 'last_modified': datetime}
+    """
+    key = _chart_cache_key(name)
+    chart = cache.get(key)
+    if chart is None:
+        data = CHART_WIDGETS[name]()
+        serialized = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+        chart = {
+            'data': data,
+            'etag': hashlib.md5(serialized.encode('utf-8')).hexdigest(),
+            'last_modified': timezone.now(),
+        }
+        cache.set(key, chart, getattr(settings, 'DASHBOARD_METRICS_TTL', 300))
+    return chart
+
+
+def invalidate_admin_metrics():
+    """Descarta el snapshot y los widgets para que la próxima carga los recalcule."""
+    cache.delete_many([DASHBOARD_METRICS_CACHE_KEY] + [_chart_cache_key(name) for name in CHART_WIDGETS])
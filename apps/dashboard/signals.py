@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from apps.assets.models import Asset, AssetCategory
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+from apps.events.models import Evento, ChecklistItem, AttendingEntity
+from apps.request.models import LoanRequest
+from .metrics import invalidate_admin_metrics
+
+# Modelos cuyo cambio deja obsoleto el snapshot de métricas del dashboard.
+DASHBOARD_SOURCES = (Asset, AssetCategory, Loan, Maintenance, Evento, ChecklistItem, AttendingEntity, LoanRequest)
+
+
+def invalidate_dashboard_metrics(sender, **kwargs):
+    """
+    Invalida el snapshot del dashboard al guardar o borrar un modelo fuente.
+    Se hace al confirmar la transacción: si se invalidara antes, otra petición
+    podría reconstruir el snapshot con los datos aún sin confirmar.
+    """
+    transaction.on_commit(invalidate_admin_metrics)
+
+
+for model in DASHBOARD_SOURCES:
+    post_save.connect(invalidate_dashboard_metrics, sender=model, dispatch_uid=f'dashboard_metrics_save_{model.__name__}')
+    post_delete.connect(invalidate_dashboard_metrics, sender=model, dispatch_uid=f'dashboard_metrics_delete_{model.__name__}')
+
+m2m_changed.connect(invalidate_dashboard_metrics, sender=Evento.reserved_assets.through, dispatch_uid='dashboard_metrics_reserved_assets')
@@ -1,6 +1,7 @@
 """
 Define las rutas URL para la aplicación del dashboard, incluyendo la vista principal
-del dashboard y la funcionalidad de exportación de reportes.
+del dashboard, los endpoints JSON de sus gráficos y la funcionalidad de
+exportación de reportes.
 """
 from django.urls import path
 from . import views
@@ -8,4 +9,5 @@ from . import views
 urlpatterns = [
     path("", views.dashboard_view, name="dashboard_home"),   # Vista principal
     path("export/", views.export_report, name="export_report"),
+    path("api/charts/<slug:widget>/", views.dashboard_chart_data, name="dashboard_chart_data"),
 ]
\ No newline at end of file
@@ -2,6 +2,7 @@ from django import forms
 from django.forms import inlineformset_factory
 from .models import Evento, ChecklistItem, AttendingEntity
 from apps.assets.models import Asset # Importar el modelo Asset
+from apps.assets.availability import asset_availability
 from dal import autocomplete # Importar autocomplete
 
 class EventoForm(forms.ModelForm):
@@ -31,6 +32,29 @@ class EventoForm(forms.ModelForm):
         # self.fields['reserved_assets'].queryset = Asset.objects.filter(status='disponible')
         # self.fields['reserved_assets'].widget = forms.CheckboxSelectMultiple()
 
+    def clean(self):
+        """
+        Comprueba en una sola consulta que ninguno de los activos reservados
+        tenga otra reserva vigente que se solape con las fechas del evento.
+        """
+        cleaned_data = super().clean()
+        assets = cleaned_data.get('reserved_assets')
+        start = cleaned_data.get('fecha_inicio')
+        end = cleaned_data.get('fecha_fin')
+        if assets and start and end and start < end:
+            availability = asset_availability(
+                start, end,
+                asset_ids=[asset.pk for asset in assets],
+                exclude_event=self.instance if self.instance.pk else None,
+            )
+            conflicting = [entry['name'] for entry in availability.values() if entry['conflicts']]
+            if conflicting:
+                self.add_error(
+                    'reserved_assets',
+                    "Los siguientes activos ya están reservados en ese horario: " + ", ".join(conflicting),
+                )
+        return cleaned_data
+
 
 class ChecklistItemForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_reservations(apps, schema_editor):
+    """Crea una reserva por cada activo ya asociado a un evento."""
+    Evento = apps.get_model('events', 'Evento')
+    AssetReservation = apps.get_model('events', 'AssetReservation')
+    Through = Evento.reserved_assets.through
+    links = Through.objects.values_list('evento_id', 'asset_id', 'evento__fecha_inicio', 'evento__fecha_fin', 'evento__status')
+    AssetReservation.objects.bulk_create(
+        (AssetReservation(event_id=event_id, asset_id=asset_id, start=start, end=end, status=status)
+         for event_id, asset_id, start, end, status in links.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0011_remove_assetrequest_asset_remove_assetrequest_user_and_more'),
+        ('events', '0010_evento_current_attendees_evento_max_attendees'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(help_text='Inicio de la reserva (fecha de inicio del evento).')),
+                ('end', models.DateTimeField(blank=True, help_text='Fin de la reserva (fecha de fin del evento).', null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('approved', 'Aprobado'), ('rejected', 'Rechazado'), ('active', 'Activo')], help_text='Estado del evento al que pertenece la reserva.', max_length=20)),
+                ('asset', models.ForeignKey(help_text='Activo reservado.', on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='assets.asset')),
+                ('event', models.ForeignKey(help_text='Evento para el que se reserva el activo.', on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='events.evento')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['asset', 'status', 'end', 'start'], name='reservation_asset_overlap_idx'), models.Index(fields=['status', 'end', 'start'], name='reservation_overlap_idx')],
+                'constraints': [models.UniqueConstraint(fields=('event', 'asset'), name='unique_event_asset_reservation')],
+            },
+        ),
+        migrations.RunPython(backfill_reservations, migrations.RunPython.noop),
+    ]
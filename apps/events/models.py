@@ -102,6 +102,10 @@ class Evento(models.Model):
         auto_now_add=True,
         help_text="Fecha y hora de creación del registro del evento."
     )
+    actualizado_en = models.DateTimeField(
+        auto_now=True,
+        help_text="Fecha y hora de la última modificación del evento."
+    )
     reserved_assets = models.ManyToManyField(
         Asset, 
         blank=True, 
@@ -128,6 +132,84 @@ class Evento(models.Model):
         """Representación en cadena del evento."""
         return f"{self.titulo} ({self.get_tipo_display()})"
 
+class AssetReservationQuerySet(models.QuerySet):
+    """
+    QuerySet de reservas con las consultas de solapamiento de intervalos.
+    """
+
+    def overlapping(self, start, end):
+        """
+        Reservas vigentes cuyo intervalo se solapa con [start, end).
+
+        Solo bloquean las reservas de eventos aprobados o activos; las reservas
+        sin fecha de fin nunca se consideran en conflicto.
+
+        Args:
+            start (datetime): Inicio del rango a comprobar.
+            end (datetime): Fin del rango a comprobar.
+        """
+        return self.filter(
+            status__in=AssetReservation.BLOCKING_STATUSES,
+            end__gt=start,
+            start__lt=end,
+        )
+
+class AssetReservation(models.Model):
+    """
+    Reserva de un activo para un evento durante un intervalo de tiempo.
+
+    Es una copia desnormalizada de `Evento.reserved_assets` con las fechas y el
+    estado del evento, que `apps.events.signals` mantiene sincronizada. Las
+    comprobaciones de disponibilidad consultan esta tabla, cuyos índices
+    compuestos permiten resolver los solapamientos sin unir con los eventos.
+    """
+    BLOCKING_STATUSES = ['approved', 'active']
+
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        help_text="Activo reservado."
+    )
+    event = models.ForeignKey(
+        Evento,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        help_text="Evento para el que se reserva el activo."
+    )
+    start = models.DateTimeField(
+        help_text="Inicio de la reserva (fecha de inicio del evento)."
+    )
+    end = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fin de la reserva (fecha de fin del evento)."
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Evento.STATUS_CHOICES,
+        help_text="Estado del evento al que pertenece la reserva."
+    )
+
+    objects = AssetReservationQuerySet.as_manager()
+
+    class Meta:
+        """Opciones de metadatos para el modelo."""
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'asset'], name='unique_event_asset_reservation'),
+        ]
+        indexes = [
+            # Disponibilidad de un activo: igualdad en activo y estado, rango sobre el fin.
+            # Las reservas históricas (ya terminadas) quedan fuera del rango escaneado.
+            models.Index(fields=['asset', 'status', 'end', 'start'], name='reservation_asset_overlap_idx'),
+            # Activos ocupados en un rango, sin filtrar por activo.
+            models.Index(fields=['status', 'end', 'start'], name='reservation_overlap_idx'),
+        ]
+
+    def __str__(self):
+        """Representación en cadena de la reserva."""
+        return f"{self.asset} → {self.event} ({self.start:%d/%m/%Y %H:%M})"
+
 class ChecklistItem(models.Model):
     """
     Representa un elemento de una lista de verificación asociada a un evento.
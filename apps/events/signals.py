@@ -0,0 +1,46 @@
+from django.db.models.signals import post_save, m2m_changed
+from .models import Evento, AssetReservation
+
+
+def sync_reservation_window(sender, instance, created, **kwargs):
+    """Copia las fechas y el estado del evento a sus reservas de activos."""
+    if created:
+        return
+    AssetReservation.objects.filter(event=instance).update(
+        start=instance.fecha_inicio, end=instance.fecha_fin, status=instance.status
+    )
+
+
+def sync_reserved_assets(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Refleja en `AssetReservation` los cambios de `Evento.reserved_assets`,
+    tanto desde el evento (`evento.reserved_assets`) como desde el activo
+    (`asset.events_reserved_for`).
+    """
+    if action == 'post_add' and pk_set:
+        if reverse:
+            events = Evento.objects.filter(pk__in=pk_set).only('fecha_inicio', 'fecha_fin', 'status')
+            reservations = [
+                AssetReservation(asset_id=instance.pk, event=event, start=event.fecha_inicio, end=event.fecha_fin, status=event.status)
+                for event in events
+            ]
+        else:
+            reservations = [
+                AssetReservation(asset_id=asset_id, event=instance, start=instance.fecha_inicio, end=instance.fecha_fin, status=instance.status)
+                for asset_id in pk_set
+            ]
+        AssetReservation.objects.bulk_create(reservations, ignore_conflicts=True)
+    elif action == 'post_remove' and pk_set:
+        if reverse:
+            AssetReservation.objects.filter(asset_id=instance.pk, event_id__in=pk_set).delete()
+        else:
+            AssetReservation.objects.filter(event_id=instance.pk, asset_id__in=pk_set).delete()
+    elif action == 'post_clear':
+        if reverse:
+            AssetReservation.objects.filter(asset_id=instance.pk).delete()
+        else:
+            AssetReservation.objects.filter(event_id=instance.pk).delete()
+
+
+post_save.connect(sync_reservation_window, sender=Evento, dispatch_uid='events_sync_reservation_window')
+m2m_changed.connect(sync_reserved_assets, sender=Evento.reserved_assets.through, dispatch_uid='events_sync_reserved_assets')
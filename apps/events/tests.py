@@ -1,3 +1,79 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.assets.models import Asset, AssetCategory
+from apps.assets.utils import activos_disponibles
+
+from .models import AssetReservation, Evento
+
+
+class ReservationSyncTests(TestCase):
+    """`AssetReservation` refleja `Evento.reserved_assets` y las fechas y el estado del evento."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = AssetCategory.objects.create(name="Proyectores")
+        cls.first = Asset.objects.create(name="Proyector 1", category=category, location="Aula 1")
+        cls.second = Asset.objects.create(name="Proyector 2", category=category, location="Aula 1")
+        cls.start = timezone.now() + timedelta(days=1)
+        cls.end = cls.start + timedelta(hours=2)
+
+    def setUp(self):
+        self.event = Evento.objects.create(titulo="Congreso", status='approved', fecha_inicio=self.start, fecha_fin=self.end)
+
+    def reservations(self):
+        return set(AssetReservation.objects.values_list('event_id', 'asset_id', 'start', 'end', 'status'))
+
+    def available(self, start=None, end=None):
+        return set(activos_disponibles(start or self.start, end or self.end).values_list('pk', flat=True))
+
+    def test_add_and_remove_from_event(self):
+        self.event.reserved_assets.add(self.first, self.second)
+        self.assertEqual(self.reservations(), {
+            (self.event.pk, self.first.pk, self.start, self.end, 'approved'),
+            (self.event.pk, self.second.pk, self.start, self.end, 'approved'),
+        })
+        self.assertEqual(self.available(), set())
+        self.assertFalse(Asset.objects.get(pk=self.first.pk).is_available(self.start, self.end))
+
+        self.event.reserved_assets.remove(self.first)
+        self.assertEqual(self.reservations(), {(self.event.pk, self.second.pk, self.start, self.end, 'approved')})
+        self.assertEqual(self.available(), {self.first.pk})
+        self.assertTrue(Asset.objects.get(pk=self.first.pk).is_available(self.start, self.end))
+
+    def test_add_remove_and_clear_from_asset(self):
+        other = Evento.objects.create(titulo="Taller", status='active', fecha_inicio=self.start, fecha_fin=self.end)
+        self.first.events_reserved_for.add(self.event, other)
+        self.assertEqual(AssetReservation.objects.filter(asset=self.first).count(), 2)
+
+        self.first.events_reserved_for.remove(self.event)
+        self.assertEqual(list(AssetReservation.objects.values_list('event_id', flat=True)), [other.pk])
+
+        self.first.events_reserved_for.clear()
+        self.assertEqual(self.reservations(), set())
+        self.assertEqual(self.available(), {self.first.pk, self.second.pk})
+
+    def test_clear_from_event(self):
+        self.event.reserved_assets.add(self.first, self.second)
+        self.event.reserved_assets.clear()
+        self.assertEqual(self.reservations(), set())
+        self.assertEqual(self.available(), {self.first.pk, self.second.pk})
+
+    def test_event_dates_and_status_are_copied(self):
+        self.event.reserved_assets.add(self.first)
+
+        # Mover el evento libera la ventana anterior y bloquea la nueva.
+        later_start, later_end = self.start + timedelta(days=7), self.end + timedelta(days=7)
+        self.event.fecha_inicio, self.event.fecha_fin = later_start, later_end
+        self.event.save()
+        self.assertEqual(self.reservations(), {(self.event.pk, self.first.pk, later_start, later_end, 'approved')})
+        self.assertIn(self.first.pk, self.available())
+        self.assertNotIn(self.first.pk, self.available(later_start, later_end))
 
-# Create your tests here.
+        # Un evento rechazado deja de bloquear el activo.
+        self.event.status = 'rejected'
+        self.event.save()
+        self.assertEqual(AssetReservation.objects.get().status, 'rejected')
+        self.assertIn(self.first.pk, self.available(later_start, later_end))
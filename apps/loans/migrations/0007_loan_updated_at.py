@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0006_loan_loan_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Fecha y hora de la última modificación del préstamo.'),
+            preserve_default=False,
+        ),
+    ]
@@ -1,8 +1,33 @@
 from django.conf import settings
 from django.utils import timezone
 from django.db import models
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
 from datetime import datetime
 
+class LoanQuerySet(models.QuerySet):
+    """
+    QuerySet de préstamos con consultas de vencimiento resueltas en la base de datos.
+    """
+
+    def overdue(self, now=None):
+        """
+        Préstamos activos cuya fecha de vencimiento ya pasó, del más antiguo al más reciente.
+
+        Usa el índice compuesto (status, due_date) y anota `overdue_for`, el tiempo
+        transcurrido desde el vencimiento (ver `Loan.days_overdue`).
+
+        Args:
+            now (datetime, optional): Instante de referencia. Por defecto, `timezone.now()`.
+        """
+        if now is None:
+            now = timezone.now()
+        return self.filter(status='Activo', due_date__lt=now).annotate(
+            overdue_for=ExpressionWrapper(
+                Value(now, output_field=DateTimeField()) - F('due_date'),
+                output_field=DurationField(),
+            )
+        ).order_by('due_date')
+
 class Loan(models.Model):
     """
     Representa un préstamo de un activo a un usuario.
@@ -41,6 +66,19 @@ class Loan(models.Model):
         ],
         help_text="Estado actual del préstamo (Activo o Devuelto)."
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Fecha y hora de la última modificación del préstamo."
+    )
+
+    objects = LoanQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='loan_status_due_date_idx'),
+            # Clave de paginación por cursor del listado de préstamos.
+            models.Index(fields=['loan_date', 'id'], name='loan_loan_date_id_idx'),
+        ]
 
     def __str__(self):
         """Devuelve una representación en string del préstamo."""
@@ -53,4 +91,21 @@ class Loan(models.Model):
         Un préstamo está vencido si su estado es 'Activo' y la fecha de vencimiento
         es anterior a la fecha y hora actuales.
         """
-        return self.status == 'Activo' and self.due_date < timezone.now()
\ No newline at end of file
+        return self.status == 'Activo' and self.due_date < timezone.now()
+
+    @property
+    def days_overdue(self):
+        """
+        Días naturales de retraso del préstamo: diferencia entre la fecha actual y la
+        de vencimiento (un préstamo que venció ayer a las 18:00 lleva 1 día de retraso).
+        Con la anotación `overdue_for` de `Loan.objects.overdue()` se usa el mismo
+        instante de referencia que en la consulta.
+        """
+        overdue_for = getattr(self, 'overdue_for', None)
+        if overdue_for is None:
+            if not self.is_overdue:
+                return 0
+            now = timezone.now()
+        else:
+            now = self.due_date + overdue_for
+        return (now.date() - self.due_date.date()).days
@@ -1,3 +1,58 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.assets.models import Asset, AssetCategory
+
+from .models import Loan
+
+
+class LoanTablePaginationTests(TestCase):
+    """Paginación por cursor del endpoint de la tabla de préstamos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="prestatario", password="x")
+        category = AssetCategory.objects.create(name="Portátiles")
+        asset = Asset.objects.create(name="Portátil", category=category, location="Sala 1")
+        now = timezone.now()
+        # Préstamos activos (sin fecha de devolución) mezclados con devueltos.
+        cls.returned = [
+            Loan.objects.create(asset=asset, user=cls.user, status="Devuelto", return_date=now - timedelta(days=days))
+            for days in (3, 1, 2)
+        ]
+        cls.active = [Loan.objects.create(asset=asset, user=cls.user, status="Activo") for _ in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def pages(self, direction, length=2):
+        """Recorre todas las páginas ordenadas por fecha de devolución siguiendo `next_cursor`."""
+        ids, start, after = [], 0, None
+        while True:
+            params = {'start': start, 'length': length, 'order[0][column]': 4, 'order[0][dir]': direction}
+            if after:
+                params['after'] = after
+            data = self.client.get(reverse('loan_list_data'), params).json()
+            ids.extend(row['id'] for row in data['data'])
+            if len(data['data']) < length:
+                return ids
+            start, after = start + length, data['next_cursor']
+
+    def test_pages_include_null_return_dates(self):
+        returned = [loan.pk for loan in sorted(self.returned, key=lambda loan: loan.return_date)]
+        active = sorted(loan.pk for loan in self.active)
+        # Los préstamos sin devolver van primero en orden ascendente y al final en descendente.
+        self.assertEqual(self.pages('asc'), active + returned)
+        self.assertEqual(self.pages('desc'), returned[::-1] + active[::-1])
 
-# Create your tests here.
+    def test_cursor_is_used_after_non_null_value(self):
+        data = self.client.get(reverse('loan_list_data'), {'length': 4, 'order[0][column]': 4, 'order[0][dir]': 'asc'}).json()
+        self.assertIsNotNone(data['next_cursor'])
+        rest = self.client.get(reverse('loan_list_data'), {
+            'start': 4, 'length': 4, 'order[0][column]': 4, 'order[0][dir]': 'asc', 'after': data['next_cursor'],
+        }).json()
+        self.assertEqual(len(rest['data']), 2)
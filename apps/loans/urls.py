@@ -1,12 +1,13 @@
 """
 Define las rutas URL para la aplicación de gestión de préstamos, incluyendo
-listado, creación, edición, eliminación y devolución de préstamos.
+listado (y su endpoint JSON paginado), creación, edición, eliminación y devolución de préstamos.
 """
 from django.urls import path
 from . import views
 
 urlpatterns = [
     path("", views.loan_list, name="loan_list"),
+    path("data/", views.loan_list_data, name="loan_list_data"), # JSON para DataTables en modo servidor
     path("nuevo/", views.loan_create, name="loan_create"),
     path("<int:pk>/editar/", views.loan_edit, name="loan_edit"),
     path("<int:pk>/eliminar/", views.loan_delete, name="loan_delete"),
@@ -1,48 +1,114 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from .models import Loan
+from django.db import transaction
 from django.utils import timezone # Import timezone
 from .forms import LoanForm, LoanEditForm
 from apps.accounts.decorators import groups_required
+from apps.accounts.roles import in_groups
+from apps.assets.journal import CAUSE_LOAN_CREATE, CAUSE_LOAN_DELETE, CAUSE_LOAN_EDIT, CAUSE_LOAN_RETURN
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils.formats import date_format
+from core.datatables import datatables_response
+
+def _loan_reference_time():
+    """
+    Instante de referencia para los vencimientos, truncado al minuto.
+    Mantiene la consulta estable entre páginas para que el cursor siga siendo válido.
+    """
+    return timezone.now().replace(second=0, microsecond=0)
+
+def _is_admin_or_staff(user):
+    """Indica si el usuario puede registrar devoluciones."""
+    return user.is_superuser or in_groups(user, 'Admin', 'Staff')
 
 @login_required
 def loan_list(request):
     """
-    Muestra una lista de todos los préstamos, con opciones de filtrado por estado.
-    Calcula y muestra métricas generales sobre los préstamos.
+    Muestra la página de préstamos, con opciones de filtrado por estado.
+    Calcula las métricas generales en una sola consulta agrupada; las filas de
+    las tablas se cargan paginadas desde `loan_list_data`.
     """
-    all_loans = Loan.objects.select_related("asset", "user").all()
+    prestamos = Loan.objects.all()
 
     # Obtener parámetros de filtrado de la solicitud GET.
     status_query = request.GET.get('status', '')
 
     # Aplicar filtro de estado si se proporciona.
     if status_query:
-        all_loans = all_loans.filter(status=status_query)
+        prestamos = prestamos.filter(status=status_query)
 
-    prestamos = all_loans
-    overdue_loans = [loan for loan in prestamos if loan.is_overdue]
-
-    # Calcular métricas para las tarjetas.
-    total_loans = prestamos.count()
-    active_loans = prestamos.filter(status="Activo").count()
-    returned_loans = prestamos.filter(status="Devuelto").count()
-
-    is_admin_or_staff = request.user.is_superuser or request.user.groups.filter(name__in=['Admin', 'Staff']).exists()
+    # Calcular métricas para las tarjetas en una sola consulta.
+    counters = prestamos.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status="Activo")),
+        returned=Count('id', filter=Q(status="Devuelto")),
+        overdue=Count('id', filter=Q(status="Activo", due_date__lt=timezone.now())),
+    )
 
     context = {
-        "prestamos": prestamos,
-        "overdue_loans": overdue_loans,
         "status_query": status_query,
-        "total_loans": total_loans,
-        "active_loans": active_loans,
-        "returned_loans": returned_loans,
+        "total_loans": counters['total'],
+        "active_loans": counters['active'],
+        "returned_loans": counters['returned'],
+        "overdue_count": counters['overdue'],
         "loan_statuses": Loan._meta.get_field('status').choices,
-        "is_admin_or_staff": is_admin_or_staff,
-        "now": timezone.now(), # Pass timezone.now() to the template context
     }
     return render(request, "loans/loan_list.html", context)
 
+# Campo ORM de cada columna de las tablas de préstamos (None = no ordenable).
+LOAN_TABLE_COLUMNS = ['id', 'asset__name', 'user__username', 'loan_date', 'return_date', 'status', None]
+OVERDUE_TABLE_COLUMNS = ['id', 'asset__name', 'user__username', 'loan_date', 'due_date', 'due_date', None]
+
+@login_required
+def loan_list_data(request):
+    """
+    Endpoint JSON para las tablas de préstamos en modo servidor de DataTables.
+
+    Por defecto ordena por (loan_date, id) descendente y pagina por cursor sobre
+    esa clave. Con `overdue=1` devuelve solo los préstamos vencidos, ordenados
+    por fecha de vencimiento.
+    """
+    base_loans = Loan.objects.select_related("asset", "user").only(
+        'id', 'loan_date', 'due_date', 'return_date', 'status', 'asset__name', 'user__username'
+    )
+    loans = base_loans
+
+    status_query = request.GET.get('status', '')
+    if status_query:
+        loans = loans.filter(status=status_query)
+
+    overdue = request.GET.get('overdue') == '1'
+    if overdue:
+        loans = loans.overdue(now=_loan_reference_time())
+        columns, default_order = OVERDUE_TABLE_COLUMNS, ('due_date', 'asc')
+    else:
+        columns, default_order = LOAN_TABLE_COLUMNS, ('loan_date', 'desc')
+
+    search_value = request.GET.get('search[value]', '').strip()
+    if search_value:
+        loans = loans.filter(Q(asset__name__icontains=search_value) | Q(user__username__icontains=search_value))
+
+    can_return = _is_admin_or_staff(request.user)
+
+    def serialize(loan):
+        return {
+            'id': loan.id,
+            'asset': loan.asset.name,
+            'user': loan.user.username,
+            'loan_date': date_format(timezone.localtime(loan.loan_date), 'd/m/Y'),
+            'due_date': date_format(timezone.localtime(loan.due_date), 'd/m/Y'),
+            'return_date': date_format(timezone.localtime(loan.return_date), 'd/m/Y') if loan.return_date else None,
+            'status': loan.status,
+            'days_overdue': loan.days_overdue,
+            'return_url': reverse('loan_return', args=[loan.id]) if can_return and loan.status == 'Activo' else None,
+            'edit_url': reverse('loan_edit', args=[loan.id]),
+            'delete_url': reverse('loan_delete', args=[loan.id]),
+        }
+
+    return datatables_response(request, base_loans, loans, columns, serialize, default_order=default_order)
+
 @groups_required(['Admin', 'Staff'])
 def loan_create(request):
     """
@@ -54,12 +120,10 @@ def loan_create(request):
             loan = form.save(commit=False)
             loan.status = "Activo"
             
-            # Actualizar el estado del activo a 'en_uso'
-            asset = loan.asset
-            asset.status = 'en_uso'
-            asset.save()
-            
-            loan.save()
+            with transaction.atomic():
+                # Actualizar el estado del activo a 'en_uso'
+                loan.asset.set_status('en_uso', CAUSE_LOAN_CREATE)
+                loan.save()
             return redirect("loan_list")
     else:
         form = LoanForm()
@@ -79,16 +143,15 @@ def loan_edit(request, pk):
         if form.is_valid():
             updated_loan = form.save(commit=False)
 
-            # Si el activo ha cambiado
-            if original_asset != updated_loan.asset:
-                # El activo original vuelve a estar disponible
-                original_asset.status = 'disponible'
-                original_asset.save()
-                # El nuevo activo se marca como en uso
-                updated_loan.asset.status = 'en_uso'
-                updated_loan.asset.save()
-            
-            updated_loan.save()
+            with transaction.atomic():
+                # Si el activo ha cambiado
+                if original_asset != updated_loan.asset:
+                    # El activo original vuelve a estar disponible
+                    original_asset.set_status('disponible', CAUSE_LOAN_EDIT)
+                    # El nuevo activo se marca como en uso
+                    updated_loan.asset.set_status('en_uso', CAUSE_LOAN_EDIT)
+
+                updated_loan.save()
             return redirect("loan_list")
     else:
         form = LoanEditForm(instance=loan)
@@ -104,12 +167,10 @@ def loan_return(request, pk):
     loan.status = 'Devuelto'
     loan.return_date = timezone.now()
     
-    # Actualizar el estado del activo a 'disponible'
-    asset = loan.asset
-    asset.status = 'disponible'
-    asset.save()
-    
-    loan.save()
+    with transaction.atomic():
+        # Actualizar el estado del activo a 'disponible'
+        loan.asset.set_status('disponible', CAUSE_LOAN_RETURN)
+        loan.save()
     return redirect("loan_list")
 
 @groups_required(['Admin', 'Staff'])
@@ -123,12 +184,12 @@ def loan_delete(request, pk):
         asset = loan.asset
         is_active_loan = loan.status == 'Activo'
 
-        loan.delete()
+        with transaction.atomic():
+            loan.delete()
+
+            if is_active_loan:
+                # Si el préstamo estaba activo, el activo vuelve a estar disponible
+                asset.set_status('disponible', CAUSE_LOAN_DELETE)
 
-        if is_active_loan:
-            # Si el préstamo estaba activo, el activo vuelve a estar disponible
-            asset.status = 'disponible'
-            asset.save()
-            
         return redirect("loan_list")
     return render(request, "loans/loan_confirm_delete.html", {"prestamo": loan})
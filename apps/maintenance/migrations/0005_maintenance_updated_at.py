@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0004_remove_maintenance_maintenance_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenance',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -20,6 +20,7 @@ class Maintenance(models.Model):
     completed_date = models.DateField(null=True, blank=True)
     performed_by = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(default=timezone.now) 
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """Devuelve una representación en string del mantenimiento."""
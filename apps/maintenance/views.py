@@ -1,8 +1,10 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.db import transaction
 from django.contrib.auth.decorators import login_required
 from .models import Maintenance
 from .forms import MaintenanceForm
 from apps.assets.models import Asset
+from apps.assets.journal import CAUSE_MAINTENANCE_CREATE, CAUSE_MAINTENANCE_DELETE, CAUSE_MAINTENANCE_EDIT
 from apps.accounts.decorators import groups_required
 
 @login_required
@@ -47,12 +49,10 @@ def maintenance_create(request):
         if form.is_valid():
             maintenance = form.save(commit=False)
             
-            # Actualizar el estado del activo a 'mantenimiento'
-            asset = maintenance.asset
-            asset.status = 'mantenimiento'
-            asset.save()
-            
-            maintenance.save()
+            with transaction.atomic():
+                # Actualizar el estado del activo a 'mantenimiento'
+                maintenance.asset.set_status('mantenimiento', CAUSE_MAINTENANCE_CREATE)
+                maintenance.save()
             return redirect("maintenance_list")
     else:
         form = MaintenanceForm()
@@ -72,13 +72,12 @@ def maintenance_edit(request, pk):
         if form.is_valid():
             updated_maintenance = form.save(commit=False)
             
-            # Si el estado de mantenimiento ha cambiado a 'Finalizado'
-            if original_status != 'Finalizado' and updated_maintenance.status == 'Finalizado':
-                asset = updated_maintenance.asset
-                asset.status = 'disponible'
-                asset.save()
-            
-            updated_maintenance.save()
+            with transaction.atomic():
+                # Si el estado de mantenimiento ha cambiado a 'Finalizado'
+                if original_status != 'Finalizado' and updated_maintenance.status == 'Finalizado':
+                    updated_maintenance.asset.set_status('disponible', CAUSE_MAINTENANCE_EDIT)
+
+                updated_maintenance.save()
             return redirect("maintenance_list")
     else:
         form = MaintenanceForm(instance=maintenance)
@@ -93,11 +92,11 @@ def maintenance_delete(request, pk):
     maintenance = get_object_or_404(Maintenance, pk=pk)
     if request.method == "POST":
         asset = maintenance.asset
-        maintenance.delete()
-        
-        # El activo vuelve a estar disponible
-        asset.status = 'disponible'
-        asset.save()
-        
+        with transaction.atomic():
+            maintenance.delete()
+
+            # El activo vuelve a estar disponible
+            asset.set_status('disponible', CAUSE_MAINTENANCE_DELETE)
+
         return redirect("maintenance_list")
     return render(request, "maintenance/maintenance_confirm_delete.html", {"mantenimiento": maintenance})
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ReportJob
 
-# Register your models here.
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('report', 'status', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'report')
+    search_fields = ('report', 'requested_by__username')
+    readonly_fields = ('params_hash', 'started_at', 'finished_at', 'artifact', 'error')
@@ -0,0 +1,141 @@
+"""
+Caché de reportes direccionada por contenido.
+
+Cada descarga se identifica con una huella (ETag) calculada a partir del nombre del
+reporte, sus parámetros GET y un sello de versión de los datos: para cada tabla
+involucrada, el número de filas, el id máximo y la fecha de modificación más
+reciente. Las tablas sin fecha de modificación (categorías, usuarios) usan en su
+lugar una marca que se renueva al guardarlas o borrarlas (ver
+`apps.reports.signals`). Si ninguna fila cambió, la huella es la misma y:
+
+- si el navegador ya tiene esa versión (`If-None-Match`), se responde 304;
+- si no, el fichero se sirve desde disco sin volver a generarlo.
+
+Los ficheros se guardan en `REPORT_ARTIFACTS_ROOT/cache/<reporte>/<huella>` y se
+purgan cuando llevan más de `REPORT_CACHE_TTL` segundos sin regenerarse.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+def _cache_dir(report):
+    return os.path.join(settings.REPORT_ARTIFACTS_ROOT, 'cache', report)
+
+
+def _changed_key(model):
+    return f'reports:cache:changed:{model._meta.label}'
+
+
+def mark_changed(model):
+    """Renueva la marca de cambio de una tabla sin fecha de modificación."""
+    cache.set(_changed_key(model), time.time_ns(), None)
+
+
+def data_version(sources):
+    """
+    Sello de versión de las tablas de un reporte.
+
+    Args:
+        sources (tuple): Modelos o tuplas (modelo, campo de fecha de modificación).
+
+    Returns:
+        list: Por tabla, [filas, id máximo, última modificación o marca de cambio].
+    """
+    version = []
+    for source in sources:
+        model, timestamp_field = source if isinstance(source, tuple) else (source, None)
+        aggregates = {'rows': Count('pk'), 'max_pk': Max('pk')}
+        if timestamp_field:
+            aggregates['modified'] = Max(timestamp_field)
+        stamp = model._default_manager.aggregate(**aggregates)
+        modified = stamp['modified'] if timestamp_field else cache.get(_changed_key(model))
+        version.append([model._meta.label, stamp['rows'], stamp['max_pk'], str(modified)])
+    return version
+
+
+def report_etag(report, params, sources):
+    """Huella del reporte para unos parámetros y la versión actual de sus datos."""
+    payload = json.dumps([report, sorted(params.lists()), data_version(sources)], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _prune(directory, max_age):
+    """Borra las versiones antiguas de un reporte."""
+    cutoff = time.time() - max_age
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+
+def _store(response, path):
+    """Escribe el cuerpo de la respuesta en `path` de forma atómica."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as output:
+        chunks = response.streaming_content if response.streaming else [response.content]
+        for chunk in chunks:
+            output.write(chunk)
+    os.replace(output.name, path)
+
+
+def cached_report(*sources):
+    """
+    Decorador para vistas de descarga de reportes que cachea el fichero generado.
+
+    El nombre del reporte es el de la vista. Solo se cachean las respuestas 200;
+    cualquier otra se devuelve tal cual.
+
+    Args:
+        *sources: Modelos cuyas tablas alimentan el reporte, o tuplas
+            (modelo, campo de fecha de modificación).
+    """
+    def decorator(view_func):
+        report = view_func.__name__
+
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            etag = f'"{report_etag(report, request.GET, sources)}"'
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                patch_cache_control(not_modified, private=True, no_cache=True)
+                return not_modified
+
+            path = os.path.join(_cache_dir(report), etag.strip('"'))
+            meta_key = f'reports:cache:{report}:{etag}'
+            meta = cache.get(meta_key)
+            if meta is None or not os.path.exists(path):
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                try:
+                    _store(response, path)
+                finally:
+                    response.close()
+                meta = {
+                    'content_type': response.get('Content-Type'),
+                    'content_disposition': response.get('Content-Disposition', ''),
+                }
+                ttl = getattr(settings, 'REPORT_CACHE_TTL', 86400)
+                cache.set(meta_key, meta, ttl)
+                _prune(_cache_dir(report), ttl)
+
+            cached = FileResponse(open(path, 'rb'), content_type=meta['content_type'])
+            if meta['content_disposition']:
+                cached['Content-Disposition'] = meta['content_disposition']
+            cached['ETag'] = etag
+            patch_cache_control(cached, private=True, no_cache=True)
+            return cached
+        return _wrapped
+    return decorator
@@ -0,0 +1,97 @@
+"""
+Exportación de reportes en CSV y Excel con memoria constante.
+
+Las vistas describen cada reporte como una lista de hojas `(título, cabecera, filas)`,
+donde `filas` es un iterable perezoso (normalmente un generador sobre
+`queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)`). Según el parámetro `format`
+de la petición se genera:
+
+- CSV: un `StreamingHttpResponse` que escribe cada fila a medida que se lee
+  de la base de datos.
+- XLSX: un libro de openpyxl en modo `write_only`, que vuelca las filas a disco
+  en lugar de mantenerlas en memoria; el fichero resultante se envía por
+  bloques con `FileResponse`.
+"""
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment
+
+EXPORT_CHUNK_SIZE = 2000
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _Echo:
+    """Pseudo-fichero para `csv.writer`: devuelve la línea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(sheets):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel detecte la codificación UTF-8.
+    yield '\ufeff'
+    for index, (title, header, rows) in enumerate(sheets):
+        if len(sheets) > 1:
+            if index:
+                yield writer.writerow([])
+            yield writer.writerow([title])
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+
+def stream_csv(filename, sheets):
+    """
+    Respuesta CSV en streaming. Si hay varias hojas, se escriben una tras otra
+    precedidas por su título.
+    """
+    response = StreamingHttpResponse(_csv_lines(sheets), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def _header_cells(ws, header):
+    cells = []
+    for value in header:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+        cells.append(cell)
+    return cells
+
+
+def stream_xlsx(filename, sheets):
+    """
+    Respuesta XLSX generada con un libro de solo escritura sobre un fichero temporal.
+    """
+    wb = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title=title)
+        ws.append(_header_cells(ws, header))
+        for row in rows:
+            ws.append(row)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    # FileResponse lee y envía el fichero por bloques y lo cierra al terminar.
+    return FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(request, filename, sheets):
+    """
+    Devuelve el reporte en CSV si la petición lleva `format=csv`, o en XLSX en otro caso.
+
+    Args:
+        request (HttpRequest): Petición del usuario.
+        filename (str): Nombre del fichero sin extensión.
+        sheets (list): Tuplas (título, cabecera, filas) con las filas como iterable perezoso.
+    """
+    if request.GET.get('format') == 'csv':
+        return stream_csv(filename, sheets)
+    return stream_xlsx(filename, sheets)
@@ -0,0 +1,167 @@
+"""
+Cola de reportes en segundo plano.
+
+Las vistas encolan un `ReportJob` con `enqueue_report_job` y devuelven el control
+de inmediato; el comando `process_report_jobs` reclama los trabajos pendientes,
+ejecuta la vista del reporte con los parámetros y el usuario del trabajo, y guarda
+la respuesta en disco. El reporte se genera con exactamente el mismo código que
+la descarga directa, incluidas sus comprobaciones de permisos.
+"""
+import hashlib
+import json
+import re
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files import File
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .models import ReportJob
+
+# Reportes descargables que se pueden generar en segundo plano (nombres de URL de `reports`).
+BACKGROUND_REPORTS = (
+    'general_assets_report_pdf',
+    'general_assets_report_excel',
+    'loan_report_pdf',
+    'loan_report_excel',
+    'maintenance_report_pdf',
+    'maintenance_report_excel',
+    'events_general_report_pdf',
+    'events_general_report_excel',
+    'events_by_date_pdf',
+    'events_by_date_excel',
+)
+
+_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+
+
+def _params_hash(report, params):
+    payload = json.dumps([report, params], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_report_job(report, params, user):
+    """
+    Encola la generación de un reporte, reutilizando un trabajo idéntico si existe.
+
+    Se reutiliza un trabajo con el mismo reporte y parámetros que esté pendiente,
+    en proceso o terminado hace menos de `REPORT_JOB_REUSE_SECONDS`.
+
+    Args:
+        report (str): Nombre de URL del reporte, uno de `BACKGROUND_REPORTS`.
+        params (dict): Parámetros GET del reporte; se ignoran los vacíos.
+        user (User): Usuario que lo solicita.
+
+    Returns:
+        tuple: (ReportJob, bool) con el trabajo y si se ha creado uno nuevo.
+
+    Raises:
+        ValueError: Si el reporte no se puede generar en segundo plano.
+    """
+    if report not in BACKGROUND_REPORTS:
+        raise ValueError(f"El reporte '{report}' no se puede generar en segundo plano.")
+    params = {key: value for key, value in sorted(params.items()) if value not in (None, '')}
+    params_hash = _params_hash(report, params)
+
+    reuse_since = timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_JOB_REUSE_SECONDS', 300))
+    existing = (ReportJob.objects
+                .filter(params_hash=params_hash, status__in=[ReportJob.STATUS_PENDING, ReportJob.STATUS_RUNNING])
+                .first())
+    if existing is None:
+        existing = (ReportJob.objects
+                    .filter(params_hash=params_hash, status=ReportJob.STATUS_DONE, finished_at__gte=reuse_since)
+                    .exclude(artifact='')
+                    .order_by('-finished_at')
+                    .first())
+    if existing is not None and (existing.status != ReportJob.STATUS_DONE or existing.artifact.storage.exists(existing.artifact.name)):
+        return existing, False
+
+    job = ReportJob.objects.create(report=report, params=params, params_hash=params_hash, requested_by=user)
+    return job, True
+
+
+def requeue_stale_jobs():
+    """Devuelve a la cola los trabajos 'running' que superaron `REPORT_JOB_TIMEOUT`."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_JOB_TIMEOUT', 1800))
+    return (ReportJob.objects
+            .filter(status=ReportJob.STATUS_RUNNING, started_at__lt=cutoff)
+            .update(status=ReportJob.STATUS_PENDING, started_at=None))
+
+
+def claim_next_job():
+    """
+    Reclama el trabajo pendiente más antiguo.
+
+    El paso de 'pending' a 'running' es un UPDATE condicional, de modo que varios
+    trabajadores pueden compartir la cola sin procesar dos veces el mismo trabajo.
+
+    Returns:
+        ReportJob | None: El trabajo reclamado, o None si la cola está vacía.
+    """
+    pending = (ReportJob.objects
+               .filter(status=ReportJob.STATUS_PENDING)
+               .order_by('created_at')
+               .values_list('pk', flat=True)[:10])
+    for pk in pending:
+        claimed = (ReportJob.objects
+                   .filter(pk=pk, status=ReportJob.STATUS_PENDING)
+                   .update(status=ReportJob.STATUS_RUNNING, started_at=timezone.now()))
+        if claimed:
+            return ReportJob.objects.get(pk=pk)
+    return None
+
+
+def _build_request(job):
+    """Petición GET equivalente a la descarga directa del reporte."""
+    path = reverse(f'reports:{job.report}')
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.GET = QueryDict(mutable=True)
+    for key, value in job.params.items():
+        request.GET[key] = value
+    request.user = job.requested_by or AnonymousUser()
+    return request, resolve(path).func
+
+
+def run_job(job):
+    """
+    Genera el reporte de un trabajo reclamado y guarda el fichero en disco.
+
+    Marca el trabajo como 'done' o, si la vista no devuelve un 200 o lanza una
+    excepción, como 'failed' con el mensaje de error.
+    """
+    try:
+        request, view = _build_request(job)
+        response = view(request)
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"La vista del reporte respondió con el estado {response.status_code}.")
+            match = _FILENAME_RE.search(response.get('Content-Disposition', ''))
+            filename = match.group(1) if match else job.report
+            with tempfile.TemporaryFile() as output:
+                chunks = response.streaming_content if response.streaming else [response.content]
+                for chunk in chunks:
+                    output.write(chunk)
+                output.seek(0)
+                job.artifact.save(f'{job.pk}-{filename}', File(output), save=False)
+        finally:
+            response.close()
+    except Exception as exc:
+        job.status = ReportJob.STATUS_FAILED
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    job.filename = filename
+    job.content_type = response.get('Content-Type', 'application/octet-stream')
+    job.status = ReportJob.STATUS_DONE
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['artifact', 'filename', 'content_type', 'status', 'error', 'finished_at'])
+    return job
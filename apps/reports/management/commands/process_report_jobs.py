@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reports.jobs import claim_next_job, requeue_stale_jobs, run_job
+from apps.reports.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = '''Worker process that generates queued background reports (ReportJob) and stores them on disk.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the pending jobs and exit instead of polling.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait between polls when the queue is empty.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Report worker started.'))
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'  - {requeued} stale jobs returned to the queue.'))
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'  - Generating {job}...')
+            job = run_job(job)
+            if job.status == ReportJob.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(f'    done: {job.artifact.name}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'    failed: {job.error}'))
+
+        self.stdout.write(self.style.SUCCESS('Report worker finished.'))
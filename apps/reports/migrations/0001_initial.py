@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:15
+
+import apps.reports.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report', models.CharField(help_text="Nombre de la URL del reporte (sin el namespace 'reports').", max_length=100)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Parámetros GET con los que se genera el reporte.')),
+                ('params_hash', models.CharField(db_index=True, help_text='Huella SHA-256 del reporte y sus parámetros, para de-duplicar trabajos.', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Completado'), ('failed', 'Fallido')], default='pending', help_text='Estado del trabajo.', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Fecha y hora de la solicitud.')),
+                ('started_at', models.DateTimeField(blank=True, help_text='Fecha y hora en que el trabajador empezó a generarlo.', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, help_text='Fecha y hora en que terminó la generación.', null=True)),
+                ('artifact', models.FileField(blank=True, help_text='Fichero generado.', storage=apps.reports.models.report_artifact_storage, upload_to='%Y/%m/')),
+                ('filename', models.CharField(blank=True, help_text='Nombre con el que se descarga el fichero.', max_length=255)),
+                ('content_type', models.CharField(blank=True, help_text='Tipo MIME del fichero generado.', max_length=100)),
+                ('error', models.TextField(blank=True, help_text='Mensaje de error si la generación falló.')),
+                ('requested_by', models.ForeignKey(blank=True, help_text='Usuario que solicitó el reporte; el reporte se genera con sus permisos.', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reportjob_status_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0013_assetstatustransition_assetjournalcursor'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_day', models.DateField(blank=True, help_text='Último día completo resumido.', null=True)),
+                ('synced_at', models.DateTimeField(blank=True, help_text='Inicio de la última construcción.', null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssetDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Día (zona horaria del proyecto).')),
+                ('loan_hours', models.FloatField(default=0, help_text='Horas prestado.')),
+                ('maintenance_hours', models.FloatField(default=0, help_text='Horas en mantenimiento.')),
+                ('reserved_hours', models.FloatField(default=0, help_text='Horas reservado por eventos aprobados o activos.')),
+                ('idle_hours', models.FloatField(default=24, help_text='Horas sin préstamo, mantenimiento ni reserva.')),
+                ('asset', models.ForeignKey(help_text='Activo.', on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='assets.asset')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='asset_daily_usage_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('asset', 'day'), name='unique_asset_daily_usage')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Día (zona horaria del proyecto).')),
+                ('assets', models.PositiveIntegerField(default=0, help_text='Activos de la categoría que existían ese día.')),
+                ('loan_hours', models.FloatField(default=0, help_text='Horas prestado.')),
+                ('maintenance_hours', models.FloatField(default=0, help_text='Horas en mantenimiento.')),
+                ('reserved_hours', models.FloatField(default=0, help_text='Horas reservado por eventos aprobados o activos.')),
+                ('idle_hours', models.FloatField(default=0, help_text='Horas sin préstamo, mantenimiento ni reserva.')),
+                ('category', models.ForeignKey(help_text='Categoría.', on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='assets.assetcategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='category_daily_usage_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('category', 'day'), name='unique_category_daily_usage')],
+            },
+        ),
+    ]
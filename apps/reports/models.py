@@ -1,3 +1,173 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+def report_artifact_storage():
+    """Almacenamiento privado de los ficheros generados (se sirven a través de una vista)."""
+    return FileSystemStorage(location=settings.REPORT_ARTIFACTS_ROOT)
+
+
+class ReportJob(models.Model):
+    """
+    Solicitud de generación de un reporte en segundo plano.
+
+    El trabajador `process_report_jobs` genera el reporte fuera de los workers web
+    y guarda el fichero resultante en disco. Las solicitudes con el mismo reporte
+    y los mismos parámetros comparten `params_hash`, lo que permite reutilizar un
+    trabajo pendiente o recién terminado en lugar de repetir la generación.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_DONE, 'Completado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+
+    report = models.CharField(
+        max_length=100,
+        help_text="Nombre de la URL del reporte (sin el namespace 'reports')."
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Parámetros GET con los que se genera el reporte."
+    )
+    params_hash = models.CharField(
+        max_length=64,
+        db_index=True,
+        help_text="Huella SHA-256 del reporte y sus parámetros, para de-duplicar trabajos."
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        help_text="Estado del trabajo."
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="Usuario que solicitó el reporte; el reporte se genera con sus permisos."
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Fecha y hora de la solicitud."
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fecha y hora en que el trabajador empezó a generarlo."
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fecha y hora en que terminó la generación."
+    )
+    artifact = models.FileField(
+        upload_to='%Y/%m/',
+        storage=report_artifact_storage,
+        blank=True,
+        help_text="Fichero generado."
+    )
+    filename = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Nombre con el que se descarga el fichero."
+    )
+    content_type = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Tipo MIME del fichero generado."
+    )
+    error = models.TextField(
+        blank=True,
+        help_text="Mensaje de error si la generación falló."
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='reportjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        """Representación en cadena del trabajo."""
+        return f"{self.report} #{self.pk} ({self.get_status_display()})"
+
+
+class AssetDailyUsage(models.Model):
+    """
+    Horas de un día que un activo pasó prestado, en mantenimiento, reservado por
+    un evento y ocioso (sin ninguna de las tres). Solo hay fila para los días con
+    alguna actividad: un día sin fila es un día ocioso completo.
+
+    La mantiene `python manage.py build_usage_rollups` (ver apps.reports.rollups).
+    """
+    asset = models.ForeignKey(
+        'assets.Asset',
+        on_delete=models.CASCADE,
+        related_name='daily_usage',
+        help_text="Activo."
+    )
+    day = models.DateField(help_text="Día (zona horaria del proyecto).")
+    loan_hours = models.FloatField(default=0, help_text="Horas prestado.")
+    maintenance_hours = models.FloatField(default=0, help_text="Horas en mantenimiento.")
+    reserved_hours = models.FloatField(default=0, help_text="Horas reservado por eventos aprobados o activos.")
+    idle_hours = models.FloatField(default=24, help_text="Horas sin préstamo, mantenimiento ni reserva.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['asset', 'day'], name='unique_asset_daily_usage'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='asset_daily_usage_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asset_id} {self.day}"
+
+
+class CategoryDailyUsage(models.Model):
+    """
+    Suma por categoría y día de `AssetDailyUsage`, incluidas las horas ociosas de
+    los activos sin actividad ese día. Los activos cuentan en su categoría actual.
+    """
+    category = models.ForeignKey(
+        'assets.AssetCategory',
+        on_delete=models.CASCADE,
+        related_name='daily_usage',
+        help_text="Categoría."
+    )
+    day = models.DateField(help_text="Día (zona horaria del proyecto).")
+    assets = models.PositiveIntegerField(default=0, help_text="Activos de la categoría que existían ese día.")
+    loan_hours = models.FloatField(default=0, help_text="Horas prestado.")
+    maintenance_hours = models.FloatField(default=0, help_text="Horas en mantenimiento.")
+    reserved_hours = models.FloatField(default=0, help_text="Horas reservado por eventos aprobados o activos.")
+    idle_hours = models.FloatField(default=0, help_text="Horas sin préstamo, mantenimiento ni reserva.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'day'], name='unique_category_daily_usage'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='category_daily_usage_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.day}"
+
+
+class UsageRollupState(models.Model):
+    """Hasta qué día están construidos los resúmenes de uso y cuándo se construyeron."""
+    last_day = models.DateField(null=True, blank=True, help_text="Último día completo resumido.")
+    synced_at = models.DateTimeField(null=True, blank=True, help_text="Inicio de la última construcción.")
+
+    def __str__(self):
+        return f"{self.last_day}"
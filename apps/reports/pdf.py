@@ -0,0 +1,149 @@
+"""
+Motor de PDF para los reportes, basado en Platypus de reportlab.
+
+Los reportes se describen como secciones `(encabezado, cabecera, filas)`, igual
+que las exportaciones de `apps.reports.exports`, con las filas como iterable
+perezoso. Las filas se agrupan en tablas de como mucho `PDF_CHUNK_ROWS` filas,
+de modo que el coste de partir una tabla entre páginas no crece con el tamaño
+del reporte, y las tablas se generan bajo demanda mientras se maqueta el
+documento. Los estilos se crean una sola vez y se reutilizan en todos los
+reportes. El PDF se escribe en un fichero temporal que se envía por bloques.
+"""
+import tempfile
+from itertools import islice
+
+from django.http import FileResponse
+from django.utils import timezone
+from django.utils.html import escape
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+PDF_CHUNK_ROWS = 500
+
+_STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle('ReportTitle', parent=_STYLES['Title'], fontSize=18, spaceAfter=6)
+SUBTITLE_STYLE = ParagraphStyle('ReportSubtitle', parent=_STYLES['Normal'], fontSize=10, textColor=colors.grey, alignment=1)
+HEADING_STYLE = ParagraphStyle('ReportHeading', parent=_STYLES['Heading2'], fontSize=14, spaceBefore=12, spaceAfter=6)
+EMPTY_STYLE = ParagraphStyle('ReportEmpty', parent=_STYLES['Italic'], fontSize=10, textColor=colors.grey)
+HEADER_CELL_STYLE = ParagraphStyle('ReportHeaderCell', parent=_STYLES['Normal'], fontName='Helvetica-Bold', fontSize=9, leading=11, textColor=colors.white)
+CELL_STYLE = ParagraphStyle('ReportCell', parent=_STYLES['Normal'], fontName='Helvetica', fontSize=8, leading=10)
+TABLE_STYLE = TableStyle([
+    ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f1f5f9')]),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.HexColor('#cbd5e1')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+])
+
+
+class _LazyFlowables(list):
+    """
+    Lista de flowables que se rellena desde un generador a medida que Platypus la consume.
+
+    `BaseDocTemplate.build` solo mira el principio de la lista (y devuelve ahí los
+    trozos de una tabla partida), así que basta con tener un par de elementos cargados.
+    """
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = iter(source)
+
+    def _fill(self, size):
+        while self._source is not None and list.__len__(self) < size:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill(2)
+        return super().__len__()
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            self._fill(index + 2)
+        elif self._source is not None:
+            self._fill(float('inf'))
+        return super().__getitem__(index)
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _cell(value, max_chars):
+    # Solo los textos que no caben en la columna se envuelven en un Paragraph,
+    # que es bastante más caro de maquetar que una cadena.
+    text = str(value)
+    if len(text) <= max_chars:
+        return text
+    return Paragraph(escape(text), CELL_STYLE)
+
+
+def _story(title, subtitle, sections, available_width):
+    # Los textos se escapan: Paragraph interpreta su marcado y el subtítulo puede
+    # contener parámetros de la petición.
+    yield Paragraph(escape(title), TITLE_STYLE)
+    if subtitle:
+        yield Paragraph(escape(subtitle), SUBTITLE_STYLE)
+    yield Spacer(1, 0.2 * inch)
+    for heading, header, rows in sections:
+        if heading:
+            yield Paragraph(escape(heading), HEADING_STYLE)
+        col_width = available_width / len(header)
+        header_row = [Paragraph(escape(label), HEADER_CELL_STYLE) for label in header]
+        max_chars = int(col_width / (CELL_STYLE.fontSize * 0.55))
+        empty = True
+        for chunk in _chunks(rows, PDF_CHUNK_ROWS):
+            empty = False
+            body = [[_cell(value, max_chars) for value in row] for row in chunk]
+            table = Table([header_row] + body, colWidths=[col_width] * len(header), repeatRows=1)
+            table.setStyle(TABLE_STYLE)
+            yield table
+        if empty:
+            yield Paragraph("No hay datos para este reporte.", EMPTY_STYLE)
+
+
+def _footer(generated_at):
+    def draw(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica-Oblique', 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(doc.leftMargin, 0.5 * inch, f"Reporte generado automáticamente - {generated_at}")
+        canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 0.5 * inch, f"Página {doc.page}")
+        canvas.restoreState()
+    return draw
+
+
+def render_pdf_report(filename, title, sections, subtitle=None):
+    """
+    Genera un reporte PDF con una tabla por sección y lo devuelve como descarga.
+
+    Args:
+        filename (str): Nombre del fichero sin extensión.
+        title (str): Título del documento.
+        sections (list): Tuplas (encabezado o None, cabecera, filas) con las filas
+            como iterable perezoso.
+        subtitle (str, optional): Línea bajo el título (p. ej. el periodo).
+
+    Returns:
+        FileResponse: El PDF, leído por bloques desde un fichero temporal.
+    """
+    output = tempfile.TemporaryFile()
+    doc = SimpleDocTemplate(output, pagesize=letter, title=title,
+                            leftMargin=0.6 * inch, rightMargin=0.6 * inch,
+                            topMargin=0.6 * inch, bottomMargin=0.8 * inch)
+    footer = _footer(timezone.localtime().strftime('%d/%m/%Y %H:%M:%S'))
+    doc.build(_LazyFlowables(_story(title, subtitle, sections, doc.width)), onFirstPage=footer, onLaterPages=footer)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=f'{filename}.pdf', content_type='application/pdf')
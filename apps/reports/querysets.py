@@ -0,0 +1,51 @@
+"""
+Querysets compartidos por las vistas, los PDF y las exportaciones de reportes.
+
+Cada función aplica los filtros del reporte, une en la misma consulta las
+relaciones que se muestran por fila (activo, usuario, técnico, responsable) y
+limita las columnas leídas a las que usa el reporte. Así el número de consultas
+de un reporte no depende de cuántas filas tenga.
+"""
+from apps.events.models import Evento
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+
+
+def loan_report_queryset(start_date=None, end_date=None):
+    """
+    Préstamos del reporte, opcionalmente filtrados por rango de fecha de préstamo.
+    """
+    loans = (Loan.objects
+             .select_related('asset', 'user')
+             .only('id', 'status', 'loan_date', 'due_date', 'return_date', 'asset__name', 'user__username'))
+    if start_date and end_date:
+        loans = loans.filter(loan_date__range=[start_date, end_date])
+    return loans
+
+
+def maintenance_report_queryset(start_date=None, end_date=None, technician=None, status=None):
+    """
+    Mantenimientos del reporte, filtrados por fecha programada, técnico y estado.
+    """
+    maintenances = (Maintenance.objects
+                    .select_related('asset', 'technician')
+                    .only('id', 'status', 'scheduled_date', 'completed_date', 'asset__name', 'technician__username'))
+    if start_date and end_date:
+        maintenances = maintenances.filter(scheduled_date__range=[start_date, end_date])
+    if technician:
+        maintenances = maintenances.filter(technician__username=technician)
+    if status:
+        maintenances = maintenances.filter(status=status)
+    return maintenances
+
+
+def event_report_queryset(start_date=None, end_date=None):
+    """
+    Eventos del reporte, opcionalmente filtrados por rango de fecha de inicio.
+    """
+    events = (Evento.objects
+              .select_related('responsable')
+              .only('id', 'titulo', 'tipo', 'lugar', 'fecha_inicio', 'fecha_fin', 'responsable__username'))
+    if start_date and end_date:
+        events = events.filter(fecha_inicio__range=[start_date, end_date])
+    return events
@@ -0,0 +1,390 @@
+"""
+Resúmenes diarios de utilización de activos.
+
+Para cada activo y día se guardan las horas prestado, en mantenimiento,
+reservado por eventos aprobados o activos y ocioso (`AssetDailyUsage`, solo los
+días con actividad), y su suma por categoría (`CategoryDailyUsage`). Los
+reportes consultan estas tablas en lugar de recorrer préstamos, mantenimientos
+y eventos.
+
+`python manage.py build_usage_rollups` las mantiene de forma incremental. Solo
+se resumen días completos (hasta ayer). En cada ejecución se recalculan:
+
+- los días nuevos desde la ejecución anterior;
+- los días de los préstamos, mantenimientos y eventos modificados desde
+  entonces (`updated_at` / `actualizado_en`);
+- los días ya resumidos de los activos afectados por esos cambios o por una
+  transición del diario de estados (ver `apps.assets.journal`), que cubren
+  préstamos y mantenimientos borrados o acortados.
+
+Lo que no deja rastro (p. ej. borrar un préstamo ya devuelto o quitar un activo
+de un evento) se corrige con `--rebuild-from`.
+"""
+import time as timer
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.assets.journal import consume
+from apps.assets.models import Asset
+from apps.assets.reconciliation import ACTIVE_LOAN_STATUS, ACTIVE_MAINTENANCE_STATUSES
+from apps.events.models import AssetReservation
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+
+from .models import AssetDailyUsage, CategoryDailyUsage, UsageRollupState
+
+JOURNAL_CONSUMER = 'usage_rollups'
+KINDS = ('loan', 'maintenance', 'reserved')
+# Margen para cambios confirmados justo después del inicio de la ejecución anterior.
+SYNC_MARGIN = timedelta(seconds=30)
+# Activos que se recalculan a la vez.
+ASSET_BATCH_SIZE = 500
+
+
+def _day_start(day):
+    # En UTC: restar dos horas locales con la misma zona ignora los cambios de hora.
+    return timezone.make_aware(datetime.combine(day, time.min)).astimezone(dt_timezone.utc)
+
+
+def _hours(first_day, last_day):
+    """Horas entre el inicio de `first_day` y el final de `last_day` (23 o 25 en los cambios de hora)."""
+    if last_day < first_day:
+        return 0
+    return (_day_start(last_day + timedelta(days=1)) - _day_start(first_day)).total_seconds() / 3600
+
+
+def _created_counts(assets, category_field, until):
+    """
+    Activos creados por categoría y día hasta `until`, como {categoría: (días, acumulados)}.
+
+    Se agrupan en la base de datos por día de creación, sin leer cada activo; el
+    número de activos de una categoría en un día es `acumulados[bisect_right(días, día) - 1]`.
+    """
+    counts = defaultdict(lambda: ([], []))
+    rows = (assets.annotate(created_day=TruncDate('created_at'))
+            .filter(created_day__lte=until)
+            .values_list(category_field, 'created_day')
+            .annotate(assets=Count('pk'))
+            .order_by(category_field, 'created_day'))
+    for category, day, assets_created in rows:
+        days, totals = counts[category]
+        days.append(day)
+        totals.append((totals[-1] if totals else 0) + assets_created)
+    return counts
+
+
+def _days(start, end, first_day, last_day):
+    """Días entre `first_day` y `last_day` que toca el intervalo [start, end)."""
+    start = max(start, _day_start(first_day))
+    end = min(end, _day_start(last_day + timedelta(days=1)))
+    if end <= start:
+        return []
+    first = timezone.localtime(start).date()
+    last = timezone.localtime(end - timedelta(microseconds=1)).date()
+    return [first + timedelta(days=n) for n in range((last - first).days + 1)]
+
+
+def _union_hours(spans):
+    """Horas cubiertas por la unión de los intervalos (start, end)."""
+    seconds, current_start, current_end = 0, None, None
+    for start, end in sorted(spans):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                seconds += (current_end - current_start).total_seconds()
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        seconds += (current_end - current_start).total_seconds()
+    return seconds / 3600
+
+
+def _intervals(start, end, now, loans=None, maintenances=None, reservations=None):
+    """
+    Intervalos (asset_id, tipo, inicio, fin) de préstamo, mantenimiento y reserva
+    que se solapan con [start, end). Los préstamos y mantenimientos en curso
+    terminan en `now`.
+    """
+    loans = Loan.objects.all() if loans is None else loans
+    rows = (loans.filter(loan_date__lt=end)
+            .filter(Q(status=ACTIVE_LOAN_STATUS) | Q(return_date__gt=start) | Q(return_date__isnull=True, updated_at__gt=start))
+            .values_list('asset_id', 'status', 'loan_date', 'return_date', 'updated_at'))
+    for asset_id, status, loan_date, return_date, updated_at in rows.iterator(chunk_size=2000):
+        finish = now if status == ACTIVE_LOAN_STATUS else (return_date or updated_at)
+        yield asset_id, 'loan', loan_date, finish
+
+    maintenances = Maintenance.objects.all() if maintenances is None else maintenances
+    start_day = timezone.localtime(start).date()
+    rows = (maintenances.filter(Q(scheduled_date__lt=timezone.localtime(end).date() + timedelta(days=1))
+                                | Q(scheduled_date__isnull=True, created_at__lt=end))
+            .filter(Q(status__in=ACTIVE_MAINTENANCE_STATUSES) | Q(completed_date__gte=start_day) | Q(completed_date__isnull=True, updated_at__gt=start))
+            .values_list('asset_id', 'status', 'scheduled_date', 'completed_date', 'created_at', 'updated_at'))
+    for asset_id, status, scheduled_date, completed_date, created_at, updated_at in rows.iterator(chunk_size=2000):
+        begin = _day_start(scheduled_date) if scheduled_date else created_at
+        if status in ACTIVE_MAINTENANCE_STATUSES:
+            finish = now
+        else:
+            # La fecha de finalización cuenta como día completo.
+            finish = _day_start(completed_date + timedelta(days=1)) if completed_date else updated_at
+        yield asset_id, 'maintenance', begin, finish
+
+    reservations = AssetReservation.objects.all() if reservations is None else reservations
+    rows = (reservations.filter(status__in=AssetReservation.BLOCKING_STATUSES, start__lt=end)
+            .filter(Q(end__gt=start) | Q(end__isnull=True))
+            .values_list('asset_id', 'start', 'end'))
+    for asset_id, begin, finish in rows.iterator(chunk_size=2000):
+        # Un evento sin fecha de fin reserva el activo hasta el final de su día de inicio.
+        yield asset_id, 'reserved', begin, finish or _day_start(timezone.localtime(begin).date() + timedelta(days=1))
+
+
+def _mark(dirty, intervals, first_day, last_day):
+    for asset_id, _, begin, finish in intervals:
+        dirty[asset_id].update(_days(begin, finish, first_day, last_day))
+
+
+def _mark_summarized(dirty, asset_ids, first_day, last_day):
+    """Marca los días ya resumidos de los activos indicados."""
+    asset_ids = list(asset_ids)
+    for offset in range(0, len(asset_ids), ASSET_BATCH_SIZE):
+        rows = (AssetDailyUsage.objects
+                .filter(asset_id__in=asset_ids[offset:offset + ASSET_BATCH_SIZE], day__range=(first_day, last_day))
+                .values_list('asset_id', 'day'))
+        for asset_id, day in rows.iterator(chunk_size=5000):
+            dirty[asset_id].add(day)
+
+
+def _rebuild_assets(dirty, now):
+    """Recalcula las filas de `AssetDailyUsage` de los días marcados de cada activo."""
+    written = 0
+    asset_ids = sorted(dirty)
+    for offset in range(0, len(asset_ids), ASSET_BATCH_SIZE):
+        batch = {asset_id: dirty[asset_id] for asset_id in asset_ids[offset:offset + ASSET_BATCH_SIZE]}
+        first_day = min(min(days) for days in batch.values())
+        last_day = max(max(days) for days in batch.values())
+
+        spans = defaultdict(list)
+        intervals = _intervals(
+            _day_start(first_day), _day_start(last_day + timedelta(days=1)), now,
+            loans=Loan.objects.filter(asset_id__in=list(batch)),
+            maintenances=Maintenance.objects.filter(asset_id__in=list(batch)),
+            reservations=AssetReservation.objects.filter(asset_id__in=list(batch)),
+        )
+        for asset_id, kind, begin, finish in intervals:
+            for day in _days(begin, finish, first_day, last_day):
+                if day in batch[asset_id]:
+                    day_start, day_end = _day_start(day), _day_start(day + timedelta(days=1))
+                    spans[(asset_id, day)].append((kind, max(begin, day_start), min(finish, day_end)))
+
+        stale = [
+            pk for pk, asset_id, day in AssetDailyUsage.objects
+            .filter(asset_id__in=list(batch), day__range=(first_day, last_day)).values_list('pk', 'asset_id', 'day')
+            if day in batch[asset_id]
+        ]
+        for start in range(0, len(stale), 1000):
+            AssetDailyUsage.objects.filter(pk__in=stale[start:start + 1000]).delete()
+
+        rows = []
+        for (asset_id, day), day_spans in spans.items():
+            hours = {kind: _union_hours([(b, f) for k, b, f in day_spans if k == kind]) for kind in KINDS}
+            busy = _union_hours([(b, f) for _, b, f in day_spans])
+            day_hours = (_day_start(day + timedelta(days=1)) - _day_start(day)).total_seconds() / 3600
+            rows.append(AssetDailyUsage(
+                asset_id=asset_id, day=day, loan_hours=round(hours['loan'], 4),
+                maintenance_hours=round(hours['maintenance'], 4), reserved_hours=round(hours['reserved'], 4),
+                idle_hours=round(day_hours - busy, 4),
+            ))
+        AssetDailyUsage.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+    return written
+
+
+def _rebuild_categories(days):
+    """Recalcula `CategoryDailyUsage` para los días indicados."""
+    if not days:
+        return 0
+    created = _created_counts(Asset.objects.all(), 'category_id', max(days))
+
+    days = sorted(days)
+    written = 0
+    for offset in range(0, len(days), 366):
+        chunk = days[offset:offset + 366]
+        CategoryDailyUsage.objects.filter(day__in=chunk).delete()
+        usage = {
+            (row['asset__category_id'], row['day']): row
+            for row in AssetDailyUsage.objects.filter(day__in=chunk)
+            .values('asset__category_id', 'day')
+            .annotate(rows=Count('pk'), loan=Sum('loan_hours'), maintenance=Sum('maintenance_hours'),
+                      reserved=Sum('reserved_hours'), idle=Sum('idle_hours'))
+        }
+        rows = []
+        for day in chunk:
+            day_hours = _hours(day, day)
+            for category_id, (dates, totals) in created.items():
+                position = bisect_right(dates, day)
+                if not position:
+                    continue
+                assets = totals[position - 1]
+                row = usage.get((category_id, day))
+                if row is None:
+                    rows.append(CategoryDailyUsage(category_id=category_id, day=day, assets=assets, idle_hours=assets * day_hours))
+                    continue
+                # Los activos sin fila ese día estuvieron ociosos todo el día.
+                rows.append(CategoryDailyUsage(
+                    category_id=category_id, day=day, assets=assets,
+                    loan_hours=round(row['loan'], 4), maintenance_hours=round(row['maintenance'], 4),
+                    reserved_hours=round(row['reserved'], 4),
+                    idle_hours=round(row['idle'] + max(assets - row['rows'], 0) * day_hours, 4),
+                ))
+        CategoryDailyUsage.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+    return written
+
+
+def _first_activity_day():
+    """Primer día con algún activo, préstamo, mantenimiento o reserva."""
+    candidates = [
+        Asset.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+        Loan.objects.order_by('loan_date').values_list('loan_date', flat=True).first(),
+        Maintenance.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+        AssetReservation.objects.order_by('start').values_list('start', flat=True).first(),
+    ]
+    candidates = [timezone.localtime(value).date() for value in candidates if value]
+    scheduled = Maintenance.objects.order_by('scheduled_date').exclude(scheduled_date=None).values_list('scheduled_date', flat=True).first()
+    if scheduled:
+        candidates.append(scheduled)
+    return min(candidates) if candidates else None
+
+
+def build_usage_rollups(rebuild_from=None):
+    """
+    Actualiza los resúmenes diarios hasta ayer, recalculando solo los días afectados.
+
+    Args:
+        rebuild_from (date, optional): Recalcular todos los días desde esta fecha
+            (o desde el primer día sin resumir, si es anterior). La primera
+            ejecución empieza en el primer día con actividad.
+
+    Returns:
+        dict: first_day y last_day del periodo nuevo, asset_rows y category_rows
+              escritas, y timings con los segundos de cada fase.
+    """
+    report = {'timings': {}}
+    with transaction.atomic():
+        state, _ = UsageRollupState.objects.select_for_update().get_or_create(pk=1)
+        now = timezone.now()
+        last_day = timezone.localdate(now) - timedelta(days=1)
+        if state.last_day is None:
+            resume_from = _first_activity_day() or last_day + timedelta(days=1)
+        else:
+            resume_from = state.last_day + timedelta(days=1)
+        # `rebuild_from` solo puede adelantar el inicio: los días aún sin resumir
+        # entre `resume_from` y `rebuild_from` no se volverían a visitar.
+        new_from = min(rebuild_from, resume_from) if rebuild_from else resume_from
+        dirty = defaultdict(set)
+
+        started = timer.perf_counter()
+        AssetDailyUsage.objects.filter(day__gte=new_from).delete()
+        # Días nuevos: todos los intervalos que los tocan.
+        if new_from <= last_day:
+            _mark(dirty, _intervals(_day_start(new_from), _day_start(last_day + timedelta(days=1)), now), new_from, last_day)
+
+        # Días ya resumidos afectados por cambios desde la ejecución anterior.
+        summarized_from = _first_activity_day()
+        summarized_to = min(state.last_day or new_from, new_from - timedelta(days=1))
+        touched = set()
+        if state.synced_at and summarized_from and summarized_from <= summarized_to:
+            since = state.synced_at - SYNC_MARGIN
+            changed = {
+                'loans': Loan.objects.filter(updated_at__gte=since),
+                'maintenances': Maintenance.objects.filter(updated_at__gte=since),
+                'reservations': AssetReservation.objects.filter(event__actualizado_en__gte=since),
+            }
+            period = (_day_start(summarized_from), _day_start(summarized_to + timedelta(days=1)))
+            for asset_id, kind, begin, finish in _intervals(*period, now, **changed):
+                touched.add(asset_id)
+                dirty[asset_id].update(_days(begin, finish, summarized_from, summarized_to))
+        # Transiciones del diario: préstamos y mantenimientos borrados o cerrados.
+        consume(JOURNAL_CONSUMER, lambda batch: touched.update(t.asset_id for t in batch))
+        if summarized_from and summarized_from <= summarized_to:
+            _mark_summarized(dirty, touched, summarized_from, summarized_to)
+        report['timings']['scan'] = timer.perf_counter() - started
+
+        started = timer.perf_counter()
+        dirty = {asset_id: days for asset_id, days in dirty.items() if days}
+        report['asset_rows'] = _rebuild_assets(dirty, now)
+        report['timings']['assets'] = timer.perf_counter() - started
+
+        started = timer.perf_counter()
+        days = set().union(*dirty.values()) if dirty else set()
+        if new_from <= last_day:
+            days.update(new_from + timedelta(days=n) for n in range((last_day - new_from).days + 1))
+        report['category_rows'] = _rebuild_categories(days)
+        report['timings']['categories'] = timer.perf_counter() - started
+
+        if new_from <= last_day or state.last_day is None:
+            state.last_day = max(last_day, state.last_day or last_day)
+        state.synced_at = now
+        state.save()
+    report.update(first_day=new_from, last_day=last_day)
+    return report
+
+
+def usage_by_category(start, end, category=None, location=None):
+    """
+    Horas de uso por categoría entre `start` y `end` (inclusive), leídas de los resúmenes.
+
+    Sin filtro de ubicación se suman las filas de `CategoryDailyUsage`; con él, las
+    de `AssetDailyUsage` de los activos de esa ubicación, añadiendo como ociosas
+    las horas reales (23 o 25 en los cambios de hora) de los días sin fila.
+
+    Returns:
+        list: Un dict por categoría con category, loan_hours, maintenance_hours,
+              reserved_hours, idle_hours y utilization (% de horas no ociosas).
+    """
+    sums = {'loan_hours': Sum('loan_hours'), 'maintenance_hours': Sum('maintenance_hours'),
+            'reserved_hours': Sum('reserved_hours'), 'idle_hours': Sum('idle_hours')}
+    if not location:
+        usage = CategoryDailyUsage.objects.filter(day__range=(start, end))
+        if category:
+            usage = usage.filter(category=category)
+        rows = list(usage.values('category__name').annotate(**sums).order_by('category__name'))
+    else:
+        usage = AssetDailyUsage.objects.filter(day__range=(start, end), asset__location__icontains=location)
+        assets = Asset.objects.filter(location__icontains=location)
+        if category:
+            usage = usage.filter(asset__category=category)
+            assets = assets.filter(category=category)
+        rows = {row['asset__category__name']: row for row in usage.values('asset__category__name').annotate(**sums)}
+        # Horas de los días con fila, que ya incluyen su tiempo ocioso.
+        covered = defaultdict(float)
+        for name, day, asset_rows in (usage.values_list('asset__category__name', 'day')
+                                      .annotate(asset_rows=Count('pk')).order_by()):
+            covered[name] += asset_rows * _hours(day, day)
+        # El resto de horas de cada activo dentro del periodo: ocioso.
+        for name, (dates, totals) in _created_counts(assets, 'category__name', end).items():
+            created = [total - previous for previous, total in zip([0] + totals, totals)]
+            hours = sum(count * _hours(max(start, day), end) for day, count in zip(dates, created))
+            row = rows.setdefault(name, {'loan_hours': 0, 'maintenance_hours': 0, 'reserved_hours': 0, 'idle_hours': 0})
+            row['idle_hours'] += max(hours - covered[name], 0)
+        rows = [dict(row, category__name=name) for name, row in sorted(rows.items())]
+
+    summary = []
+    for row in rows:
+        hours = {key: round(row[key] or 0, 1) for key in sums}
+        total = sum(hours.values())
+        summary.append(dict(
+            hours, category=row['category__name'],
+            utilization=round((total - hours['idle_hours']) / total * 100, 2) if total else 0,
+        ))
+    return summary
+
+
+def rollup_last_day():
+    """Último día resumido, o None si aún no se han construido los resúmenes."""
+    return UsageRollupState.objects.values_list('last_day', flat=True).first()
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.assets.models import AssetCategory
+
+from .cache import mark_changed
+
+# Tablas de los reportes sin fecha de modificación: al cambiar (p. ej. al renombrar
+# una categoría o un usuario) se renueva su marca para que cambie la huella de los
+# reportes cacheados que muestran sus nombres.
+UNSTAMPED_REPORT_SOURCES = (AssetCategory, get_user_model())
+
+
+def mark_report_source_changed(sender, update_fields=None, **kwargs):
+    """Renueva la marca de cambio de la tabla al confirmar la transacción."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        # Iniciar sesión no cambia nada de lo que muestran los reportes.
+        return
+    transaction.on_commit(lambda: mark_changed(sender))
+
+
+for model in UNSTAMPED_REPORT_SOURCES:
+    post_save.connect(mark_report_source_changed, sender=model, dispatch_uid=f'report_cache_save_{model.__name__}')
+    post_delete.connect(mark_report_source_changed, sender=model, dispatch_uid=f'report_cache_delete_{model.__name__}')
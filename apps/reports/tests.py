@@ -1,3 +1,384 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.roles import group_names, invalidate_user_groups
+from apps.assets.journal import CAUSE_LOAN_CREATE, CAUSE_LOAN_DELETE
+from apps.assets.models import Asset, AssetCategory
+from apps.events.models import Evento
+from apps.loans.models import Loan
+from apps.maintenance.models import Maintenance
+
+from .jobs import claim_next_job, enqueue_report_job, run_job
+from .models import AssetDailyUsage, CategoryDailyUsage, ReportJob, UsageRollupState
+from .rollups import build_usage_rollups, usage_by_category
+
+
+# Caché propia de cada prueba: la caché en disco del proyecto se comparte entre
+# ejecuciones y, al llenarse, descarta entradas al azar (p. ej. los grupos cacheados).
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReportQueryCountTests(TestCase):
+    """
+    Comprueba que cada reporte hace el mismo número de consultas sin importar
+    cuántas filas contiene (sin consultas N+1 por fila).
+    """
+
+    REPORT_URLS = [
+        ('reports:loan_report_pdf', {}),
+        ('reports:loan_report_excel', {}),
+        ('reports:loan_report_excel', {'format': 'csv'}),
+        ('reports:maintenance_report', {}),
+        ('reports:maintenance_report_pdf', {}),
+        ('reports:maintenance_report_excel', {}),
+        ('reports:maintenance_report_excel', {'format': 'csv'}),
+        ('reports:events_general_report', {}),
+        ('reports:events_general_report_pdf', {}),
+        ('reports:events_general_report_excel', {}),
+        ('reports:events_by_date', {}),
+        ('reports:events_by_date_pdf', {}),
+        ('reports:events_by_date_excel', {'format': 'csv'}),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = AssetCategory.objects.create(name="Portátiles")
+        cls.viewer = User.objects.create_user(username="lector", password="x")
+        cls.counter = 0
+
+    def setUp(self):
+        # Las plantillas HTML de reportes necesitan un usuario autenticado.
+        self.client.force_login(self.viewer)
+        # Los grupos del usuario se cachean entre peticiones (apps.accounts.roles):
+        # se cargan aquí para que todas las mediciones partan de la caché llena.
+        invalidate_user_groups([self.viewer.pk])
+        group_names(self.viewer)
+
+    def _add_rows(self, count):
+        """Crea `count` préstamos, mantenimientos y eventos, cada uno con su propio activo y usuario."""
+        now = timezone.now()
+        for _ in range(count):
+            ReportQueryCountTests.counter += 1
+            n = ReportQueryCountTests.counter
+            user = User.objects.create_user(username=f"usuario{n}", password="x")
+            asset = Asset.objects.create(name=f"Activo {n}", category=self.category, location="Sala 1")
+            Loan.objects.create(asset=asset, user=user, status="Activo", due_date=now + timedelta(days=7))
+            Maintenance.objects.create(asset=asset, technician=user, scheduled_date=now.date())
+            Evento.objects.create(titulo=f"Evento {n}", responsable=user, fecha_inicio=now, fecha_fin=now + timedelta(hours=2))
+
+    def _count_queries(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            # Las respuestas en streaming consultan la base de datos al consumirse.
+            if response.streaming:
+                b''.join(response.streaming_content)
+            else:
+                response.content
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self._add_rows(1)
+        baseline = {(name, tuple(params.items())): self._count_queries(reverse(name), params) for name, params in self.REPORT_URLS}
+        self._add_rows(10)
+        for name, params in self.REPORT_URLS:
+            with self.subTest(report=name, params=params):
+                self.assertEqual(self._count_queries(reverse(name), params), baseline[(name, tuple(params.items()))])
+
+
+@override_settings(ASSET_JOURNAL_LAG_SECONDS=0)
+class UsageRollupTests(TestCase):
+    """Resúmenes diarios de utilización y su construcción incremental."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = AssetCategory.objects.create(name="Portátiles")
+        cls.user = User.objects.create_user(username="prestatario", password="x")
+        cls.today = timezone.localdate()
+        cls.first = Asset.objects.create(name="Portátil 1", category=cls.category, location="Sala 1")
+        cls.second = Asset.objects.create(name="Portátil 2", category=cls.category, location="Sala 2")
+        Asset.objects.update(created_at=cls.at(10))
+
+    @classmethod
+    def day(cls, days_ago):
+        return cls.today - timedelta(days=days_ago)
+
+    @classmethod
+    def at(cls, days_ago, hour=0):
+        return timezone.make_aware(datetime.combine(cls.day(days_ago), time(hour)))
+
+    def usage(self, asset):
+        return {
+            row[0]: row[1:] for row in AssetDailyUsage.objects.filter(asset=asset).order_by('day')
+            .values_list('day', 'loan_hours', 'maintenance_hours', 'reserved_hours', 'idle_hours')
+        }
+
+    def snapshot(self):
+        return (
+            set(AssetDailyUsage.objects.values_list('asset_id', 'day', 'loan_hours', 'maintenance_hours', 'reserved_hours', 'idle_hours')),
+            set(CategoryDailyUsage.objects.values_list('category_id', 'day', 'assets', 'loan_hours', 'idle_hours')),
+        )
+
+    def assertMatchesFullRebuild(self):
+        incremental = self.snapshot()
+        build_usage_rollups(rebuild_from=self.day(10))
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_loan_spanning_several_days(self):
+        Loan.objects.create(asset=self.first, user=self.user, status="Devuelto", loan_date=self.at(3, 12), return_date=self.at(1, 6))
+        build_usage_rollups()
+
+        self.assertEqual(self.usage(self.first), {
+            self.day(3): (12.0, 0.0, 0.0, 12.0),
+            self.day(2): (24.0, 0.0, 0.0, 0.0),
+            self.day(1): (6.0, 0.0, 0.0, 18.0),
+        })
+        self.assertEqual(self.usage(self.second), {})
+        # El día de hoy aún no se resume.
+        self.assertEqual(UsageRollupState.objects.get().last_day, self.day(1))
+        category = CategoryDailyUsage.objects.get(category=self.category, day=self.day(1))
+        self.assertEqual((category.assets, category.loan_hours, category.idle_hours), (2, 6.0, 42.0))
+
+    def test_incremental_run_after_past_loan_added_and_returned(self):
+        build_usage_rollups()
+        self.assertEqual(AssetDailyUsage.objects.count(), 0)
+
+        # Préstamo registrado a posteriori en días ya resumidos.
+        Loan.objects.create(asset=self.second, user=self.user, status="Devuelto", loan_date=self.at(5), return_date=self.at(4))
+        loan = Loan.objects.create(asset=self.first, user=self.user, status="Activo", loan_date=self.at(2))
+        build_usage_rollups()
+        self.assertEqual(self.usage(self.second), {self.day(5): (24.0, 0.0, 0.0, 0.0)})
+        self.assertEqual(self.usage(self.first), {
+            self.day(2): (24.0, 0.0, 0.0, 0.0),
+            self.day(1): (24.0, 0.0, 0.0, 0.0),
+        })
+
+        # Devolución con fecha pasada: se recalculan los días ya resumidos.
+        loan.status = "Devuelto"
+        loan.return_date = self.at(2, 12)
+        loan.save()
+        build_usage_rollups()
+        self.assertEqual(self.usage(self.first), {self.day(2): (12.0, 0.0, 0.0, 12.0)})
+        self.assertMatchesFullRebuild()
+
+    def test_deleted_loan_is_rebuilt_from_journal(self):
+        loan = Loan.objects.create(asset=self.first, user=self.user, status="Activo", loan_date=self.at(2))
+        self.first.set_status('en_uso', CAUSE_LOAN_CREATE)
+        build_usage_rollups()
+        self.assertEqual(len(self.usage(self.first)), 2)
+
+        # Borrar el préstamo no deja rastro en los préstamos, pero sí en el diario.
+        loan.delete()
+        self.first.set_status('disponible', CAUSE_LOAN_DELETE)
+        build_usage_rollups()
+        self.assertEqual(self.usage(self.first), {})
+        self.assertMatchesFullRebuild()
+
+    def test_rebuild_from_does_not_skip_pending_days(self):
+        Loan.objects.create(asset=self.first, user=self.user, status="Devuelto", loan_date=self.at(4), return_date=self.at(3))
+        build_usage_rollups()
+        # Ejecuciones perdidas: los días posteriores al 6 aún no están resumidos.
+        UsageRollupState.objects.update(last_day=self.day(6))
+        AssetDailyUsage.objects.filter(day__gt=self.day(6)).delete()
+        CategoryDailyUsage.objects.filter(day__gt=self.day(6)).delete()
+
+        build_usage_rollups(rebuild_from=self.day(2))
+        self.assertEqual(self.usage(self.first), {self.day(4): (24.0, 0.0, 0.0, 0.0)})
+        self.assertEqual(CategoryDailyUsage.objects.filter(day__gt=self.day(6)).count(), 5)
+        self.assertEqual(UsageRollupState.objects.get().last_day, self.day(1))
+
+    def test_usage_by_category(self):
+        Loan.objects.create(asset=self.first, user=self.user, status="Devuelto", loan_date=self.at(1), return_date=self.at(1, 12))
+        build_usage_rollups()
+
+        def hours(**filters):
+            return [(row['category'], row['loan_hours'], row['idle_hours'], row['utilization'])
+                    for row in usage_by_category(self.day(1), self.day(1), **filters)]
+
+        self.assertEqual(hours(), [("Portátiles", 12.0, 36.0, 25.0)])
+        self.assertEqual(hours(category=self.category), [("Portátiles", 12.0, 36.0, 25.0)])
+        self.assertEqual(hours(location="Sala 1"), [("Portátiles", 12.0, 12.0, 50.0)])
+        self.assertEqual(hours(location="Sala 2"), [("Portátiles", 0.0, 24.0, 0)])
+
+    @override_settings(TIME_ZONE='Europe/Madrid')
+    def test_usage_by_category_uses_real_day_length(self):
+        # El 29 de marzo de 2026 cambia la hora en Madrid: ese día tiene 23 horas.
+        category = AssetCategory.objects.create(name="Cámaras")
+        camera = Asset.objects.create(name="Cámara", category=category, location="Plató")
+        Asset.objects.filter(pk=camera.pk).update(created_at=timezone.make_aware(datetime(2026, 3, 27, 9)))
+        Loan.objects.create(asset=camera, user=self.user, status="Devuelto",
+                            loan_date=timezone.make_aware(datetime(2026, 3, 28, 12)),
+                            return_date=timezone.make_aware(datetime(2026, 3, 28, 18)))
+        build_usage_rollups()
+
+        self.assertEqual(
+            list(CategoryDailyUsage.objects.filter(category=category, day__range=(date(2026, 3, 26), date(2026, 3, 29)))
+                 .order_by('day').values_list('day', 'assets', 'idle_hours')),
+            [(date(2026, 3, 27), 1, 24.0), (date(2026, 3, 28), 1, 18.0), (date(2026, 3, 29), 1, 23.0)],
+        )
+        # Con y sin filtro de ubicación se cuentan las mismas horas.
+        expected = [{'category': "Cámaras", 'loan_hours': 6.0, 'maintenance_hours': 0.0, 'reserved_hours': 0.0,
+                     'idle_hours': 65.0, 'utilization': 8.45}]
+        self.assertEqual(usage_by_category(date(2026, 3, 28), date(2026, 3, 30), category=category), expected)
+        self.assertEqual(usage_by_category(date(2026, 3, 28), date(2026, 3, 30), location="Plató"), expected)
+
+
+class ReportArtifactsMixin:
+    """Caché de reportes en un directorio temporal y caché de Django en memoria."""
+
+    def setUp(self):
+        super().setUp()
+        artifacts = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, artifacts, ignore_errors=True)
+        settings_override = override_settings(REPORT_ARTIFACTS_ROOT=artifacts, CACHES=TEST_CACHES)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def content(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+class ReportJobTests(ReportArtifactsMixin, TestCase):
+    """Cola de reportes en segundo plano."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", password="x")
+        category = AssetCategory.objects.create(name="Portátiles")
+        asset = Asset.objects.create(name="Portátil 1", category=category, location="Sala 1")
+        Loan.objects.create(asset=asset, user=cls.admin, status="Activo", due_date=timezone.now() + timedelta(days=7))
+
+    def run_claimed(self, job):
+        self.assertEqual(claim_next_job().pk, job.pk)
+        job = run_job(ReportJob.objects.get(pk=job.pk))
+        if job.artifact:
+            self.addCleanup(job.artifact.delete, save=False)
+        return job
+
+    def test_identical_params_reuse_job(self):
+        job, created = enqueue_report_job('loan_report_excel', {'format': 'csv', 'start_date': ''}, self.admin)
+        self.assertTrue(created)
+        # Los parámetros vacíos se ignoran.
+        same, created = enqueue_report_job('loan_report_excel', {'format': 'csv'}, self.admin)
+        self.assertEqual((same.pk, created), (job.pk, False))
+        other, created = enqueue_report_job('loan_report_excel', {'format': 'xlsx'}, self.admin)
+        self.assertTrue(created)
+        self.assertNotEqual(other.pk, job.pk)
+
+        with self.assertRaises(ValueError):
+            enqueue_report_job('report_job_create', {}, self.admin)
+
+    def test_job_is_claimed_once(self):
+        job, _ = enqueue_report_job('loan_report_excel', {'format': 'csv'}, self.admin)
+        claimed = claim_next_job()
+        self.assertEqual((claimed.pk, claimed.status), (job.pk, ReportJob.STATUS_RUNNING))
+        self.assertIsNotNone(claimed.started_at)
+        self.assertIsNone(claim_next_job())
+
+    def test_run_job_stores_artifact_served_by_download(self):
+        job, _ = enqueue_report_job('loan_report_excel', {'format': 'csv'}, self.admin)
+        job = self.run_claimed(job)
+        self.assertEqual(job.status, ReportJob.STATUS_DONE)
+        self.assertEqual(job.filename, 'loan_report.csv')
+
+        self.client.force_login(self.admin)
+        direct = self.content(self.client.get(reverse('reports:loan_report_excel'), {'format': 'csv'}))
+        response = self.client.get(reverse('reports:report_job_download', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('loan_report.csv', response['Content-Disposition'])
+        self.assertEqual(self.content(response), direct)
+        self.assertIn("Portátil 1", direct.decode('utf-8'))
+
+        # Un trabajo idéntico recién terminado se reutiliza.
+        self.assertEqual(enqueue_report_job('loan_report_excel', {'format': 'csv'}, self.admin), (job, False))
+
+    def test_failed_job_records_error(self):
+        # El reporte de activos es solo para administradores: la vista responde 403.
+        viewer = User.objects.create_user(username="lector", password="x")
+        job, _ = enqueue_report_job('general_assets_report_excel', {'format': 'csv'}, viewer)
+        job = self.run_claimed(job)
+        self.assertEqual(job.status, ReportJob.STATUS_FAILED)
+        self.assertIn('403', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('reports:report_job_download', args=[job.pk])).status_code, 404)
+
+
+class CachedReportTests(ReportArtifactsMixin, TestCase):
+    """Caché de reportes por huella de contenido (ETag)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", password="x")
+        cls.category = AssetCategory.objects.create(name="Portátiles")
+        cls.asset = Asset.objects.create(name="Portátil 1", category=cls.category, location="Sala 1")
+        cls.loan = Loan.objects.create(asset=cls.asset, user=cls.admin, status="Activo", due_date=timezone.now() + timedelta(days=7))
+        cls.event = Evento.objects.create(titulo="Congreso", responsable=cls.admin, fecha_inicio=timezone.now(), fecha_fin=timezone.now() + timedelta(hours=2))
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def get(self, name, **headers):
+        response = self.client.get(reverse(f'reports:{name}'), {'format': 'csv'}, headers=headers)
+        return response, self.content(response).decode('utf-8')
+
+    def test_unchanged_report_returns_not_modified(self):
+        response, _ = self.get('loan_report_excel')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        cached, _ = self.get('loan_report_excel', if_none_match=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+
+    def assertRegenerated(self, name, change, expected_text):
+        response, _ = self.get(name)
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response, body = self.get(name, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(expected_text, body)
+
+    def test_loan_change_regenerates_report(self):
+        def return_loan():
+            self.loan.status = "Devuelto"
+            self.loan.return_date = timezone.now()
+            self.loan.save()
+        self.assertRegenerated('loan_report_excel', return_loan, "Devuelto")
+
+    def test_asset_change_regenerates_report(self):
+        def rename_asset():
+            self.asset.name = "Portátil renombrado"
+            self.asset.save()
+        self.assertRegenerated('loan_report_excel', rename_asset, "Portátil renombrado")
+
+    def test_event_change_regenerates_report(self):
+        def rename_event():
+            self.event.titulo = "Congreso anual"
+            self.event.save()
+        self.assertRegenerated('events_general_report_excel', rename_event, "Congreso anual")
+
+    def test_category_rename_regenerates_report(self):
+        def rename_category():
+            self.category.name = "Portátiles y tabletas"
+            self.category.save()
+        self.assertRegenerated('general_assets_report_excel', rename_category, "Portátiles y tabletas")
+
+    def test_user_rename_regenerates_report(self):
+        def rename_user():
+            self.admin.username = "administrador"
+            self.admin.save()
+        self.assertRegenerated('events_general_report_excel', rename_user, "administrador")
@@ -1,7 +1,7 @@
 """
 Define las rutas URL para la aplicación de reportes, incluyendo diversas vistas
 para generar informes de activos, préstamos, mantenimientos y eventos en
-formatos HTML, PDF y Excel.
+formatos HTML, PDF y Excel, y los trabajos de generación en segundo plano.
 """
 from django.urls import path
 from . import views
@@ -27,4 +27,8 @@ urlpatterns = [
     path('events/general/excel/', views.events_general_report_excel, name='events_general_report_excel'),
     path('events/by-date/pdf/', views.events_by_date_pdf, name='events_by_date_pdf'),
     path('events/by-date/excel/', views.events_by_date_excel, name='events_by_date_excel'),
+
+    path('jobs/', views.report_job_create, name='report_job_create'),
+    path('jobs/<int:pk>/', views.report_job_status, name='report_job_status'),
+    path('jobs/<int:pk>/descargar/', views.report_job_download, name='report_job_download'),
 ]
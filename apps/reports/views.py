@@ -1,5 +1,7 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from apps.assets.models import Asset, AssetCategory # Import AssetCategory
+from apps.assets.aggregations import status_summary
+from apps.assets.counters import counted_status_counts
 from .forms import AssetUsageFilterForm
 from django.db.models import Sum, Count, Avg # Sum is still needed for potential future use or other models
 from apps.accounts.decorators import group_required, groups_required # For permissions
@@ -7,56 +9,64 @@ from apps.loans.models import Loan
 from django.utils.dateparse import parse_date
 import json
 from django.core.serializers.json import DjangoJSONEncoder
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from datetime import datetime
+from django.http import HttpResponse, JsonResponse, Http404
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from datetime import datetime, timedelta
 from apps.maintenance.models import Maintenance
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+from apps.events.models import Evento
+from .exports import export_response, EXPORT_CHUNK_SIZE
+from .pdf import render_pdf_report
+from .querysets import loan_report_queryset, maintenance_report_queryset, event_report_queryset
+from .jobs import enqueue_report_job
+from .models import ReportJob
+from .rollups import rollup_last_day, usage_by_category
+from .cache import cached_report
+from django.contrib.auth import get_user_model
+
+# Tablas de las que depende cada familia de reportes descargables, con su campo de
+# fecha de modificación cuando lo tienen (ver `apps.reports.cache`).
+ASSET_REPORT_SOURCES = ((Asset, 'updated_at'), AssetCategory)
+LOAN_REPORT_SOURCES = ((Loan, 'updated_at'), (Asset, 'updated_at'), get_user_model())
+MAINTENANCE_REPORT_SOURCES = ((Maintenance, 'updated_at'), (Asset, 'updated_at'), get_user_model())
+EVENT_REPORT_SOURCES = ((Evento, 'actualizado_en'), get_user_model())
 
 @group_required('Admin') # Restrict to Admin for now
 def asset_usage_report(request):
     """
     Genera un informe de uso de activos, permitiendo filtrar por categoría, ubicación y rango de fechas.
-    Muestra un resumen de activos por estado.
+    Muestra un resumen de activos por estado (estado actual) y las horas de préstamo,
+    mantenimiento, reserva y ociosas de cada categoría en el rango de fechas, leídas
+    de los resúmenes diarios (ver apps.reports.rollups). Sin fechas, el rango son los
+    últimos 30 días resumidos.
     """
     form = AssetUsageFilterForm(request.GET or None)
-    assets = Asset.objects.all()
-
-    # Apply filters
-    if form.is_valid():
-        if form.cleaned_data['category']:
-            assets = assets.filter(category=form.cleaned_data['category'])
-        if form.cleaned_data['location']:
-            assets = assets.filter(location__icontains=form.cleaned_data['location'])
-        
-        # Filter by updated_at for date range
-        if form.cleaned_data['start_date']:
-            assets = assets.filter(updated_at__gte=form.cleaned_data['start_date'])
-        if form.cleaned_data['end_date']:
-            assets = assets.filter(updated_at__lte=form.cleaned_data['end_date'])
-
-    # Group by status
-    summary_data = assets.values('status').annotate(total=Count('id'))
-    total_assets_count = assets.count()
-
-    # Calculate percentages
-    summary = []
-    for row in summary_data:
-        percentage = (row['total'] / total_assets_count * 100) if total_assets_count > 0 else 0
-        summary.append({
-            'status': dict(Asset.STATUS_CHOICES).get(row['status'], row['status']), # Get display name
-            'total': row['total'],
-            'percentage': round(percentage, 2)
-        })
+    cleaned = form.cleaned_data if form.is_valid() else {}
+    category, location = cleaned.get('category'), cleaned.get('location')
+
+    # Group by status: totales actuales leídos de los contadores por categoría, ubicación y estado.
+    status_rows, total_assets_count = status_summary(counts=counted_status_counts(category=category, location=location))
+    summary = [
+        {'status': row['label'], 'total': row['total'], 'percentage': row['percentage']}
+        for row in status_rows
+    ]
+
+    # Utilización en el rango de fechas, hasta el último día resumido.
+    last_day = rollup_last_day()
+    usage, usage_start, usage_end = [], None, None
+    if last_day:
+        usage_end = min(cleaned.get('end_date') or last_day, last_day)
+        usage_start = cleaned.get('start_date') or usage_end - timedelta(days=29)
+        if usage_start <= usage_end:
+            usage = usage_by_category(usage_start, usage_end, category=category, location=location)
 
     return render(request, 'reports/asset_usage.html', {
         'form': form,
         'summary': summary,
         'total': total_assets_count,
+        'usage': usage,
+        'usage_start': usage_start,
+        'usage_end': usage_end,
         'title': 'Reporte de Utilización de Activos'
     })
 
@@ -119,6 +129,51 @@ def report_list(request):
     }
     return render(request, 'reports/report_list.html', context)
 
+LOAN_EXPORT_HEADER = ['ID', 'Activo', 'Usuario', 'Fecha de Préstamo', 'Fecha de Vencimiento', 'Fecha de Devolución', 'Estado']
+
+def _loan_rows(loans):
+    """Filas de los reportes de préstamos, leídas por bloques."""
+    for loan in loans.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            loan.id,
+            loan.asset.name,
+            loan.user.username,
+            loan.loan_date.strftime('%d/%m/%Y'),
+            loan.due_date.strftime('%d/%m/%Y'),
+            loan.return_date.strftime('%d/%m/%Y') if loan.return_date else '-',
+            loan.status
+        ]
+
+MAINTENANCE_EXPORT_HEADER = ['ID', 'Activo', 'Técnico', 'Fecha Programada', 'Fecha de Finalización', 'Estado']
+
+def _maintenance_rows(maintenances):
+    """Filas de los reportes de mantenimiento, leídas por bloques."""
+    for m in maintenances.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            m.id,
+            m.asset.name,
+            m.technician.username if m.technician else 'N/A',
+            m.scheduled_date.strftime('%d/%m/%Y') if m.scheduled_date else '-',
+            m.completed_date.strftime('%d/%m/%Y') if m.completed_date else '-',
+            m.get_status_display()
+        ]
+
+EVENT_EXPORT_HEADER = ['ID', 'Título', 'Responsable', 'Fecha de Inicio', 'Fecha de Fin', 'Tipo', 'Lugar']
+
+def _event_rows(events):
+    """Filas de los reportes de eventos, leídas por bloques."""
+    for event in events.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            event.id,
+            event.titulo,
+            event.responsable.username if event.responsable else 'N/A',
+            event.fecha_inicio.strftime('%d/%m/%Y %H:%M'),
+            event.fecha_fin.strftime('%d/%m/%Y %H:%M') if event.fecha_fin else '-',
+            event.get_tipo_display(),
+            event.lugar
+        ]
+
+@cached_report(*LOAN_REPORT_SOURCES)
 def loan_report_pdf(request):
     """
     Genera un informe de préstamos en formato PDF, con opción de filtrar por rango de fechas.
@@ -126,39 +181,20 @@ def loan_report_pdf(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
-    loans = Loan.objects.all()
-    if start_date and end_date:
-        loans = loans.filter(loan_date__range=[start_date, end_date])
-
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="loan_report.pdf"'
-
-    p = canvas.Canvas(response, pagesize=letter)
-    p.setTitle("Reporte de Préstamos")
-
-    p.drawString(200, 750, "Reporte de Préstamos")
-    p.drawString(100, 730, f"Periodo: {start_date or '-'} a {end_date or '-'}")
-
-    y = 700
-    for loan in loans:
-        p.drawString(100, y, f"{loan.id} - {loan.asset.name} - {loan.user.username} - {loan.status}")
-        y -= 20
-        if y < 100:
-            p.showPage()
-            y = 750
-
-    p.showPage()
-    p.save()
-    return response
+    loans = loan_report_queryset(start_date, end_date)
+    return render_pdf_report("loan_report", "Reporte de Préstamos",
+                             [(None, LOAN_EXPORT_HEADER, _loan_rows(loans))],
+                             subtitle=f"Periodo: {start_date or '-'} a {end_date or '-'}")
 
 @group_required('Admin') # Restrict to Admin for now
+@cached_report(*ASSET_REPORT_SOURCES)
 def general_assets_report_pdf(request):
     """
     Genera un informe general de activos en formato PDF, incluyendo resumen por estado,
     distribución por categoría y distribución por ubicación.
     """
     # Consulta 1: Estado general
-    estado_data = Asset.objects.values('status').annotate(total=Count('id'))
+    estado_data, _ = status_summary()
 
     # Consulta 2: Por categoría
     categoria_data = (Asset.objects
@@ -172,93 +208,16 @@ def general_assets_report_pdf(request):
                       .annotate(total=Count('id')) # Removed Sum('value')
                       .order_by('location'))
 
-    # Crear respuesta PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="reporte_general_activos.pdf"'
-
-    pdf = canvas.Canvas(response, pagesize=letter)
-    pdf.setTitle("Reporte General de Activos")
-
-    width, height = letter
-
-    # Encabezado
-    pdf.setFont("Helvetica-Bold", 18)
-    pdf.drawString(150, height - 80, "REPORTE GENERAL DE ACTIVOS")
-    pdf.setFont("Helvetica", 10)
-    pdf.drawString(450, height - 100, f"Fecha: {datetime.now().strftime('%d/%m/%Y')}")
-
-    y = height - 140
-
-    # --- Sección 1: Estado General ---
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y, "1. Resumen por Estado")
-    y -= 20
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(60, y, "Estado")
-    pdf.drawString(250, y, "Cantidad")
-    pdf.drawString(400, y, "Porcentaje (%)")
-    y -= 20
-    pdf.setFont("Helvetica", 11)
-
-    total_activos = sum([e['total'] for e in estado_data]) or 1
-    for e in estado_data:
-        porcentaje = (e['total'] / total_activos) * 100
-        pdf.drawString(60, y, dict(Asset.STATUS_CHOICES).get(e['status'], e['status']).capitalize()) # Get display name
-        pdf.drawString(250, y, str(e['total']))
-        pdf.drawString(400, y, f"{porcentaje:.1f}%")
-        y -= 18
-
-    y -= 20
-
-    # --- Sección 2: Distribución por Categoría ---
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y, "2. Distribución por Categoría")
-    y -= 20
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(60, y, "Categoría")
-    pdf.drawString(250, y, "Cantidad")
-    # pdf.drawString(400, y, "Valor Total ($)") # Removed as 'value' field does not exist
-    y -= 20
-    pdf.setFont("Helvetica", 11)
-
-    for c in categoria_data:
-        pdf.drawString(60, y, c['category__name'] or "Sin categoría")
-        pdf.drawString(250, y, str(c['total']))
-        # pdf.drawString(400, y, f"{c['total_value'] or 0:,.2f}") # Removed
-        y -= 18
-        if y < 100:
-            pdf.showPage()
-            y = height - 100
-
-    y -= 20
-
-    # --- Sección 3: Distribución por Ubicación ---
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y, "3. Distribución por Ubicación")
-    y -= 20
-    pdf.setFont("Helvetica-Bold", 12)
-    pdf.drawString(60, y, "Ubicación")
-    pdf.drawString(250, y, "Cantidad")
-    # pdf.drawString(400, y, "Valor Total ($)") # Removed
-    y -= 20
-    pdf.setFont("Helvetica", 11)
-
-    for u in ubicacion_data:
-        pdf.drawString(60, y, u['location'] or "Sin ubicación") # Changed to 'location'
-        pdf.drawString(250, y, str(u['total']))
-        # pdf.drawString(400, y, f"{u['total_value'] or 0:,.2f}") # Removed
-        y -= 18
-        if y < 100:
-            pdf.showPage()
-            y = height - 100
-
-    # Pie de página
-    pdf.setFont("Helvetica-Oblique", 9)
-    pdf.setFillColor(colors.grey)
-    pdf.drawString(50, 50, f"Reporte generado automáticamente - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    pdf.save()
-
-    return response
+    sections = [
+        ("1. Resumen por Estado", ['Estado', 'Cantidad', 'Porcentaje (%)'],
+         ([e['label'].capitalize(), e['total'], f"{e['percentage']:.1f}%"] for e in estado_data)),
+        ("2. Distribución por Categoría", ['Categoría', 'Cantidad'],
+         ([c['category__name'] or "Sin categoría", c['total']] for c in categoria_data)),
+        ("3. Distribución por Ubicación", ['Ubicación', 'Cantidad'],
+         ([u['location'] or "Sin ubicación", u['total']] for u in ubicacion_data)),
+    ]
+    return render_pdf_report("reporte_general_activos", "REPORTE GENERAL DE ACTIVOS", sections,
+                             subtitle=f"Fecha: {datetime.now().strftime('%d/%m/%Y')}")
 
 def maintenance_report_view(request):
     """
@@ -269,13 +228,7 @@ def maintenance_report_view(request):
     end_date = request.GET.get('end_date')
     technician = request.GET.get('technician')
     status = request.GET.get('status')
-    maintenances = Maintenance.objects.all()
-    if start_date and end_date:
-        maintenances = maintenances.filter(scheduled_date__range=[start_date, end_date])
-    if technician:
-        maintenances = maintenances.filter(technician__username=technician)
-    if status:
-        maintenances = maintenances.filter(status=status)
+    maintenances = maintenance_report_queryset(start_date, end_date, technician, status)
     # Resumen
     total_count = maintenances.count()
     status_summary = maintenances.values('status').annotate(total=Count('id'))
@@ -294,6 +247,7 @@ def maintenance_report_view(request):
     }
     return render(request, 'reports/maintenance_report.html', context)
 
+@cached_report(*MAINTENANCE_REPORT_SOURCES)
 def maintenance_report_pdf(request):
     """
     Genera un informe de mantenimiento en formato PDF, con opciones de filtrado.
@@ -303,34 +257,10 @@ def maintenance_report_pdf(request):
     technician = request.GET.get('technician')
     status = request.GET.get('status')
 
-    maintenances = Maintenance.objects.all()
-    if start_date and end_date:
-        maintenances = maintenances.filter(scheduled_date__range=[start_date, end_date])
-    if technician:
-        maintenances = maintenances.filter(technician__username=technician)
-    if status:
-        maintenances = maintenances.filter(status=status)
-
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="maintenance_report.pdf"'
-
-    p = canvas.Canvas(response, pagesize=letter)
-    p.setTitle("Reporte de Mantenimiento")
-
-    p.drawString(200, 750, "Reporte de Mantenimiento")
-    p.drawString(100, 730, f"Periodo: {start_date or '-'} a {end_date or '-'}")
-
-    y = 700
-    for m in maintenances:
-        p.drawString(100, y, f"Activo: {m.asset.name} - Técnico: {m.technician.username if m.technician else 'N/A'} - Estado: {m.get_status_display()}")
-        y -= 20
-        if y < 100:
-            p.showPage()
-            y = 750
-
-    p.showPage()
-    p.save()
-    return response
+    maintenances = maintenance_report_queryset(start_date, end_date, technician, status)
+    return render_pdf_report("maintenance_report", "Reporte de Mantenimiento",
+                             [(None, MAINTENANCE_EXPORT_HEADER, _maintenance_rows(maintenances))],
+                             subtitle=f"Periodo: {start_date or '-'} a {end_date or '-'}")
 
 from apps.events.models import Evento as Event
 import io
@@ -340,7 +270,7 @@ def events_general_report(request):
     """
     Muestra un informe general de eventos.
     """
-    events = Event.objects.all().order_by('-fecha_inicio')
+    events = event_report_queryset().order_by('-fecha_inicio')
     return render(request, 'reports/events_general.html', {
         'title': 'Reporte General de Eventos',
         'events': events
@@ -352,9 +282,7 @@ def events_by_date(request):
     """
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
-    events = Event.objects.all()
-    if start_date and end_date:
-        events = events.filter(fecha_inicio__range=[start_date, end_date])
+    events = event_report_queryset(start_date, end_date)
     return render(request, 'reports/events_by_date.html', {
         'title': 'Reporte de Eventos por Fecha',
         'events': events,
@@ -366,310 +294,155 @@ def events_by_date(request):
 
 
 
+@cached_report(*EVENT_REPORT_SOURCES)
 def events_general_report_pdf(request):
     """
     Genera un informe general de eventos en formato PDF.
     """
-    events = Event.objects.all().order_by('-fecha_inicio')
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="events_general_report.pdf"'
-
-    p = canvas.Canvas(response, pagesize=letter)
-    p.setTitle("Reporte General de Eventos")
-
-    p.drawString(200, 750, "Reporte General de Eventos")
-
-    y = 700
-    for event in events:
-        p.drawString(100, y, f"{event.titulo} - {event.responsable.username} - {event.fecha_inicio}")
-        y -= 20
-        if y < 100:
-            p.showPage()
-            y = 750
-    
-    p.showPage()
-    p.save()
-    return response
+    events = event_report_queryset().order_by('-fecha_inicio')
+    return render_pdf_report("events_general_report", "Reporte General de Eventos",
+                             [(None, EVENT_EXPORT_HEADER, _event_rows(events))])
 
+@cached_report(*EVENT_REPORT_SOURCES)
 def events_by_date_pdf(request):
     """
     Genera un informe de eventos filtrados por rango de fechas en formato PDF.
     """
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
-    events = Event.objects.all()
-    if start_date and end_date:
-        events = events.filter(fecha_inicio__range=[start_date, end_date])
-    
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="events_by_date_report.pdf"'
-
-    p = canvas.Canvas(response, pagesize=letter)
-    p.setTitle("Reporte de Eventos por Fecha")
-
-    p.drawString(200, 750, "Reporte de Eventos por Fecha")
-    p.drawString(100, 730, f"Periodo: {start_date or '-'} a {end_date or '-'}")
-
-    y = 700
-    for event in events:
-        p.drawString(100, y, f"{event.titulo} - {event.responsable.username} - {event.fecha_inicio}")
-        y -= 20
-        if y < 100:
-            p.showPage()
-            y = 750
-            
-    p.showPage()
-    p.save()
-    return response
+    events = event_report_queryset(start_date, end_date)
+    return render_pdf_report("events_by_date_report", "Reporte de Eventos por Fecha",
+                             [(None, EVENT_EXPORT_HEADER, _event_rows(events))],
+                             subtitle=f"Periodo: {start_date or '-'} a {end_date or '-'}")
 
 @group_required('Admin')
+@cached_report(*ASSET_REPORT_SOURCES)
 def general_assets_report_excel(request):
     """
-    Genera un informe general de activos en formato Excel, incluyendo resumen por estado,
-    distribución por categoría y distribución por ubicación.
+    Genera un informe general de activos en formato Excel (o CSV con `format=csv`),
+    incluyendo resumen por estado, distribución por categoría y distribución por ubicación.
     """
     # Data queries (same as PDF view)
-    estado_data = Asset.objects.values('status').annotate(total=Count('id'))
+    estado_data, _ = status_summary()
     categoria_data = (Asset.objects
-                      .values('category__name')
+                      .values_list('category__name')
                       .annotate(total=Count('id'))
                       .order_by('category__name'))
     ubicacion_data = (Asset.objects
-                      .values('location')
+                      .values_list('location')
                       .annotate(total=Count('id'))
                       .order_by('location'))
 
-    # Create Excel workbook
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="reporte_general_activos.xlsx"'
-
-    wb = Workbook()
-    
-    # --- Sheet 1: Resumen por Estado ---
-    ws1 = wb.active
-    ws1.title = "Resumen por Estado"
-
-    ws1.append(['Estado', 'Cantidad', 'Porcentaje (%)'])
-    total_activos = sum([e['total'] for e in estado_data]) or 1
-    for row in ws1.iter_rows(min_row=1, max_row=1, min_col=1, max_col=3):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for e in estado_data:
-        porcentaje = (e['total'] / total_activos) * 100
-        ws1.append([
-            dict(Asset.STATUS_CHOICES).get(e['status'], e['status']).capitalize(),
-            e['total'],
-            f"{porcentaje:.1f}%"
-        ])
-
-    # --- Sheet 2: Distribución por Categoría ---
-    ws2 = wb.create_sheet(title="Distribución por Categoría")
-    ws2.append(['Categoría', 'Cantidad'])
-    for row in ws2.iter_rows(min_row=1, max_row=1, min_col=1, max_col=2):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for c in categoria_data:
-        ws2.append([
-            c['category__name'] or "Sin categoría",
-            c['total']
-        ])
-
-    # --- Sheet 3: Distribución por Ubicación ---
-    ws3 = wb.create_sheet(title="Distribución por Ubicación")
-    ws3.append(['Ubicación', 'Cantidad'])
-    for row in ws3.iter_rows(min_row=1, max_row=1, min_col=1, max_col=2):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for u in ubicacion_data:
-        ws3.append([
-            u['location'] or "Sin ubicación",
-            u['total']
-        ])
-
-    wb.save(response)
-    return response
-
+    sheets = [
+        ("Resumen por Estado", ['Estado', 'Cantidad', 'Porcentaje (%)'],
+         ([e['label'].capitalize(), e['total'], f"{e['percentage']:.1f}%"] for e in estado_data)),
+        ("Distribución por Categoría", ['Categoría', 'Cantidad'],
+         ([name or "Sin categoría", total] for name, total in categoria_data.iterator(chunk_size=EXPORT_CHUNK_SIZE))),
+        ("Distribución por Ubicación", ['Ubicación', 'Cantidad'],
+         ([location or "Sin ubicación", total] for location, total in ubicacion_data.iterator(chunk_size=EXPORT_CHUNK_SIZE))),
+    ]
+    return export_response(request, "reporte_general_activos", sheets)
+
+@cached_report(*LOAN_REPORT_SOURCES)
 def loan_report_excel(request):
     """
-    Genera un informe de préstamos en formato Excel, con opción de filtrar por rango de fechas.
+    Genera un informe de préstamos en formato Excel (o CSV con `format=csv`),
+    con opción de filtrar por rango de fechas.
     """
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
-    loans = Loan.objects.all()
-    if start_date and end_date:
-        loans = loans.filter(loan_date__range=[start_date, end_date])
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="loan_report.xlsx"'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Préstamos"
-
-    ws.append(['ID', 'Activo', 'Usuario', 'Fecha de Préstamo', 'Fecha de Vencimiento', 'Fecha de Devolución', 'Estado'])
-    for row in ws.iter_rows(min_row=1, max_row=1, min_col=1, max_col=7):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for loan in loans:
-        ws.append([
-            loan.id,
-            loan.asset.name,
-            loan.user.username,
-            loan.loan_date.strftime('%d/%m/%Y'),
-            loan.due_date.strftime('%d/%m/%Y'),
-            loan.return_date.strftime('%d/%m/%Y') if loan.return_date else '-',
-            loan.status
-        ])
-
-    wb.save(response)
-    return response
+    loans = loan_report_queryset(start_date, end_date)
+    return export_response(request, "loan_report", [("Reporte de Préstamos", LOAN_EXPORT_HEADER, _loan_rows(loans))])
 
+@cached_report(*MAINTENANCE_REPORT_SOURCES)
 def maintenance_report_excel(request):
     """
-    Genera un informe de mantenimiento en formato Excel, con opciones de filtrado.
+    Genera un informe de mantenimiento en formato Excel (o CSV con `format=csv`),
+    con opciones de filtrado.
     """
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
     technician = request.GET.get('technician')
     status = request.GET.get('status')
 
-    maintenances = Maintenance.objects.all()
-    if start_date and end_date:
-        maintenances = maintenances.filter(scheduled_date__range=[start_date, end_date])
-    if technician:
-        maintenances = maintenances.filter(technician__username=technician)
-    if status:
-        maintenances = maintenances.filter(status=status)
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="maintenance_report.xlsx"'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Mantenimiento"
-
-    ws.append(['ID', 'Activo', 'Técnico', 'Fecha Programada', 'Fecha de Finalización', 'Estado'])
-    for row in ws.iter_rows(min_row=1, max_row=1, min_col=1, max_col=6):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for m in maintenances:
-        ws.append([
-            m.id,
-            m.asset.name,
-            m.technician.username if m.technician else 'N/A',
-            m.scheduled_date.strftime('%d/%m/%Y') if m.scheduled_date else '-',
-            m.completed_date.strftime('%d/%m/%Y') if m.completed_date else '-',
-            m.get_status_display()
-        ])
-
-    wb.save(response)
-    return response
+    maintenances = maintenance_report_queryset(start_date, end_date, technician, status)
+    return export_response(request, "maintenance_report", [("Reporte de Mantenimiento", MAINTENANCE_EXPORT_HEADER, _maintenance_rows(maintenances))])
 
+@cached_report(*EVENT_REPORT_SOURCES)
 def events_general_report_excel(request):
     """
-    Genera un informe general de eventos en formato Excel.
+    Genera un informe general de eventos en formato Excel (o CSV con `format=csv`).
     """
-    events = Event.objects.all().order_by('-fecha_inicio')
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="events_general_report.xlsx"'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte General de Eventos"
-
-    ws.append(['ID', 'Título', 'Responsable', 'Fecha de Inicio', 'Fecha de Fin', 'Tipo', 'Lugar'])
-    for row in ws.iter_rows(min_row=1, max_row=1, min_col=1, max_col=7):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for event in events:
-        ws.append([
-            event.id,
-            event.titulo,
-            event.responsable.username,
-            event.fecha_inicio.strftime('%d/%m/%Y %H:%M'),
-            event.fecha_fin.strftime('%d/%m/%Y %H:%M'),
-            event.get_tipo_display(),
-            event.lugar
-        ])
-
-    wb.save(response)
-    return response
+    events = event_report_queryset().order_by('-fecha_inicio')
+    return export_response(request, "events_general_report", [("Reporte General de Eventos", EVENT_EXPORT_HEADER, _event_rows(events))])
 
+@cached_report(*EVENT_REPORT_SOURCES)
 def events_by_date_excel(request):
     """
-    Genera un informe de eventos filtrados por rango de fechas en formato Excel.
+    Genera un informe de eventos filtrados por rango de fechas en formato Excel
+    (o CSV con `format=csv`).
     """
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
-    events = Event.objects.all()
-    if start_date and end_date:
-        events = events.filter(fecha_inicio__range=[start_date, end_date])
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="events_by_date_report.xlsx"'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Eventos por Fecha"
-
-    ws.append(['ID', 'Título', 'Responsable', 'Fecha de Inicio', 'Fecha de Fin', 'Tipo', 'Lugar'])
-    for row in ws.iter_rows(min_row=1, max_row=1, min_col=1, max_col=7):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    for event in events:
-        ws.append([
-            event.id,
-            event.titulo,
-            event.responsable.username,
-            event.fecha_inicio.strftime('%d/%m/%Y %H:%M'),
-            event.fecha_fin.strftime('%d/%m/%Y %H:%M'),
-            event.get_tipo_display(),
-            event.lugar
-        ])
-
-    wb.save(response)
-    return response
+    events = event_report_queryset(start_date, end_date)
+    return export_response(request, "events_by_date_report", [("Reporte de Eventos por Fecha", EVENT_EXPORT_HEADER, _event_rows(events))])
 
+@cached_report(*EVENT_REPORT_SOURCES)
 def events_by_user_excel(request):
     """
-    Genera un informe de eventos agrupados por usuario responsable en formato Excel.
+    Genera un informe de eventos agrupados por usuario responsable en formato Excel
+    (o CSV con `format=csv`).
     """
-    events = Event.objects.values('responsable__username').annotate(total=Count('id'))
+    events = Event.objects.values_list('responsable__username').annotate(total=Count('id')).order_by('responsable__username')
+    rows = ([username, total] for username, total in events.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    return export_response(request, "events_by_user_report", [("Reporte de Eventos por Usuario", ['Usuario', 'Total de Eventos'], rows)])
 
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="events_by_user_report.xlsx"'
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Eventos por Usuario"
+@group_required('Admin')
+@require_POST
+def report_job_create(request):
+    """
+    Encola la generación en segundo plano de un reporte descargable.
 
-    ws.append(['Usuario', 'Total de Eventos'])
-    for row in ws.iter_rows(min_row=1, max_row=1, min_col=1, max_col=2):
-        for cell in row:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
+    Espera el nombre del reporte en `report` y sus parámetros en el resto del
+    formulario. Si ya existe un trabajo idéntico reciente, lo reutiliza.
+    Responde 202 con el estado del trabajo y la URL para consultarlo.
+    """
+    params = {key: value for key, value in request.POST.items() if key not in ('report', 'csrfmiddlewaretoken')}
+    try:
+        job, _ = enqueue_report_job(request.POST.get('report', ''), params, request.user)
+    except ValueError as exc:
+        return JsonResponse({'status': 'error', 'message': str(exc)}, status=400)
+    return JsonResponse(_report_job_payload(job), status=202)
 
-    for item in events:
-        ws.append([
-            item['responsable__username'],
-            item['total']
-        ])
+@group_required('Admin')
+def report_job_status(request, pk):
+    """
+    Devuelve en JSON el estado de un trabajo de reporte, con la URL de descarga si ya terminó.
+    """
+    job = get_object_or_404(ReportJob, pk=pk)
+    return JsonResponse(_report_job_payload(job))
 
-    wb.save(response)
-    return response
\ No newline at end of file
+@group_required('Admin')
+def report_job_download(request, pk):
+    """
+    Descarga el fichero generado por un trabajo de reporte terminado.
+    """
+    job = get_object_or_404(ReportJob, pk=pk, status=ReportJob.STATUS_DONE)
+    if not job.artifact or not job.artifact.storage.exists(job.artifact.name):
+        raise Http404("El fichero del reporte ya no está disponible.")
+    return FileResponse(job.artifact.open('rb'), as_attachment=True, filename=job.filename, content_type=job.content_type)
+
+def _report_job_payload(job):
+    payload = {
+        'id': job.pk,
+        'report': job.report,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'status_url': reverse('reports:report_job_status', args=[job.pk]),
+        'download_url': None,
+        'error': job.error,
+    }
+    if job.status == ReportJob.STATUS_DONE:
+        payload['download_url'] = reverse('reports:report_job_download', args=[job.pk])
+    return payload
@@ -1,3 +1,42 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.assets.models import Asset, AssetCategory
+from apps.events.models import Evento
+
+
+class SearchAssetsTests(TestCase):
+    """Buscador de activos disponibles del formulario de solicitudes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = AssetCategory.objects.create(name="Proyectores")
+        cls.free = Asset.objects.create(name="Proyector libre", category=category, location="Aula 1")
+        cls.reserved = Asset.objects.create(name="Proyector reservado", category=category, location="Aula 2")
+        cls.broken = Asset.objects.create(name="Proyector averiado", category=category, location="Aula 3", status='mantenimiento')
+        Asset.objects.create(name="Portátil", category=category, location="Aula 1")
+        cls.start = timezone.localtime() + timedelta(days=1)
+        cls.end = cls.start + timedelta(hours=2)
+        event = Evento.objects.create(titulo="Congreso", status='approved', fecha_inicio=cls.start, fecha_fin=cls.end)
+        event.reserved_assets.add(cls.reserved)
+
+    def search(self, query, start, end):
+        response = self.client.get(reverse('request:search_assets'), {
+            'q': query,
+            'start_date': start.strftime('%Y-%m-%dT%H:%M'),
+            'end_date': end.strftime('%Y-%m-%dT%H:%M'),
+        })
+        return [row['name'] for row in response.json()['results']]
+
+    def test_returns_only_available_matches(self):
+        self.assertEqual(self.search("proyector", self.start, self.end), ["Proyector libre"])
+
+    def test_reservation_outside_window_does_not_block(self):
+        later = self.end + timedelta(days=1)
+        self.assertEqual(self.search("proyector", later, later + timedelta(hours=1)), ["Proyector libre", "Proyector reservado"])
 
-# Create your tests here.
+    def test_invalid_window_returns_nothing(self):
+        self.assertEqual(self.search("proyector", self.end, self.start), [])
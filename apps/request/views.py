@@ -6,10 +6,12 @@ from apps.assets.models import Asset
 from apps.loans.models import Loan
 from django.contrib import messages
 from apps.accounts.decorators import group_required, groups_required
+from apps.accounts.roles import in_groups
+from apps.assets.journal import CAUSE_REQUEST_APPROVE
 
 @login_required
 def request_list(request):
-    if request.user.groups.filter(name__in=['Administrador', 'Staff']).exists():
+    if in_groups(request.user, 'Administrador', 'Staff'):
         requests = LoanRequest.objects.all().order_by('-request_date')
     else:
         requests = LoanRequest.objects.filter(user=request.user).order_by('-request_date')
@@ -78,35 +80,34 @@ def request_approve(request, pk):
         messages.error(request, f"La solicitud de '{req.user.username}' para '{req.asset.name}' no se puede aprobar porque no tiene fecha de inicio.")
         return redirect('request:request_list')
 
-    req.status = 'approved'
-    req.response_date = timezone.now()
-    req.save()
-
-    # Cambiar el estado del activo a 'en_uso'
-    asset = req.asset
-    asset.status = 'en_uso'
-    asset.save()
-
-    # Crear el préstamo
-    loan = Loan.objects.create(
-        asset=req.asset,
-        user=req.user,
-        status='Activo',
-        loan_date=req.start_date,
-        return_date=req.end_date
-    )
-
-    # Crear el evento para bloquear el activo
-    evento = Evento.objects.create(
-        titulo=f"Préstamo de {req.asset.name}",
-        descripcion=f"Préstamo a {req.user.username}",
-        fecha_inicio=req.start_date,
-        fecha_fin=req.end_date,
-        responsable=req.user,
-        status='active',
-        tipo='prestamo'
-    )
-    evento.reserved_assets.add(req.asset)
+    with transaction.atomic():
+        req.status = 'approved'
+        req.response_date = timezone.now()
+        req.save()
+
+        # Cambiar el estado del activo a 'en_uso'
+        req.asset.set_status('en_uso', CAUSE_REQUEST_APPROVE)
+
+        # Crear el préstamo
+        loan = Loan.objects.create(
+            asset=req.asset,
+            user=req.user,
+            status='Activo',
+            loan_date=req.start_date,
+            return_date=req.end_date
+        )
+
+        # Crear el evento para bloquear el activo
+        evento = Evento.objects.create(
+            titulo=f"Préstamo de {req.asset.name}",
+            descripcion=f"Préstamo a {req.user.username}",
+            fecha_inicio=req.start_date,
+            fecha_fin=req.end_date,
+            responsable=req.user,
+            status='active',
+            tipo='prestamo'
+        )
+        evento.reserved_assets.add(req.asset)
 
     messages.success(request, f"La solicitud de '{req.user.username}' para '{req.asset.name}' ha sido aprobada.")
     return redirect('request:request_list')
@@ -122,7 +123,10 @@ def request_reject(request, pk):
     req.save()
     return redirect('request:request_list')
 
-from apps.assets.utils import activos_disponibles
+from apps.assets.availability import asset_availability, parse_window_datetime
+
+# Máximo de activos disponibles que devuelve el buscador de solicitudes.
+SEARCH_RESULTS_LIMIT = 50
 
 @groups_required(['Administrador'])
 def request_delete(request, pk):
@@ -132,22 +136,32 @@ def request_delete(request, pk):
     return redirect('request:request_list')
 
 def search_assets(request):
+    """
+    Activos cuyo nombre contiene `q` y que están disponibles entre `start_date` y
+    `end_date` según `apps.assets.availability`, ordenados por nombre.
+    """
     query = request.GET.get('q', '')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
+    start = parse_window_datetime(request.GET.get('start_date'))
+    end = parse_window_datetime(request.GET.get('end_date'))
 
-    if not start_date or not end_date:
+    if start is None or end is None or start >= end:
         return JsonResponse({'results': []})
 
-    assets = activos_disponibles(start_date, end_date).filter(name__icontains=query)[:10]
+    # Primero se filtran los candidatos por nombre; la disponibilidad de todos
+    # ellos se resuelve en una sola consulta.
+    candidates = Asset.objects.filter(name__icontains=query).values('pk')
+    availability = asset_availability(start, end, asset_ids=candidates)
+    available = sorted((entry for entry in availability.values() if entry['available']),
+                       key=lambda entry: (entry['name'], entry['id']))[:SEARCH_RESULTS_LIMIT]
 
+    assets = Asset.objects.select_related('category').in_bulk([entry['id'] for entry in available])
     results = [
         {
-            'id': a.id,
-            'name': a.name,
-            'category': a.category.name if a.category else '',
-            'location': a.location,
-            'status': a.status,
-        } for a in assets
+            'id': entry['id'],
+            'name': entry['name'],
+            'category': assets[entry['id']].category.name if assets[entry['id']].category else '',
+            'location': assets[entry['id']].location,
+            'status': entry['status'],
+        } for entry in available
     ]
     return JsonResponse({'results': results})
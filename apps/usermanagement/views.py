@@ -6,6 +6,7 @@ from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import redirect
 from django.contrib import messages
+from apps.accounts.roles import in_groups
 
 class AdminOrSuperuserRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     """
@@ -13,14 +14,14 @@ class AdminOrSuperuserRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     """
     def test_func(self):
         """Comprueba si el usuario es superusuario o pertenece al grupo 'Admin'."""
-        return self.request.user.is_superuser or self.request.user.groups.filter(name='administrador').exists()
+        return self.request.user.is_superuser or in_groups(self.request.user, 'administrador')
 
 class UserOwnerOrAdminMixin(LoginRequiredMixin, UserPassesTestMixin):
     """
     Mixin que permite el acceso si el usuario es el dueño del objeto, un superusuario o un Admin.
     """
     def test_func(self):
-        is_admin_or_superuser = self.request.user.is_superuser or self.request.user.groups.filter(name='administrador').exists()
+        is_admin_or_superuser = self.request.user.is_superuser or in_groups(self.request.user, 'administrador')
         is_owner = self.request.user.pk == self.get_object().pk
         return is_admin_or_superuser or is_owner
 
@@ -118,7 +119,7 @@ class UserUpdateForm(forms.ModelForm):
         # Check if the user is an admin/superuser
         is_admin_or_superuser = False
         if request and request.user.is_authenticated:
-            is_admin_or_superuser = request.user.is_superuser or request.user.groups.filter(name='administrador').exists()
+            is_admin_or_superuser = request.user.is_superuser or in_groups(request.user, 'administrador')
         
         # If the user is not an admin, remove the fields for role and permissions
         if not is_admin_or_superuser:
@@ -175,7 +176,7 @@ class UserUpdateView(UserOwnerOrAdminMixin, UpdateView):
         return super().form_valid(form)
 
     def get_success_url(self):
-        is_admin_or_superuser = self.request.user.is_superuser or self.request.user.groups.filter(name='administrador').exists()
+        is_admin_or_superuser = self.request.user.is_superuser or in_groups(self.request.user, 'administrador')
         
         if is_admin_or_superuser:
             return reverse_lazy('user_list')
@@ -0,0 +1,125 @@
+"""
+Utilidades para responder a tablas DataTables en modo servidor (`serverSide: true`).
+
+La paginación, el orden y el conteo se resuelven en la base de datos. Además del
+desplazamiento clásico (`start`), las respuestas incluyen un cursor firmado
+(`next_cursor`) con la clave de orden de la última fila; si el cliente lo envía
+como parámetro `after` al pedir la página siguiente, la consulta usa paginación
+por conjunto de claves (`WHERE (orden, id) > (...)`) en lugar de `OFFSET`, con
+un coste constante sin importar lo profunda que sea la página.
+"""
+import hashlib
+
+from django.core import signing
+from django.db.models import F, Q
+from django.http import JsonResponse
+
+DEFAULT_PAGE_LENGTH = 25
+MAX_PAGE_LENGTH = 100
+CURSOR_SALT = 'core.datatables.cursor'
+
+
+def _int_param(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _ordering(params, columns, default_order):
+    """Devuelve (campo, dirección) a partir de `order[0][column]` y `order[0][dir]`."""
+    field, direction = default_order
+    index = _int_param(params, 'order[0][column]', None)
+    if index is not None and 0 <= index < len(columns) and columns[index]:
+        field = columns[index]
+        direction = 'desc' if params.get('order[0][dir]') == 'desc' else 'asc'
+    return field, direction
+
+
+def _cursor_value(value):
+    """Convierte el valor de orden a algo serializable en JSON."""
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _keyset_filter(value, pk, direction):
+    """
+    Filas estrictamente posteriores a (value, pk) según la dirección de orden.
+
+    Los NULL se ordenan como el valor más pequeño en todos los motores (ver
+    `datatables_response`): en orden ascendente ya quedaron atrás y en
+    descendente van al final y deben seguir incluyéndose.
+    """
+    if direction == 'desc':
+        return Q(dt_sort__lt=value) | Q(dt_sort=value, pk__lt=pk) | Q(dt_sort__isnull=True)
+    return Q(dt_sort__gt=value) | Q(dt_sort=value, pk__gt=pk)
+
+
+def datatables_response(request, base_queryset, queryset, columns, serialize_row, default_order=('pk', 'asc')):
+    """
+    Construye la respuesta JSON que espera DataTables en modo servidor.
+
+    Args:
+        request (HttpRequest): Petición con los parámetros de DataTables (`draw`,
+            `start`, `length`, `order[0][column]`, `order[0][dir]`) y, opcionalmente, `after`.
+        base_queryset (QuerySet): Conjunto sin filtrar, usado para `recordsTotal`.
+        queryset (QuerySet): Conjunto ya filtrado, usado para `recordsFiltered` y los datos.
+            Si es el mismo objeto que `base_queryset` se ahorra el segundo conteo.
+        columns (list): Campo ORM ordenable de cada columna de la tabla, o None si
+            la columna no se puede ordenar.
+        serialize_row (callable): Convierte cada objeto en un dict para la fila.
+        default_order (tuple): (campo, dirección) cuando la petición no indica orden.
+
+    Returns:
+        JsonResponse: {'draw', 'recordsTotal', 'recordsFiltered', 'data', 'next_cursor'}
+    """
+    params = request.GET
+    draw = _int_param(params, 'draw', 0)
+    start = max(_int_param(params, 'start', 0), 0)
+    length = _int_param(params, 'length', DEFAULT_PAGE_LENGTH)
+    if length <= 0 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+
+    field, direction = _ordering(params, columns, default_order)
+    # Identifica orden y filtros: un cursor emitido para otra consulta se ignora.
+    order_key = f'{field}:{direction}:' + hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+    # Los NULL se colocan explícitamente (PostgreSQL los pone al final en orden
+    # ascendente), de acuerdo con `_keyset_filter`.
+    if direction == 'desc':
+        ordering = (F('dt_sort').desc(nulls_last=True), F('pk').desc())
+    else:
+        ordering = (F('dt_sort').asc(nulls_first=True), F('pk').asc())
+    rows = queryset.annotate(dt_sort=F(field)).order_by(*ordering)
+
+    page = None
+    after = params.get('after')
+    if after:
+        try:
+            cursor = signing.loads(after, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            cursor = None
+        # El cursor solo es válido para la página y la consulta para las que se emitió.
+        if cursor and cursor.get('order') == order_key and cursor.get('start') == start:
+            page = list(rows.filter(_keyset_filter(cursor['value'], cursor['pk'], direction))[:length])
+    if page is None:
+        page = list(rows[start:start + length])
+
+    next_cursor = None
+    if len(page) == length and page[-1].dt_sort is not None:
+        last = page[-1]
+        next_cursor = signing.dumps({
+            'order': order_key,
+            'start': start + length,
+            'value': _cursor_value(last.dt_sort),
+            'pk': last.pk,
+        }, salt=CURSOR_SALT)
+
+    records_total = base_queryset.count()
+    records_filtered = records_total if queryset is base_queryset else queryset.count()
+
+    return JsonResponse({
+        'draw': draw,
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
+        'data': [serialize_row(obj) for obj in page],
+        'next_cursor': next_cursor,
+    })
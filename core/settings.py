@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -64,6 +65,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.accounts.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -147,6 +149,47 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Reportes generados en segundo plano (apps.reports.jobs). No se sirven como
+# ficheros estáticos: se descargan a través de una vista con control de acceso.
+REPORT_ARTIFACTS_ROOT = os.path.join(BASE_DIR, 'report_artifacts')
+# Segundos durante los que un reporte terminado se reutiliza para una solicitud idéntica.
+REPORT_JOB_REUSE_SECONDS = 300
+# Segundos tras los que un trabajo 'running' se considera abandonado y vuelve a la cola.
+REPORT_JOB_TIMEOUT = 1800
+# Segundos que se conserva una versión cacheada de un reporte (apps.reports.cache).
+REPORT_CACHE_TTL = 86400
+
+# Diario de cambios de estado de activos (apps.assets.journal): consumidores
+# incrementales (nombre -> ruta de la función) y antigüedad mínima, en segundos,
+# de las transiciones que se les entregan.
+ASSET_JOURNAL_CONSUMERS = {}
+ASSET_JOURNAL_LAG_SECONDS = 5
+# Segundos durante los que se siguen buscando los ids que faltaban por debajo del
+# cursor (transacciones confirmadas fuera de orden).
+ASSET_JOURNAL_GAP_SECONDS = 3600
+
+# Segundos que se comparten entre peticiones los grupos de un usuario (apps.accounts.roles).
+ROLE_CACHE_TTL = 60
+
+# Modelos de spaCy del chatbot (apps.chatbot.nlp): ruta o nombre de paquete.
+CHATBOT_INTENT_MODEL = os.path.join(BASE_DIR, 'chatbot_model')
+CHATBOT_NER_MODEL = 'es_core_news_md'
+# Micro-lotes de clasificación de intenciones (apps.chatbot.batching). Solo agrupan
+# peticiones con workers de varios hilos; con 0 ms se clasifica cada mensaje por separado.
+CHATBOT_INTENT_BATCH_SIZE = 32
+CHATBOT_INTENT_BATCH_WAIT_MS = 5
+# Caché de análisis de mensajes (apps.chatbot.cache): entradas, segundos de vida y
+# cada cuántos segundos se comprueba si el modelo ha cambiado en disco.
+CHATBOT_INTENT_CACHE_SIZE = 1024
+CHATBOT_INTENT_CACHE_TTL = 3600
+CHATBOT_MODEL_CHECK_SECONDS = 10
+# Índice de nombres de activos (apps.chatbot.asset_index): milisegundos por búsqueda
+# y cada cuántos segundos se buscan cambios hechos por otros procesos.
+CHATBOT_ASSET_SEARCH_BUDGET_MS = 1
+CHATBOT_ASSET_INDEX_CHECK_SECONDS = 5
+# Activos por página en los listados del chatbot ("Ver más" pide la siguiente).
+CHATBOT_LIST_LIMIT = 25
+
 # Authentication Redirect URLs
 LOGIN_REDIRECT_URL = 'dashboard_home' # Redirect to dashboard after login
 LOGOUT_REDIRECT_URL = 'dashboard_home' # Redirect to dashboard after logout (or a login page)
@@ -158,4 +201,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 INTERNAL_IPS = [
     '127.0.0.1',
-]
\ No newline at end of file
+]
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Se usa una caché en disco compartida por todos los workers de gunicorn, para que
+# las invalidaciones hechas por señales en un proceso se vean en los demás.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'unimanage_cache'),
+    }
+}
+
+# Segundos que vive el snapshot de métricas del dashboard de administración.
+DASHBOARD_METRICS_TTL = 300
@@ -1,5 +1,7 @@
 from django import template
 
+from apps.accounts.roles import in_groups
+
 register = template.Library()
 
 @register.simple_tag
@@ -10,7 +12,7 @@ def in_group(user, group_name):
     """
     if not user or not user.is_authenticated:
         return False
-    return user.groups.filter(name=group_name).exists()
+    return in_groups(user, group_name)
 @register.simple_tag
 def is_in_groups(user, group_names):
     """
@@ -21,4 +23,4 @@ def is_in_groups(user, group_names):
     if not user or not user.is_authenticated:
         return False
     group_list = [group.strip() for group in group_names.split(',')]
-    return user.groups.filter(name__in=group_list).exists()
+    return in_groups(user, *group_list)
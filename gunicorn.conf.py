@@ -0,0 +1,18 @@
+# gunicorn.conf.py
+"""
+Configuración de gunicorn (se lee automáticamente desde el directorio de trabajo).
+
+Con `CHATBOT_PRELOAD_MODELS=1` la aplicación y los modelos de spaCy del chatbot se
+cargan una sola vez en el proceso maestro antes de crear los workers, que los
+comparten por copy-on-write en lugar de cargar cada uno su propia copia.
+"""
+import os
+
+preload_app = os.environ.get('CHATBOT_PRELOAD_MODELS', '').lower() in ('1', 'true', 'yes')
+
+
+def when_ready(server):
+    if preload_app:
+        from apps.chatbot.nlp import registry
+        registry.preload(['intent'])
+        server.log.info("Modelos del chatbot precargados: %s", registry.metrics())
@@ -4,44 +4,22 @@ import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django.setup()
 
-from apps.assets.models import Asset
-from apps.maintenance.models import Maintenance
-from apps.loans.models import Loan # Import Loan model
+from apps.assets.reconciliation import reconcile_asset_statuses
 
 def sync_asset_statuses():
     """
     Synchronizes the status of all assets based on active loans and maintenance tasks.
+    The target statuses are computed and applied in a few set-based queries
+    (see apps.assets.reconciliation).
     """
     print("Starting asset status synchronization...")
 
-    all_assets = Asset.objects.all()
+    report = reconcile_asset_statuses()
 
-    for asset in all_assets:
-        current_status = asset.status
-        new_status = current_status # Assume status remains unchanged unless a rule dictates otherwise
-
-        # Rule 1: Check for active maintenance
-        active_maintenance_exists = Maintenance.objects.filter(
-            asset=asset,
-            status__in=['Pendiente', 'En proceso']
-        ).exists()
-
-        # Rule 2: Check for active loans
-        active_loan_exists = Loan.objects.filter(
-            asset=asset,
-            status='Activo'
-        ).exists()
-
-        if active_maintenance_exists:
-            new_status = 'mantenimiento'
-        elif active_loan_exists:
-            new_status = 'en_uso'
-        else:
-            new_status = 'disponible'
-
-        print(f"Asset '{asset.name}' (ID: {asset.id}) status changed from '{current_status}' to '{new_status}'.")
-        asset.status = new_status
-        asset.save()
+    for status, count in report['changes'].items():
+        print(f"{count} assets changed to '{status}'.")
+    for phase, seconds in report['timings'].items():
+        print(f"{phase}: {seconds:.3f}s")
 
     print("Asset status synchronization finished.")
 